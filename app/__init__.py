@@ -12,6 +12,10 @@ def create_app():
     # IMPORTANTE: Configurar static_url_path com o prefixo
     app = Flask(__name__, static_url_path=f'{ROUTES_PREFIX}/static')
     app.config['SECRET_KEY'] = '123rfid'
+
+    # Provedor JSON com codificador acelerado (orjson) quando instalado
+    from .utils.ProvedorJSON import ProvedorJSONRFID
+    app.json = ProvedorJSONRFID(app)
     
     # Inicializa gerenciador de etiquetas RFID
     try:
@@ -31,6 +35,15 @@ def create_app():
         rfid_logger.error(f"Erro ao inicializar gerenciador de leitores: {e}")
         app.config['GERENCIADOR_LEITORES'] = None
     
+    # Inicializa a materialização de últimas leituras RFID
+    try:
+        from .utils.GerenciadorUltimasLeiturasRFID import GerenciadorUltimasLeiturasRFID
+        app.config['GERENCIADOR_ULTIMAS_LEITURAS'] = GerenciadorUltimasLeiturasRFID.get_instance()
+        rfid_logger.info("Gerenciador de últimas leituras RFID iniciado")
+    except Exception as e:
+        rfid_logger.error(f"Erro ao inicializar gerenciador de últimas leituras: {e}")
+        app.config['GERENCIADOR_ULTIMAS_LEITURAS'] = None
+    
     # Inicializa gerenciador de empréstimos RFID
     try:
         from .utils.GerenciadorEmprestimosRFID import GerenciadorEmprestimosRFID
@@ -57,6 +70,27 @@ def create_app():
     except Exception as e:
         rfid_logger.error(f"Erro ao inicializar gerenciador de PING: {e}")
         app.config['GERENCIADOR_PING'] = None
+    
+    # Inicializa gerenciador de jobs em segundo plano
+    try:
+        from .utils.GerenciadorJobsRFID import GerenciadorJobsRFID
+        app.config['GERENCIADOR_JOBS'] = GerenciadorJobsRFID.get_instance()
+        rfid_logger.info("Gerenciador de jobs RFID iniciado")
+    except Exception as e:
+        rfid_logger.error(f"Erro ao inicializar gerenciador de jobs: {e}")
+        app.config['GERENCIADOR_JOBS'] = None
+
+    # Unidade de trabalho por requisição: todas as consultas de uma requisição
+    # compartilham uma única conexão MySQL por pool
+    from .utils.PoolConexoesMySQL import PoolConexoesMySQL
+
+    @app.before_request
+    def iniciar_escopo_conexoes():
+        PoolConexoesMySQL.iniciar_escopo()
+
+    @app.teardown_request
+    def encerrar_escopo_conexoes(exc):
+        PoolConexoesMySQL.encerrar_escopo()
 
     # Handlers de erro
     @app.errorhandler(404)
@@ -81,6 +115,7 @@ def create_app():
     from .routes.api_emprestimos import api_emprestimos_bp
     from .routes.api_inventarios import api_inventarios_bp
     from .routes.api_ping import api_ping_bp
+    from .routes.api_jobs import api_jobs_bp
     
     # IMPORTANTE: Registrar com url_prefix
     app.register_blueprint(web_bp, url_prefix=ROUTES_PREFIX)
@@ -89,6 +124,7 @@ def create_app():
     app.register_blueprint(api_emprestimos_bp, url_prefix=f'{ROUTES_PREFIX}/api')
     app.register_blueprint(api_inventarios_bp, url_prefix=f'{ROUTES_PREFIX}/api')
     app.register_blueprint(api_ping_bp, url_prefix=f'{ROUTES_PREFIX}/api')
+    app.register_blueprint(api_jobs_bp, url_prefix=f'{ROUTES_PREFIX}/api')
     
     # Log de rotas registradas para debug
     rfid_logger.info("Rotas registradas:")
@@ -23,6 +23,72 @@ MYSQL_CONFIG = {
     'ssl_disabled': True  # Desabilita verificação SSL para tce.go.gov.br
 }
 
+# Configurações do pool de conexões MySQL (compartilhado pelos gerenciadores)
+MYSQL_POOL_CONFIG = {
+    'tamanho': int(os.environ.get('RFID_MYSQL_POOL_TAMANHO', 10)),  # Conexões físicas por pool
+    'timeout_checkout': 10,        # Segundos aguardando uma conexão livre
+    'verificar_apos_ociosa': 5,    # Ping de saúde se a conexão ficou ociosa por mais que isso (s)
+    'tempo_vida_maximo': 1800      # Recicla conexões antes do wait_timeout do servidor (s)
+}
+
+# Configurações do cache (compartilhado pelos gerenciadores)
+CACHE_CONFIG = {
+    'max_itens': int(os.environ.get('RFID_CACHE_MAX_ITENS', 2000)),                  # Entradas no total
+    'max_bytes': int(os.environ.get('RFID_CACHE_MAX_MB', 128)) * 1024 * 1024,         # Orçamento de memória
+    'intervalo_varredura': 60,                                                         # Remoção de expirados (s)
+    'tolerancia_obsoleto': 600,     # Entradas expiradas ficam disponíveis como fallback por mais este tempo (s)
+    'timeout_coalescencia': 20,     # Espera máxima pelo cálculo de outra requisição idêntica (s)
+    'intervalo_refresh_forcado': 15,  # force_refresh da mesma chave é ignorado se o valor tem menos que isso (s)
+    # 'memoria' (por processo) ou 'redis' (compartilhado entre workers; requer o pacote redis)
+    'backend': os.environ.get('RFID_CACHE_BACKEND', 'memoria'),
+    'redis_url': os.environ.get('RFID_CACHE_REDIS_URL', 'redis://127.0.0.1:6379/0'),
+    'prefixo_redis': os.environ.get('RFID_CACHE_PREFIXO', 'rfid:cache')
+}
+
+# API do HelpDesk Monitor (competências dos usuários)
+HELPDESK_CONFIG = {
+    'api_base': os.environ.get('HELPDESK_API_BASE', 'https://automacao.tce.go.gov.br/helpdeskmonitor/api'),
+    'timeout': 3,                   # Timeout de cada chamada (s)
+    'verificar_ssl': False,         # Certificado interno do TCE
+    'conexoes': 4,                  # Conexões HTTP mantidas abertas (keep-alive)
+    'ttl_competencias': 300,        # Validade das competências de um usuário (s)
+    'ttl_negativo': 60,             # Usuário sem competências / não encontrado (s)
+    'ttl_erro': 30,                 # HelpDesk indisponível e nada em cache (s)
+    'ttl_tecnicos': 600,            # Índice de técnicos por nome_usuario_htpasswd (s)
+    'ttl_ultimo_conhecido': 7 * 86400,  # Último resultado da API, usado com o HelpDesk fora do ar (s)
+    'falhas_para_abrir': 3,         # Falhas seguidas que abrem o circuito
+    'tempo_circuito_aberto': 30     # Tempo sem chamar a API depois de abrir o circuito (s)
+}
+
+# Materialização das últimas leituras por etiqueta (GerenciadorUltimasLeiturasRFID)
+# A marca d'água é o maior Horario já processado: leituras que chegam atrasadas
+# com Horario antigo (leitor que ficou offline) só entram pela sobreposição ou
+# pela reconciliação periódica, que reprocessa os últimos dias_reconciliacao dias.
+ULTIMAS_LEITURAS_CONFIG = {
+    'dias_carga_inicial': 180,      # Dias agregados na primeira carga
+    'sobreposicao_segundos': int(os.environ.get('RFID_ULTIMAS_SOBREPOSICAO', 300)),     # Reprocessado antes da marca
+    'intervalo_reconciliacao': int(os.environ.get('RFID_ULTIMAS_RECONCILIACAO', 3600)),  # s (0 = desativada)
+    'dias_reconciliacao': int(os.environ.get('RFID_ULTIMAS_DIAS_RECONCILIACAO', 7))      # Janela da reconciliação
+}
+
+# Cache em disco das fotos de leituras e PINGs (evita ler o BLOB do MySQL a cada imagem)
+FOTOS_CONFIG = {
+    'diretorio': os.environ.get('RFID_FOTOS_DIR', os.path.join(DATA_DIR, 'fotos')),
+    'max_bytes': int(os.environ.get('RFID_FOTOS_MAX_MB', 1024)) * 1024 * 1024,   # Limite em disco
+    'revalidar_etiqueta': 60,       # Foto mais recente de uma etiqueta: confere no banco após (s)
+    # Miniaturas (?size=...): maior lado em pixels; 'full' é sempre a foto original
+    'tamanhos': {
+        'thumb': 240,
+        'medium': 1024
+    },
+    'workers_miniaturas': 2,        # Threads que geram miniaturas (requer Pillow)
+    'limite_lote': 500,             # Itens por chamada de /foto/info:batch
+    'retencao_indice': 7 * 86400,   # Metadados de fotos despejadas: apagados após (s) sem uso
+    # Migração concluída (scripts/migrar_fotos.py): "tem foto" passa a ser só FotoTamanho > 0
+    'migracao_concluida': os.environ.get('RFID_FOTOS_MIGRACAO_CONCLUIDA', '0').lower() in ('1', 'true', 'sim'),
+    'qualidade_jpeg': 80
+}
+
 # Configuração dos diretórios de logs
 LOG_DIR = '/var/softwaresTCE/logs/RFID'
 LOG_FILE = os.path.join(LOG_DIR, 'app.log')
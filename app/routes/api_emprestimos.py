@@ -3,6 +3,7 @@ from flask import Blueprint, jsonify, request, current_app
 import logging
 import traceback
 from datetime import datetime
+from ..utils.SerializacaoJSON import resposta_json
 
 api_emprestimos_bp = Blueprint('api_emprestimos', __name__)
 logger = logging.getLogger('RFID.api_emprestimos')
@@ -56,7 +57,7 @@ def listar_emprestimos():
                 }), 400
         
         if request.args.get('etiqueta'):
-            filtros['etiqueta'] = request.args.get('etiqueta')
+            filtros['etiqueta'] = request.args.get('etiqueta').strip()
         
         if request.args.get('status'):
             status = request.args.get('status').lower()
@@ -69,10 +70,10 @@ def listar_emprestimos():
                 }), 400
         
         if request.args.get('data_inicio'):
-            filtros['data_inicio'] = request.args.get('data_inicio')
+            filtros['data_inicio'] = request.args.get('data_inicio').strip()
         
         if request.args.get('data_fim'):
-            filtros['data_fim'] = request.args.get('data_fim')
+            filtros['data_fim'] = request.args.get('data_fim').strip()
         
         # Verificar se é uma atualização forçada
         force_refresh = request.args.get('force_refresh', '').lower() == 'true'
@@ -94,7 +95,7 @@ def listar_emprestimos():
                 'error': resultado.get('error', 'Erro ao buscar empréstimos')
             }), 500
         
-        return jsonify(resultado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro não tratado ao listar empréstimos: {str(e)}")
@@ -221,7 +222,7 @@ def listar_emprestimos_ativos_colaborador(id_colaborador):
         resultado = gerenciador.obter_emprestimos_ativos_colaborador(id_colaborador)
         
         if resultado['success']:
-            return jsonify(resultado)
+            return resposta_json(resultado)
         else:
             return jsonify(resultado), 500
     
@@ -328,7 +329,7 @@ def obter_estatisticas_emprestimos():
         resultado = gerenciador.obter_estatisticas_emprestimos(force_refresh=force_refresh)
         
         if resultado['success']:
-            return jsonify(resultado)
+            return resposta_json(resultado)
         else:
             return jsonify(resultado), 500
     
@@ -363,11 +364,12 @@ def listar_emprestimos_pendentes():
         )
         
         if resultado['success']:
-            # Adicionar informação de tempo decorrido
-            emprestimos = resultado.get('emprestimos', [])
+            # Adicionar informação de tempo decorrido (em cópias: as linhas vêm do cache, que é somente leitura)
+            emprestimos = []
             agora = datetime.now()
             
-            for emp in emprestimos:
+            for emp in resultado.get('emprestimos', []):
+                emp = dict(emp)
                 if emp.get('dataEmprestimo'):
                     # Calcular tempo decorrido
                     data_emprestimo = emp['dataEmprestimo']
@@ -385,9 +387,10 @@ def listar_emprestimos_pendentes():
                     
                     # Adicionar flag de alerta se muito tempo
                     emp['alerta'] = dias > 7  # Alerta se mais de 7 dias
+                emprestimos.append(emp)
             
             resultado['emprestimos'] = emprestimos
-            return jsonify(resultado)
+            return resposta_json(resultado)
         else:
             return jsonify(resultado), 500
     
@@ -2,7 +2,7 @@
 from flask import Blueprint, jsonify, request, current_app
 import logging
 import traceback
-from datetime import datetime
+from ..utils.SerializacaoJSON import resposta_json
 
 api_bp = Blueprint('api', __name__)
 logger = logging.getLogger('RFID.api')
@@ -42,9 +42,9 @@ def listar_etiquetas():
         # Filtros
         filtros = {}
         if request.args.get('etiqueta'):
-            filtros['etiqueta'] = request.args.get('etiqueta')
+            filtros['etiqueta'] = request.args.get('etiqueta').strip()
         if request.args.get('descricao'):
-            filtros['descricao'] = request.args.get('descricao')
+            filtros['descricao'] = request.args.get('descricao').strip()
 
         if request.args.get('destruida') is not None:
             try:
@@ -72,49 +72,9 @@ def listar_etiquetas():
                 'error': resultado.get('error', 'Erro ao buscar etiquetas')
             }), 500
         
-        # Processar dados das etiquetas para incluir status formatado
-        etiquetas_processadas = []
-        for etiqueta in resultado.get('etiquetas', []):
-            etiqueta_processada = etiqueta.copy()
-            
-            # Adicionar campos de status baseado na data de destruição
-            if etiqueta.get('Destruida') is not None:
-                etiqueta_processada['status'] = 'destruida'
-                etiqueta_processada['ativa'] = False
-                # Formatar data de destruição para exibição
-                try:
-                    # Se for um objeto datetime
-                    if hasattr(etiqueta['Destruida'], 'strftime'):
-                        etiqueta_processada['data_destruicao_formatada'] = etiqueta['Destruida'].strftime('%d/%m/%Y às %H:%M')
-                    # Se for uma string
-                    elif isinstance(etiqueta['Destruida'], str):
-                        # Tentar vários formatos de data
-                        for fmt in ['%Y-%m-%d %H:%M:%S', '%a, %d %b %Y %H:%M:%S GMT']:
-                            try:
-                                data_destruicao = datetime.strptime(etiqueta['Destruida'], fmt)
-                                etiqueta_processada['data_destruicao_formatada'] = data_destruicao.strftime('%d/%m/%Y às %H:%M')
-                                break
-                            except ValueError:
-                                continue
-                        else:
-                            # Se nenhum formato funcionou, usar a string original
-                            etiqueta_processada['data_destruicao_formatada'] = str(etiqueta['Destruida'])
-                    else:
-                        etiqueta_processada['data_destruicao_formatada'] = str(etiqueta['Destruida'])
-                except Exception as e:
-                    logger.error(f"Erro ao formatar data: {e}")
-                    etiqueta_processada['data_destruicao_formatada'] = str(etiqueta['Destruida'])
-            else:
-                etiqueta_processada['status'] = 'ativa'
-                etiqueta_processada['ativa'] = True
-                etiqueta_processada['data_destruicao_formatada'] = None
-            
-            etiquetas_processadas.append(etiqueta_processada)
-        
-        # Atualizar resultado com etiquetas processadas
-        resultado['etiquetas'] = etiquetas_processadas
-        
-        return jsonify(resultado)
+        # status, ativa e data_destruicao_formatada já vêm do gerenciador: o
+        # retrato em cache é devolvido sem alterações (corpo JSON reaproveitado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro não tratado ao listar etiquetas: {str(e)}")
@@ -416,7 +376,7 @@ def obter_estatisticas():
             }), 500
             
         logger.info("Estatísticas obtidas com sucesso")
-        return jsonify(resultado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro não tratado ao obter estatísticas: {str(e)}")
@@ -426,6 +386,31 @@ def obter_estatisticas():
             'error': f'Erro interno: {str(e)}'
         }), 500
 
+@api_bp.route('/metricas', methods=['GET'])
+def obter_metricas():
+    """Obtém métricas internas de desempenho (pools de conexão MySQL, cache, codificação JSON, HelpDesk e fotos)."""
+    try:
+        from ..utils.PoolConexoesMySQL import PoolConexoesMySQL
+        from ..utils.CacheRFID import CacheRFID
+        from ..utils.ClienteHelpDesk import ClienteHelpDesk
+        from ..utils.ArmazemFotosRFID import ArmazemFotosRFID
+
+        return jsonify({
+            'success': True,
+            'pools': PoolConexoesMySQL.obter_metricas_todos(),
+            'cache': CacheRFID.get_instance().obter_metricas(),
+            'json': current_app.json.obter_metricas(),
+            'helpdesk': ClienteHelpDesk.get_instance().obter_metricas(),
+            'fotos': ArmazemFotosRFID.get_instance().obter_metricas()
+        })
+
+    except Exception as e:
+        logger.error(f"Erro ao obter métricas: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 # Rota de teste/debug
 @api_bp.route('/test', methods=['GET'])
 def test_api():
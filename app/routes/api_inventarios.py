@@ -1,13 +1,38 @@
 # app/routes/api_inventarios.py
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, current_app, url_for
 import logging
 import traceback
-from datetime import datetime, timedelta
+from datetime import datetime
 import io
+from ..utils.SerializacaoJSON import resposta_json
 
 api_inventarios_bp = Blueprint('api_inventarios', __name__)
 logger = logging.getLogger('RFID.api_inventarios')
 
+
+def _execucao_assincrona():
+    """Indica se a requisição pediu execução em segundo plano (?async=true)."""
+    return request.args.get('async', '').lower() == 'true'
+
+
+def _obter_gerenciador_jobs():
+    """Obtém o gerenciador de jobs da aplicação (criando-o se necessário)."""
+    gerenciador_jobs = current_app.config.get('GERENCIADOR_JOBS')
+    if not gerenciador_jobs:
+        from ..utils.GerenciadorJobsRFID import GerenciadorJobsRFID
+        gerenciador_jobs = GerenciadorJobsRFID.get_instance()
+        current_app.config['GERENCIADOR_JOBS'] = gerenciador_jobs
+    return gerenciador_jobs
+
+
+def _resposta_job(job_id):
+    """Resposta 202 com o ID do job e a URL para acompanhar o progresso."""
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': url_for('api_jobs.obter_job', job_id=job_id)
+    }), 202
+
 @api_inventarios_bp.route('/inventarios', methods=['GET'])
 def listar_inventarios():
     """
@@ -66,10 +91,10 @@ def listar_inventarios():
                 }), 400
         
         if request.args.get('data_inicio'):
-            filtros['data_inicio'] = request.args.get('data_inicio')
+            filtros['data_inicio'] = request.args.get('data_inicio').strip()
         
         if request.args.get('data_fim'):
-            filtros['data_fim'] = request.args.get('data_fim')
+            filtros['data_fim'] = request.args.get('data_fim').strip()
         
         # Verificar se é uma atualização forçada
         force_refresh = request.args.get('force_refresh', '').lower() == 'true'
@@ -91,7 +116,7 @@ def listar_inventarios():
                 'error': resultado.get('error', 'Erro ao buscar inventários')
             }), 500
         
-        return jsonify(resultado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro não tratado ao listar inventários: {str(e)}")
@@ -110,6 +135,9 @@ def criar_inventario():
         - id_colaborador: ID do colaborador responsável (obrigatório)
         - Observacao: observações sobre o inventário (opcional)
         - dataInventario: data do inventário (opcional, padrão: agora)
+    
+    Query params:
+        - async: 'true' para criar em segundo plano (retorna 202 com job_id)
     """
     try:
         gerenciador = current_app.config.get('GERENCIADOR_INVENTARIOS_RFID')
@@ -137,6 +165,17 @@ def criar_inventario():
         
         logger.info(f"Criando inventário - Colaborador: {dados.get('id_colaborador')}")
         
+        if _execucao_assincrona():
+            def executar(contexto):
+                # Cancelável até o commit: a semeadura é desfeita (ver criar_inventario)
+                return gerenciador.criar_inventario(dados, callback_progresso=contexto.atualizar_progresso)
+            
+            job_id = _obter_gerenciador_jobs().submeter(
+                'criar_inventario', executar,
+                descricao=f"Criar inventário - colaborador {dados.get('id_colaborador')}"
+            )
+            return _resposta_job(job_id)
+        
         # Criar inventário
         resultado = gerenciador.criar_inventario(dados)
         
@@ -202,6 +241,10 @@ def processar_csv_inventario(id_inventario):
     Body:
         - Multipart form-data com arquivo CSV
         - OU JSON com campo 'csv_content' contendo o conteúdo do CSV
+        - OU o próprio CSV no corpo (Content-Type: text/csv), lido em fluxo
+    
+    Query params:
+        - async: 'true' para processar em segundo plano (retorna 202 com job_id)
     """
     try:
         gerenciador = current_app.config.get('GERENCIADOR_INVENTARIOS_RFID')
@@ -229,7 +272,12 @@ def processar_csv_inventario(id_inventario):
                     'error': 'Arquivo deve ser CSV'
                 }), 400
             
-            arquivo_csv = file
+            # Fluxo do arquivo: lido e decodificado em blocos, sem carregar tudo na memória
+            arquivo_csv = file.stream
+        
+        # CSV enviado diretamente no corpo da requisição
+        elif request.mimetype in ('text/csv', 'application/octet-stream'):
+            arquivo_csv = request.stream
         
         # Verificar se é JSON com conteúdo CSV
         elif request.is_json:
@@ -252,8 +300,39 @@ def processar_csv_inventario(id_inventario):
         
         logger.info(f"Processando CSV para inventário {id_inventario}")
         
+        if _execucao_assincrona():
+            gerenciador_jobs = _obter_gerenciador_jobs()
+            caminho = None
+            
+            # O fluxo da requisição acaba com a resposta: o job lê de uma cópia em disco
+            if not isinstance(arquivo_csv, str):
+                caminho = gerenciador_jobs.salvar_upload(arquivo_csv)
+            
+            def executar(contexto):
+                if caminho is None:
+                    return gerenciador.processar_csv_leituras(
+                        id_inventario, arquivo_csv, callback_progresso=contexto.atualizar_progresso
+                    )
+                with open(caminho, 'rb') as arquivo:
+                    return gerenciador.processar_csv_leituras(
+                        id_inventario, arquivo, callback_progresso=contexto.atualizar_progresso
+                    )
+            
+            # O gerenciador de jobs apaga a cópia ao final (ou se o job ficar órfão)
+            job_id = gerenciador_jobs.submeter(
+                'processar_csv', executar,
+                descricao=f"Processar CSV - inventário {id_inventario}",
+                arquivo=caminho
+            )
+            return _resposta_job(job_id)
+        
+        def registrar_progresso(progresso):
+            logger.info(f"CSV do inventário {id_inventario}: {progresso}")
+        
         # Processar CSV
-        resultado = gerenciador.processar_csv_leituras(id_inventario, arquivo_csv)
+        resultado = gerenciador.processar_csv_leituras(
+            id_inventario, arquivo_csv, callback_progresso=registrar_progresso
+        )
         
         if resultado['success']:
             return jsonify(resultado)
@@ -383,6 +462,7 @@ def obter_estatisticas_inventarios():
     
     Query params:
         - periodo: últimos X dias (padrão: 30)
+        - force_refresh: forçar atualização do cache (true/false)
     """
     try:
         gerenciador = current_app.config.get('GERENCIADOR_INVENTARIOS_RFID')
@@ -400,71 +480,19 @@ def obter_estatisticas_inventarios():
         except ValueError:
             periodo_dias = 30
         
-        # Calcular data início
-        data_inicio = (datetime.now() - timedelta(days=periodo_dias)).strftime('%Y-%m-%d')
+        force_refresh = request.args.get('force_refresh', '').lower() == 'true'
         
         logger.info(f"Obtendo estatísticas de inventários dos últimos {periodo_dias} dias")
         
-        # Buscar todos os inventários do período
-        resultado = gerenciador.obter_inventarios(
-            filtros={'data_inicio': data_inicio},
-            limite=1000  # Buscar todos
+        resultado = gerenciador.obter_estatisticas_inventarios(
+            periodo_dias=periodo_dias,
+            force_refresh=force_refresh
         )
         
         if not resultado['success']:
             return jsonify(resultado), 500
         
-        inventarios = resultado.get('inventarios', [])
-        
-        # Calcular estatísticas
-        total_inventarios = len(inventarios)
-        inventarios_finalizados = sum(1 for inv in inventarios if inv.get('Status') == 'Finalizado')
-        inventarios_em_andamento = sum(1 for inv in inventarios if inv.get('Status') == 'Em andamento')
-        
-        # Estatísticas de itens
-        total_itens_verificados = sum(inv.get('total_itens', 0) for inv in inventarios)
-        total_itens_localizados = sum(inv.get('itens_localizados', 0) for inv in inventarios)
-        
-        # Taxa média de localização
-        taxa_localizacao_media = 0
-        if inventarios:
-            taxas = [inv.get('percentual_localizado', 0) for inv in inventarios if inv.get('total_itens', 0) > 0]
-            if taxas:
-                taxa_localizacao_media = round(sum(taxas) / len(taxas), 2)
-        
-        # Inventários por colaborador
-        inventarios_por_colaborador = {}
-        for inv in inventarios:
-            colab_id = inv.get('id_colaborador')
-            if colab_id:
-                if colab_id not in inventarios_por_colaborador:
-                    inventarios_por_colaborador[colab_id] = 0
-                inventarios_por_colaborador[colab_id] += 1
-        
-        # Top 5 colaboradores
-        top_colaboradores = sorted(
-            inventarios_por_colaborador.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
-        
-        return jsonify({
-            'success': True,
-            'periodo_dias': periodo_dias,
-            'data_inicio': data_inicio,
-            'estatisticas': {
-                'total_inventarios': total_inventarios,
-                'inventarios_finalizados': inventarios_finalizados,
-                'inventarios_em_andamento': inventarios_em_andamento,
-                'total_itens_verificados': total_itens_verificados,
-                'total_itens_localizados': total_itens_localizados,
-                'taxa_localizacao_media': taxa_localizacao_media,
-                'top_colaboradores': [
-                    {'id_colaborador': colab[0], 'total_inventarios': colab[1]}
-                    for colab in top_colaboradores
-                ]
-            }
-        })
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro ao obter estatísticas: {str(e)}")
@@ -589,7 +617,7 @@ def test_api_inventarios():
                 'GET /inventarios - Listar inventários',
                 'POST /inventarios - Criar inventário',
                 'GET /inventarios/{id} - Detalhes do inventário',
-                'POST /inventarios/{id}/processar-csv - Processar CSV',
+                'POST /inventarios/{id}/processar-csv - Processar CSV (?async=true: em segundo plano)',
                 'POST /inventarios/{id}/finalizar - Finalizar inventário',
                 'GET /inventarios/{id}/itens - Listar itens',
                 'GET /inventarios/estatisticas - Estatísticas gerais',
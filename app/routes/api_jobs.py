@@ -0,0 +1,76 @@
+# app/routes/api_jobs.py
+from flask import Blueprint, jsonify, current_app
+import logging
+import traceback
+
+api_jobs_bp = Blueprint('api_jobs', __name__)
+logger = logging.getLogger('RFID.api_jobs')
+
+
+def _obter_gerenciador():
+    """Obtém o gerenciador de jobs da aplicação (criando-o se necessário)."""
+    gerenciador = current_app.config.get('GERENCIADOR_JOBS')
+    if not gerenciador:
+        from ..utils.GerenciadorJobsRFID import GerenciadorJobsRFID
+        gerenciador = GerenciadorJobsRFID.get_instance()
+        current_app.config['GERENCIADOR_JOBS'] = gerenciador
+    return gerenciador
+
+
+@api_jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def obter_job(job_id):
+    """
+    Obtém status, progresso e resultado de um job em segundo plano.
+
+    Retorna:
+        - status: pendente, executando, concluido, erro ou cancelado
+        - progresso: último progresso publicado pelo job
+        - resultado: resultado da operação (quando finalizado)
+    """
+    try:
+        job = _obter_gerenciador().obter_job(job_id)
+
+        if not job:
+            return jsonify({
+                'success': False,
+                'error': 'Job não encontrado'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'job': job
+        })
+
+    except Exception as e:
+        logger.error(f"Erro ao obter job {job_id}: {str(e)}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@api_jobs_bp.route('/jobs/<job_id>/cancelar', methods=['POST'])
+def cancelar_job(job_id):
+    """
+    Solicita o cancelamento de um job.
+
+    Jobs pendentes são cancelados imediatamente; jobs em execução param no
+    próximo ponto de progresso (ex: entre lotes do CSV).
+    """
+    try:
+        resultado = _obter_gerenciador().cancelar_job(job_id)
+
+        if resultado['success']:
+            return jsonify(resultado)
+
+        status = 404 if resultado.get('error') == 'Job não encontrado' else 409
+        return jsonify(resultado), status
+
+    except Exception as e:
+        logger.error(f"Erro ao cancelar job {job_id}: {str(e)}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -1,9 +1,13 @@
 # app/routes/api_leitores.py
-from flask import Blueprint, jsonify, request, current_app, Response
+from flask import Blueprint, jsonify, request, current_app
 import logging
 import traceback
 from datetime import datetime, timedelta
 import base64
+from ..utils.ContagemSQL import MODOS_CONTAGEM
+from ..utils.SerializacaoJSON import resposta_json
+from ..config import FOTOS_CONFIG
+from ..utils.ArmazemFotosRFID import resposta_foto, resposta_nao_modificada, tamanhos_validos
 
 api_leitores_bp = Blueprint('api_leitores', __name__)
 logger = logging.getLogger('RFID.api_leitores')
@@ -15,7 +19,9 @@ def listar_leituras():
     
     Query params:
         - limite: número de registros por página (padrão: 50)
-        - offset: deslocamento
+        - offset: deslocamento (modo legado)
+        - cursor: paginação por cursor; vazio na primeira página, depois o next_cursor da resposta
+        - modo_contagem: estratégia do total (auto, exata, estimada, incremental)
         - etiqueta: filtro por código da etiqueta
         - antena: filtro por antena
         - horario_inicio: filtro por data/hora inicial (formato: YYYY-MM-DD HH:MM:SS)
@@ -79,15 +85,30 @@ def listar_leituras():
         # Verificar se é uma atualização forçada
         force_refresh = request.args.get('force_refresh', '').lower() == 'true'
         
+        modo_contagem = request.args.get('modo_contagem', 'auto')
+        if modo_contagem not in MODOS_CONTAGEM:
+            return jsonify({
+                'success': False,
+                'error': f"modo_contagem inválido. Use: {', '.join(MODOS_CONTAGEM)}"
+            }), 400
+        
         logger.info(f"Buscando leituras com filtros: {filtros}, limite: {limite}, offset: {offset}")
         
-        # Buscar leituras
-        resultado = gerenciador.obter_leituras(
-            filtros=filtros,
-            limite=limite,
-            offset=offset,
-            force_refresh=force_refresh
-        )
+        # Buscar leituras (modo cursor quando o parâmetro 'cursor' é enviado, mesmo vazio)
+        try:
+            resultado = gerenciador.obter_leituras(
+                filtros=filtros,
+                limite=limite,
+                offset=offset,
+                force_refresh=force_refresh,
+                cursor_paginacao=request.args.get('cursor'),
+                modo_contagem=modo_contagem
+            )
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
         if not resultado.get('success', False):
             logger.error(f"Erro ao obter leituras: {resultado.get('error')}")
@@ -96,7 +117,7 @@ def listar_leituras():
                 'error': resultado.get('error', 'Erro ao buscar leituras')
             }), 500
         
-        return jsonify(resultado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro não tratado ao listar leituras: {str(e)}")
@@ -159,7 +180,7 @@ def obter_estatisticas_leituras():
                 'error': resultado.get('error', 'Erro ao obter estatísticas')
             }), 500
         
-        return jsonify(resultado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro ao obter estatísticas: {str(e)}")
@@ -214,6 +235,42 @@ def obter_historico_etiqueta(etiqueta_hex):
             'error': str(e)
         }), 500
 
+@api_leitores_bp.route('/leituras/ultima/<etiqueta_hex>', methods=['GET'])
+def obter_ultima_leitura_etiqueta(etiqueta_hex):
+    """
+    Informa onde e quando a etiqueta foi vista por último.
+    
+    Consulta a materialização de últimas leituras (busca por chave), sem
+    varrer o histórico de leitoresRFID.
+    
+    Params:
+        - etiqueta_hex: código hexadecimal da etiqueta
+    """
+    try:
+        gerenciador = current_app.config.get('GERENCIADOR_ULTIMAS_LEITURAS')
+        if not gerenciador:
+            from ..utils.GerenciadorUltimasLeiturasRFID import GerenciadorUltimasLeiturasRFID
+            gerenciador = GerenciadorUltimasLeiturasRFID.get_instance()
+            current_app.config['GERENCIADOR_ULTIMAS_LEITURAS'] = gerenciador
+        
+        resultado = gerenciador.obter_ultima_leitura(etiqueta_hex)
+        
+        if not resultado.get('success', False):
+            return jsonify({
+                'success': False,
+                'error': resultado.get('error', 'Erro ao obter última leitura')
+            }), 500
+        
+        return jsonify(resultado)
+    
+    except Exception as e:
+        logger.error(f"Erro ao obter última leitura da etiqueta: {str(e)}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @api_leitores_bp.route('/leituras/ultimas/<int:minutos>', methods=['GET'])
 def obter_leituras_recentes(minutos):
     """
@@ -258,14 +315,27 @@ def obter_leituras_recentes(minutos):
             limite = 100
             offset = 0
         
+        # Janela de tempo: o total vem dos contadores por minuto (sem COUNT completo)
+        modo_contagem = request.args.get('modo_contagem', 'auto')
+        if modo_contagem not in MODOS_CONTAGEM:
+            modo_contagem = 'auto'
+        
         logger.info(f"Obtendo leituras dos últimos {minutos} minutos")
         
-        resultado = gerenciador.obter_leituras(
-            filtros=filtros,
-            limite=limite,
-            offset=offset,
-            force_refresh=True  # Sempre atualizar para dados recentes
-        )
+        try:
+            resultado = gerenciador.obter_leituras(
+                filtros=filtros,
+                limite=limite,
+                offset=offset,
+                force_refresh=True,  # Sempre atualizar para dados recentes
+                cursor_paginacao=request.args.get('cursor'),
+                modo_contagem=modo_contagem
+            )
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
         if not resultado.get('success', False):
             return jsonify({
@@ -280,7 +350,7 @@ def obter_leituras_recentes(minutos):
             'fim': agora.strftime('%Y-%m-%d %H:%M:%S')
         }
         
-        return jsonify(resultado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro ao obter leituras recentes: {str(e)}")
@@ -313,7 +383,7 @@ def listar_antenas():
                 'error': resultado.get('error', 'Erro ao listar antenas')
             }), 500
         
-        return jsonify(resultado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro ao listar antenas: {str(e)}")
@@ -330,16 +400,33 @@ def obter_foto_etiqueta(etiqueta_hex):
     Params:
         - etiqueta_hex: código hexadecimal da etiqueta
         
+    Query params:
+        - size: full (original, padrão), thumb ou medium (ver FOTOS_CONFIG['tamanhos'])
+        
     Returns:
-        - Imagem binária ou JSON com erro
+        - Imagem binária (ETag/Last-Modified; 304 na revalidação, 206 com Range) ou JSON com erro
     """
     try:
+        tamanho = request.args.get('size', 'full')
+        if tamanho not in tamanhos_validos():
+            return jsonify({
+                'success': False,
+                'error': f"Tamanho inválido: use {', '.join(tamanhos_validos())}"
+            }), 400
+        
         gerenciador = current_app.config.get('GERENCIADOR_LEITORES')
         if not gerenciador:
             from ..utils.GerenciadorLeitoresRFID import GerenciadorLeitoresRFID
             gerenciador = GerenciadorLeitoresRFID.get_instance()
             current_app.config['GERENCIADOR_LEITORES'] = gerenciador
         
+        # Revalidação (If-None-Match/If-Modified-Since): responder 304 só com metadados, sem o BLOB
+        if request.if_none_match or request.if_modified_since:
+            metadados = gerenciador.obter_metadados_foto_etiqueta(etiqueta_hex)
+            resposta = resposta_nao_modificada(metadados, tamanho, imutavel=False)
+            if resposta is not None:
+                return resposta
+        
         logger.info(f"Buscando foto para etiqueta: {etiqueta_hex}")
         
         resultado = gerenciador.obter_foto_etiqueta(etiqueta_hex)
@@ -351,32 +438,24 @@ def obter_foto_etiqueta(etiqueta_hex):
             }), 404
         
         # Se não encontrou foto
-        if not resultado.get('foto'):
+        if not resultado.get('arquivo'):
             return jsonify({
                 'success': False,
                 'error': 'Nenhuma foto encontrada para esta etiqueta'
             }), 404
         
-        # Retornar a imagem
-        foto_data = resultado['foto']
-        
-        # Detectar tipo de imagem baseado nos primeiros bytes
-        content_type = 'image/jpeg'  # padrão
-        if foto_data.startswith(b'\x89PNG'):
-            content_type = 'image/png'
-        elif foto_data.startswith(b'GIF'):
-            content_type = 'image/gif'
-        elif foto_data.startswith(b'\xff\xd8'):
-            content_type = 'image/jpeg'
-        
-        return Response(
-            foto_data,
-            mimetype=content_type,
-            headers={
-                'Content-Disposition': f'inline; filename="etiqueta_{etiqueta_hex}.jpg"',
-                'Cache-Control': 'public, max-age=3600'  # Cache por 1 hora
-            }
-        )
+        # Retornar a imagem (ou miniatura) do armazém em disco
+        try:
+            return resposta_foto(resultado['arquivo'], tamanho, f"etiqueta_{etiqueta_hex}.jpg", imutavel=False)
+        except FileNotFoundError:
+            # Despejada por outro processo entre a consulta e a abertura: ler do banco de novo
+            resultado = gerenciador.obter_foto_etiqueta(etiqueta_hex)
+            if not resultado.get('arquivo'):
+                return jsonify({
+                    'success': False,
+                    'error': resultado.get('error', 'Nenhuma foto encontrada para esta etiqueta')
+                }), 404
+            return resposta_foto(resultado['arquivo'], tamanho, f"etiqueta_{etiqueta_hex}.jpg", imutavel=False)
     
     except Exception as e:
         logger.error(f"Erro ao obter foto da etiqueta {etiqueta_hex}: {str(e)}")
@@ -420,6 +499,56 @@ def verificar_foto_etiqueta(etiqueta_hex):
             'success': False,
             'error': str(e)
         }), 500
+
+@api_leitores_bp.route('/leituras/foto/info:batch', methods=['POST'])
+def verificar_fotos_etiquetas_lote():
+    """
+    Verifica a disponibilidade de fotos de várias etiquetas em uma única chamada.
+    
+    Body JSON:
+        - etiquetas: lista de códigos hexadecimais (máximo FOTOS_CONFIG['limite_lote'])
+        
+    Returns:
+        - JSON com fotos: etiqueta -> tem_foto, total_fotos, ultima_foto
+    """
+    try:
+        dados = request.get_json(silent=True) or {}
+        etiquetas = dados.get('etiquetas')
+        
+        if not isinstance(etiquetas, list) or not all(isinstance(etiqueta, str) for etiqueta in etiquetas):
+            return jsonify({
+                'success': False,
+                'error': 'Informe "etiquetas" como uma lista de códigos'
+            }), 400
+        
+        if len(etiquetas) > FOTOS_CONFIG['limite_lote']:
+            return jsonify({
+                'success': False,
+                'error': f"Máximo de {FOTOS_CONFIG['limite_lote']} etiquetas por chamada"
+            }), 400
+        
+        gerenciador = current_app.config.get('GERENCIADOR_LEITORES')
+        if not gerenciador:
+            from ..utils.GerenciadorLeitoresRFID import GerenciadorLeitoresRFID
+            gerenciador = GerenciadorLeitoresRFID.get_instance()
+            current_app.config['GERENCIADOR_LEITORES'] = gerenciador
+        
+        resultado = gerenciador.verificar_fotos_etiquetas([etiqueta.strip() for etiqueta in etiquetas])
+        
+        if not resultado.get('success', False):
+            return jsonify({
+                'success': False,
+                'error': resultado.get('error', 'Erro ao verificar fotos das etiquetas')
+            }), 500
+        
+        return jsonify(resultado)
+    
+    except Exception as e:
+        logger.error(f"Erro ao verificar fotos em lote: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
         
 # Rota de teste/debug
 @api_leitores_bp.route('/leituras/test', methods=['GET'])
@@ -438,7 +567,8 @@ def test_api_leitores():
                 '/leituras/ultimas/{minutos}',
                 '/leituras/antenas',
                 '/leituras/foto/{hex}',
-                '/leituras/foto/info/{hex}'
+                '/leituras/foto/info/{hex}',
+                '/leituras/foto/info:batch'
             ]
         })
     except Exception as e:
@@ -1,8 +1,11 @@
 # app/routes/api_ping.py
-from flask import Blueprint, jsonify, request, current_app, Response
+from flask import Blueprint, jsonify, request, current_app
 import logging
 import traceback
 from datetime import datetime, timedelta
+from ..utils.SerializacaoJSON import resposta_json
+from ..config import FOTOS_CONFIG
+from ..utils.ArmazemFotosRFID import resposta_foto, resposta_nao_modificada, tamanhos_validos
 
 api_ping_bp = Blueprint('api_ping', __name__)
 logger = logging.getLogger('RFID.api_ping')
@@ -14,7 +17,8 @@ def listar_pings():
     
     Query params:
         - limite: número de registros por página (padrão: 50)
-        - offset: deslocamento
+        - offset: deslocamento (modo legado)
+        - cursor: paginação por cursor; vazio na primeira página, depois o next_cursor da resposta
         - local: filtro por local (B1, B2, S1)
         - antena: filtro por antena
         - horario_inicio: filtro por data/hora inicial (formato: YYYY-MM-DD HH:MM:SS)
@@ -77,13 +81,20 @@ def listar_pings():
         
         logger.info(f"Buscando PINGs com filtros: {filtros}, limite: {limite}, offset: {offset}")
         
-        # Buscar PINGs
-        resultado = gerenciador.obter_pings(
-            filtros=filtros,
-            limite=limite,
-            offset=offset,
-            force_refresh=force_refresh
-        )
+        # Buscar PINGs (modo cursor quando o parâmetro 'cursor' é enviado, mesmo vazio)
+        try:
+            resultado = gerenciador.obter_pings(
+                filtros=filtros,
+                limite=limite,
+                offset=offset,
+                force_refresh=force_refresh,
+                cursor_paginacao=request.args.get('cursor')
+            )
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
         if not resultado.get('success', False):
             logger.error(f"Erro ao obter PINGs: {resultado.get('error')}")
@@ -92,7 +103,7 @@ def listar_pings():
                 'error': resultado.get('error', 'Erro ao buscar PINGs')
             }), 500
         
-        return jsonify(resultado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro não tratado ao listar PINGs: {str(e)}")
@@ -155,7 +166,7 @@ def obter_estatisticas_pings():
                 'error': resultado.get('error', 'Erro ao obter estatísticas')
             }), 500
         
-        return jsonify(resultado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro ao obter estatísticas PING: {str(e)}")
@@ -187,7 +198,7 @@ def listar_locais():
                 'error': resultado.get('error', 'Erro ao listar locais')
             }), 500
         
-        return jsonify(resultado)
+        return resposta_json(resultado)
     
     except Exception as e:
         logger.error(f"Erro ao listar locais PING: {str(e)}")
@@ -205,11 +216,20 @@ def obter_foto_ping_query():
         - local: local do ping (B1, B2, S1) - obrigatório
         - antena: número da antena - obrigatório
         - horario: horário do PING - obrigatório
+        - size: full (original, padrão), thumb ou medium (ver FOTOS_CONFIG['tamanhos'])
         
     Returns:
-        - Imagem binária ou JSON com erro
+        - Imagem binária (ETag/Last-Modified; 304 na revalidação, 206 com Range) ou JSON com erro
     """
     try:
+        tamanho = request.args.get('size', 'full')
+        if tamanho not in tamanhos_validos():
+            return jsonify({
+                'success': False,
+                'error': f"Tamanho inválido: use {', '.join(tamanhos_validos())}",
+                'error_type': 'invalid_size'
+            }), 400
+        
         gerenciador = current_app.config.get('GERENCIADOR_PING')
         if not gerenciador:
             from ..utils.GerenciadorPingRFID import GerenciadorPingRFID
@@ -221,6 +241,13 @@ def obter_foto_ping_query():
         antena = request.args.get('antena')
         horario = request.args.get('horario')
         
+        # Revalidação (If-None-Match/If-Modified-Since): responder 304 só com metadados, sem o BLOB
+        if request.if_none_match or request.if_modified_since:
+            metadados = gerenciador.obter_metadados_foto_ping(local=local, antena=antena, horario=horario)
+            resposta = resposta_nao_modificada(metadados, tamanho, imutavel=True)
+            if resposta is not None:
+                return resposta
+        
         # Chamar gerenciador
         resultado = gerenciador.obter_foto_ping(
             local=local,
@@ -239,33 +266,26 @@ def obter_foto_ping_query():
             }), status_code
         
         # Se não encontrou foto
-        if not resultado.get('foto'):
+        if not resultado.get('arquivo'):
             return jsonify({
                 'success': False,
                 'error': 'Nenhuma foto encontrada para este PING',
                 'error_type': 'not_found'
             }), 404
         
-        # Retornar a imagem
-        foto_data = resultado['foto']
-        
-        # Detectar tipo de imagem baseado nos primeiros bytes
-        content_type = 'image/jpeg'  # padrão
-        if foto_data.startswith(b'\x89PNG'):
-            content_type = 'image/png'
-        elif foto_data.startswith(b'GIF'):
-            content_type = 'image/gif'
-        elif foto_data.startswith(b'\xff\xd8'):
-            content_type = 'image/jpeg'
-        
-        return Response(
-            foto_data,
-            mimetype=content_type,
-            headers={
-                'Content-Disposition': f'inline; filename="ping_{local}_{antena}.jpg"',
-                'Cache-Control': 'public, max-age=3600'  # Cache por 1 hora
-            }
-        )
+        # Retornar a imagem (ou miniatura) do armazém em disco
+        try:
+            return resposta_foto(resultado['arquivo'], tamanho, f"ping_{local}_{antena}.jpg", imutavel=True)
+        except FileNotFoundError:
+            # Despejada por outro processo entre a consulta e a abertura: ler do banco de novo
+            resultado = gerenciador.obter_foto_ping(local=local, antena=antena, horario=horario)
+            if not resultado.get('arquivo'):
+                return jsonify({
+                    'success': False,
+                    'error': resultado.get('error', 'Nenhuma foto encontrada para este PING'),
+                    'error_type': resultado.get('error_type', 'not_found')
+                }), 404
+            return resposta_foto(resultado['arquivo'], tamanho, f"ping_{local}_{antena}.jpg", imutavel=True)
     
     except Exception as e:
         logger.error(f"Erro ao obter foto do PING: {str(e)}")
@@ -321,6 +341,56 @@ def verificar_foto_ping_query():
             'success': False,
             'error': str(e)
         }), 500
+
+@api_ping_bp.route('/ping/foto/info:batch', methods=['POST'])
+def verificar_fotos_pings_lote():
+    """
+    Verifica a disponibilidade de fotos de vários PINGs em uma única chamada.
+    
+    Body JSON:
+        - pings: lista de {local, antena, horario} (máximo FOTOS_CONFIG['limite_lote'])
+        
+    Returns:
+        - JSON com fotos: lista na mesma ordem, com local, antena, horario, tem_foto e ultima_foto
+    """
+    try:
+        dados = request.get_json(silent=True) or {}
+        pings = dados.get('pings')
+        
+        if not isinstance(pings, list) or not all(isinstance(ping, dict) for ping in pings):
+            return jsonify({
+                'success': False,
+                'error': 'Informe "pings" como uma lista de {local, antena, horario}'
+            }), 400
+        
+        if len(pings) > FOTOS_CONFIG['limite_lote']:
+            return jsonify({
+                'success': False,
+                'error': f"Máximo de {FOTOS_CONFIG['limite_lote']} PINGs por chamada"
+            }), 400
+        
+        gerenciador = current_app.config.get('GERENCIADOR_PING')
+        if not gerenciador:
+            from ..utils.GerenciadorPingRFID import GerenciadorPingRFID
+            gerenciador = GerenciadorPingRFID.get_instance()
+            current_app.config['GERENCIADOR_PING'] = gerenciador
+        
+        resultado = gerenciador.verificar_fotos_pings(pings)
+        
+        if not resultado.get('success', False):
+            return jsonify({
+                'success': False,
+                'error': resultado.get('error', 'Erro ao verificar fotos dos PINGs')
+            }), 500
+        
+        return jsonify(resultado)
+    
+    except Exception as e:
+        logger.error(f"Erro ao verificar fotos de PINGs em lote: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
         
 # Rota de teste/debug
 @api_ping_bp.route('/ping/test', methods=['GET'])
@@ -337,7 +407,8 @@ def test_api_ping():
                 '/ping/estatisticas',
                 '/ping/locais',
                 '/ping/foto',
-                '/ping/foto/info'
+                '/ping/foto/info',
+                '/ping/foto/info:batch'
             ]
         })
     except Exception as e:
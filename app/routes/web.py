@@ -1,23 +1,11 @@
 # app/routes/web.py
 from flask import Blueprint, render_template, current_app, request, abort, jsonify
 import logging
-import requests
-import urllib3
-
-# Suprimir avisos de SSL
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from ..utils.ClienteHelpDesk import ClienteHelpDesk
 
 web_bp = Blueprint('web', __name__)
 logger = logging.getLogger('controlerfid.web')
 
-# URLs da API do HelpDesk Monitor
-HELPDESK_API_BASE = 'https://automacao.tce.go.gov.br/helpdeskmonitor/api'
-HELPDESK_API_USUARIOS = f'{HELPDESK_API_BASE}/usuarios_htpasswd'
-
-# Cache de competências dos usuários (evita múltiplas requisições)
-_cache_competencias = {}
-_cache_timeout = 300  # 5 minutos
-
 def obter_usuario_atual():
     """Obtém o nome do usuário autenticado via HTTP Basic Auth."""
     # Apache passa o usuário autenticado via REMOTE_USER
@@ -41,51 +29,17 @@ def obter_competencias_usuario(usuario_htpasswd):
     """
     Obtém as competências (funções) de um usuário consultando a API do HelpDesk Monitor.
     
+    O resultado fica em cache com TTL (ver ClienteHelpDesk); com o HelpDesk
+    fora do ar vale o último resultado conhecido.
+    
     Returns:
         list: Lista de competências (funções) do usuário, ou lista vazia se não encontrado
     """
     if not usuario_htpasswd:
         return []
     
-    # Verificar cache
-    if usuario_htpasswd in _cache_competencias:
-        return _cache_competencias[usuario_htpasswd]
-    
     try:
-        # Consultar API do HelpDesk Monitor (ignorando verificação SSL)
-        url = f"{HELPDESK_API_USUARIOS}/{usuario_htpasswd}"
-        response = requests.get(url, timeout=5, verify=False)
-        
-        if response.status_code == 200:
-            dados = response.json()
-            # A API pode retornar o campo 'funcoes' (lista) ou precisamos buscar nos técnicos
-            competencias = dados.get('funcoes', [])
-            
-            # Se não houver funcoes direto, buscar nos técnicos
-            if not competencias:
-                url_tecnico = f"{HELPDESK_API_BASE}/contatos_tecnicos"
-                response_tecnico = requests.get(url_tecnico, timeout=5, verify=False)
-                if response_tecnico.status_code == 200:
-                    tecnicos = response_tecnico.json()
-                    usuario_lower = usuario_htpasswd.lower()
-                    for tecnico in tecnicos:
-                        nome_usuario = tecnico.get('nome_usuario_htpasswd')
-                        if nome_usuario and nome_usuario.lower() == usuario_lower:
-                            competencias = tecnico.get('funcoes', [])
-                            break
-            
-            # Cachear resultado
-            _cache_competencias[usuario_htpasswd] = competencias
-            logger.info(f"Competências obtidas para {usuario_htpasswd}: {competencias}")
-            return competencias
-        else:
-            logger.warning(f"Usuário {usuario_htpasswd} não encontrado na API do HelpDesk Monitor")
-            _cache_competencias[usuario_htpasswd] = []
-            return []
-            
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Erro ao consultar API do HelpDesk Monitor para {usuario_htpasswd}: {e}")
-        return []
+        return ClienteHelpDesk.get_instance().obter_competencias(usuario_htpasswd)
     except Exception as e:
         logger.error(f"Erro inesperado ao obter competências para {usuario_htpasswd}: {e}")
         return []
@@ -279,5 +233,5 @@ def debug_auth():
         'pode_acessar_ping': usuario_pode_acessar_ping(),
         'environ': environ_data,
         'headers': headers_data,
-        'cache_size': len(_cache_competencias)
+        'helpdesk': ClienteHelpDesk.get_instance().obter_metricas()
     })
\ No newline at end of file
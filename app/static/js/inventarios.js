@@ -6,6 +6,7 @@
 let inventarios = [];
 let inventarioAtual = null;
 let itensInventarioAtual = [];
+let jobsEmAndamento = {};  // id do modal -> job em segundo plano iniciado por ele
 let paginaAtual = 1;
 const itensPorPagina = 20;
 
@@ -458,7 +459,8 @@ async function criarInventario(event) {
             Observacao: document.getElementById('inventarioObservacao').value
         };
         
-        const response = await fetch('/RFID/api/inventarios', {
+        // Criação em segundo plano: a resposta traz o job, acompanhado por polling
+        const response = await fetch('/RFID/api/inventarios?async=true', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -466,7 +468,17 @@ async function criarInventario(event) {
             body: JSON.stringify(dados)
         });
         
-        const data = await response.json();
+        let data = await response.json();
+        
+        if (data.success && data.job_id) {
+            mostrarToast('Criando inventário em segundo plano...', 'info');
+            jobsEmAndamento['modalInventario'] = data.job_id;
+            data = await acompanharJob(data.job_id, (progresso) => {
+                if (progresso.fase === 'leituras_historicas') {
+                    btn.title = `${progresso.total_etiquetas} etiquetas incluídas, verificando leituras históricas...`;
+                }
+            });
+        }
         
         if (data.success) {
             mostrarToast('Inventário criado com sucesso!', 'success');
@@ -485,6 +497,7 @@ async function criarInventario(event) {
         console.error('Erro ao criar inventário:', error);
         mostrarToast('Erro ao conectar com o servidor', 'error');
     } finally {
+        delete jobsEmAndamento['modalInventario'];
         btn.disabled = false;
         btn.classList.remove('btn-loading');
     }
@@ -586,6 +599,72 @@ function filtrarItensInventario() {
     document.getElementById('estatTaxa').textContent = `${taxa}%`;
 }
 
+/**
+ * Acompanha um job em segundo plano até o fim
+ * @param {string} jobId - ID retornado pela API (202)
+ * @param {function} aoProgresso - Chamada com o progresso publicado pelo job
+ * @returns {Promise<object>} - Resultado do job no mesmo formato da resposta síncrona
+ */
+async function acompanharJob(jobId, aoProgresso = null) {
+    const intervaloMs = 1500;
+    
+    while (true) {
+        await new Promise((resolve) => setTimeout(resolve, intervaloMs));
+        
+        const response = await fetch(`/RFID/api/jobs/${jobId}`);
+        const data = await response.json();
+        
+        if (!data.success) {
+            return { success: false, error: data.error || 'Erro ao consultar o job' };
+        }
+        
+        const job = data.job;
+        
+        if (job.progresso && aoProgresso) {
+            aoProgresso(job.progresso);
+        }
+        
+        if (job.status === 'concluido') {
+            return job.resultado;
+        }
+        if (job.status === 'cancelado') {
+            return { success: false, error: 'Operação cancelada' };
+        }
+        if (job.status === 'erro') {
+            return (job.resultado && job.resultado.error)
+                ? job.resultado
+                : { success: false, error: job.erro || 'Erro na execução' };
+        }
+    }
+}
+
+/**
+ * Botão "Cancelar" dos modais: cancela o job em andamento ou fecha o modal
+ * @param {string} modalId - ID do modal
+ */
+async function cancelarOuFecharModal(modalId) {
+    const jobId = jobsEmAndamento[modalId];
+    if (!jobId) {
+        fecharModal(modalId);
+        return;
+    }
+    
+    try {
+        const response = await fetch(`/RFID/api/jobs/${jobId}/cancelar`, { method: 'POST' });
+        const data = await response.json();
+        
+        if (data.success) {
+            // acompanharJob recebe o status 'cancelado' no próximo polling
+            mostrarToast('Cancelamento solicitado...', 'info');
+        } else {
+            mostrarToast(data.error || 'Não foi possível cancelar', 'error');
+        }
+    } catch (error) {
+        console.error('Erro ao cancelar job:', error);
+        mostrarToast('Erro ao conectar com o servidor', 'error');
+    }
+}
+
 async function processarCSV(event) {
     event.preventDefault();
     
@@ -600,12 +679,21 @@ async function processarCSV(event) {
         const formData = new FormData();
         formData.append('arquivo', arquivo);
         
-        const response = await fetch(`/RFID/api/inventarios/${idInventario}/processar-csv`, {
+        // Processamento em segundo plano: a resposta traz o job, acompanhado por polling
+        const response = await fetch(`/RFID/api/inventarios/${idInventario}/processar-csv?async=true`, {
             method: 'POST',
             body: formData
         });
         
-        const data = await response.json();
+        let data = await response.json();
+        
+        if (data.success && data.job_id) {
+            jobsEmAndamento['modalUploadCSV'] = data.job_id;
+            data = await acompanharJob(data.job_id, (progresso) => {
+                btn.title = `${progresso.linhas_processadas} linhas processadas, ` +
+                    `${progresso.etiquetas_atualizadas} etiquetas localizadas`;
+            });
+        }
         
         if (data.success) {
             let mensagem = `CSV processado! ${data.etiquetas_atualizadas} etiquetas marcadas como localizadas.`;
@@ -631,6 +719,7 @@ async function processarCSV(event) {
         console.error('Erro ao processar CSV:', error);
         mostrarToast('Erro ao conectar com o servidor', 'error');
     } finally {
+        delete jobsEmAndamento['modalUploadCSV'];
         btn.disabled = false;
         btn.classList.remove('btn-loading');
     }
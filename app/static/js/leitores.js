@@ -4,6 +4,10 @@
 let paginaAtual = 1;
 const registrosPorPagina = 50; // Mais registros para leituras
 let totalRegistros = 0;
+let totalEstimado = false; // total aproximado (modo_contagem estimada)
+// Cursores de paginação conhecidos: cursoresPaginas[n - 1] abre a página n
+// (páginas sem cursor conhecido, ex: salto direto, usam offset)
+let cursoresPaginas = [""];
 let autoRefreshInterval = null;
 let antenasDisponiveis = [];
 
@@ -126,6 +130,7 @@ function debounce(func, wait) {
 
 function aplicarFiltros() {
   paginaAtual = 1;
+  cursoresPaginas = [""];
   carregarDados();
 }
 
@@ -150,16 +155,22 @@ async function carregarDados(forceRefresh = false, showToastMessage = false) {
   mostrarLoading();
   let response = null;
   try {
-    const offset = (paginaAtual - 1) * registrosPorPagina;
     const filtros = obterFiltros();
 
     // Construir query string
     const params = new URLSearchParams({
       limite: registrosPorPagina,
-      offset: offset,
       ...filtros,
     });
 
+    // Paginação por cursor quando a página já é conhecida; offset como fallback
+    const cursorPagina = cursoresPaginas[paginaAtual - 1];
+    if (cursorPagina !== undefined && cursorPagina !== null) {
+      params.append("cursor", cursorPagina);
+    } else {
+      params.append("offset", (paginaAtual - 1) * registrosPorPagina);
+    }
+
     if (forceRefresh) {
       params.append("force_refresh", "true");
     }
@@ -184,6 +195,8 @@ async function carregarDados(forceRefresh = false, showToastMessage = false) {
 
     if (data.success) {
       totalRegistros = data.total;
+      totalEstimado = Boolean(data.total_is_estimate);
+      cursoresPaginas[paginaAtual] = data.next_cursor;
       renderizarTabela(data.leituras);
       atualizarPaginacao();
       window.scrollTo(0, lastScrollY); // restaura a posição guardada
@@ -430,6 +443,21 @@ function formatarNumero(num) {
   return num.toString().replace(/\B(?=(\d{3})+(?!\d))/g, ".");
 }
 
+/**
+ * Formata o total da listagem; totais estimados aparecem como "~1,2 mi"
+ * @param {number} num - Total retornado pela API
+ * @param {boolean} estimado - Se o total é uma estimativa (total_is_estimate)
+ * @returns {string} - Total formatado
+ */
+function formatarTotal(num, estimado) {
+  if (!estimado) return num;
+  const compacto = new Intl.NumberFormat("pt-BR", {
+    notation: "compact",
+    maximumFractionDigits: 1,
+  }).format(num);
+  return `~${compacto}`;
+}
+
 function verDetalhesEtiqueta(codigo, descricao, status) {
   // Preencher informações básicas
   document.getElementById("detalhesCodigo").textContent = codigo;
@@ -539,7 +567,7 @@ function atualizarPaginacao() {
 
   document.getElementById("registroInicio").textContent = totalRegistros > 0 ? inicio : 0;
   document.getElementById("registroFim").textContent = fim;
-  document.getElementById("registroTotal").textContent = totalRegistros;
+  document.getElementById("registroTotal").textContent = formatarTotal(totalRegistros, totalEstimado);
 
   const totalPaginas = Math.ceil(totalRegistros / registrosPorPagina);
   const controles = document.getElementById("paginacaoControles");
@@ -672,13 +700,15 @@ async function verFotoEtiqueta(codigo) {
     }
     
     // Carregar a foto
-    const fotoUrl = `/RFID/api/leituras/foto/${codigo}?t=${Date.now()}`; // Cache bust
+    // Sem cache bust: o navegador revalida pelo ETag (304 se a foto não mudou)
+    const fotoUrl = `/RFID/api/leituras/foto/${codigo}`;
+    const previaUrl = `${fotoUrl}?size=medium`; // Versão reduzida para o modal
     
     const img = new Image();
     img.onload = function() {
       fotoLoading.style.display = "none";
       fotoContainer.innerHTML = `
-        <img src="${fotoUrl}" alt="Foto da etiqueta ${codigo}" class="foto-etiqueta" />
+        <img src="${previaUrl}" alt="Foto da etiqueta ${codigo}" class="foto-etiqueta" />
         <div class="foto-controls">
           <button class="rfid-btn rfid-btn-secondary" onclick="downloadFoto('${codigo}')">
             <i class="fas fa-download"></i> Baixar
@@ -704,7 +734,7 @@ async function verFotoEtiqueta(codigo) {
       `;
     };
     
-    img.src = fotoUrl;
+    img.src = previaUrl;
     
   } catch (error) {
     console.error("Erro ao verificar foto:", error);
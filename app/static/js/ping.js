@@ -5,6 +5,9 @@
 let paginaAtual = 1;
 const registrosPorPagina = 50;
 let totalRegistros = 0;
+// Cursores de paginação conhecidos: cursoresPaginas[n - 1] abre a página n
+// (páginas sem cursor conhecido, ex: salto direto, usam offset)
+let cursoresPaginas = [""];
 let autoRefreshInterval = null;
 let locaisDisponiveis = [];
 let lastScrollY = 0;
@@ -82,6 +85,7 @@ function inicializarEventos() {
 
 function aplicarFiltros() {
   paginaAtual = 1;
+  cursoresPaginas = [""];
   carregarDados();
 }
 
@@ -94,15 +98,21 @@ async function carregarDados(forceRefresh = false, showToastMessage = false) {
   mostrarLoading();
   
   try {
-    const offset = (paginaAtual - 1) * registrosPorPagina;
     const filtros = obterFiltros();
 
     const params = new URLSearchParams({
       limite: registrosPorPagina,
-      offset: offset,
       ...filtros,
     });
 
+    // Paginação por cursor quando a página já é conhecida; offset como fallback
+    const cursorPagina = cursoresPaginas[paginaAtual - 1];
+    if (cursorPagina !== undefined && cursorPagina !== null) {
+      params.append("cursor", cursorPagina);
+    } else {
+      params.append("offset", (paginaAtual - 1) * registrosPorPagina);
+    }
+
     if (forceRefresh) {
       params.append("force_refresh", "true");
     }
@@ -118,6 +128,7 @@ async function carregarDados(forceRefresh = false, showToastMessage = false) {
 
     if (data.success) {
       totalRegistros = data.total;
+      cursoresPaginas[paginaAtual] = data.next_cursor;
       renderizarTabela(data.pings);
       atualizarPaginacao();
       window.scrollTo(0, lastScrollY);
@@ -179,6 +190,7 @@ function renderizarTabela(pings) {
   paginacao.style.display = "flex";
 
   tbody.innerHTML = "";
+  const botoesFoto = [];
 
   pings.forEach((ping) => {
     const tr = document.createElement("tr");
@@ -208,7 +220,37 @@ function renderizarTabela(pings) {
     `;
 
     tbody.appendChild(tr);
+    botoesFoto.push(tr.querySelector(".rfid-action-btn-photo"));
   });
+
+  marcarPingsSemFoto(pings, botoesFoto);
+}
+
+// Uma única chamada por página para saber quais PINGs têm foto
+async function marcarPingsSemFoto(pings, botoesFoto) {
+  try {
+    const response = await fetch('/RFID/api/ping/foto/info:batch', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        pings: pings.map(ping => ({ local: ping.local, antena: ping.antena, horario: ping.horario }))
+      })
+    });
+    const data = await response.json();
+
+    if (!data.success) return;
+
+    data.fotos.forEach((foto, indice) => {
+      const botao = botoesFoto[indice];
+      if (botao && !foto.tem_foto) {
+        botao.disabled = true;
+        botao.title = "Sem imagem no Banco de Dados";
+      }
+    });
+  } catch (error) {
+    // Sem a verificação os botões continuam ativos (o modal informa se não houver foto)
+    console.error("Erro ao verificar fotos dos PINGs:", error);
+  }
 }
 
 async function carregarLocais() {
@@ -386,9 +428,11 @@ async function verFotoPing(local, antena, horario) {
     });
 
     // Carregar a foto diretamente
-    const fotoUrl = `/RFID/api/ping/foto?${params}&t=${Date.now()}`;
+    // Sem cache bust: a foto de um PING não muda (cache do navegador + ETag)
+    const fotoUrl = `/RFID/api/ping/foto?${params}`;
     
-    const fotoResponse = await fetch(fotoUrl);
+    // Versão reduzida para o modal; "Nova Aba" abre a original
+    const fotoResponse = await fetch(`${fotoUrl}&size=medium`);
     
     if (!fotoResponse.ok) {
       // Tentar obter detalhes do erro
@@ -0,0 +1,677 @@
+# app/utils/ArmazemFotosRFID.py
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from ..config import FOTOS_CONFIG
+
+try:
+    from PIL import Image, ImageOps  # Miniaturas opcionais (pip install Pillow)
+except ImportError:
+    Image = None
+
+
+def detectar_tipo_imagem(dados):
+    """
+    Detecta o mimetype de uma imagem pelos primeiros bytes.
+
+    Args:
+        dados (bytes): Conteúdo da imagem
+
+    Returns:
+        str: Mimetype (image/jpeg se não reconhecido)
+    """
+    if dados.startswith(b'\x89PNG'):
+        return 'image/png'
+    if dados.startswith(b'GIF'):
+        return 'image/gif'
+    return 'image/jpeg'
+
+
+class ArmazemFotosRFID:
+    """
+    Cache em disco das fotos de leituras e PINGs (evita ler o BLOB do MySQL a cada imagem).
+
+    Layout em FOTOS_CONFIG['diretorio']:
+    - objetos/<aa>/<sha256>: conteúdo das fotos, endereçado pelo hash
+      (fotos iguais são gravadas uma única vez)
+    - indice/<resumo da chave>.json: chave -> hash, mimetype, tamanho e
+      horário da foto. Chaves: 'etiqueta:<hex>' (foto mais recente da
+      etiqueta) e 'ping:<local>:<antena>:<horario>'. O índice sobrevive ao
+      despejo do objeto (responde às revalidações por ETag sem o BLOB) por
+      até FOTOS_CONFIG['retencao_indice'] segundos sem uso; depois a
+      varredura periódica o apaga
+    - miniaturas/<tamanho>/<aa>/<sha256>.jpg: versões reduzidas (FOTOS_CONFIG['tamanhos']),
+      geradas uma vez em segundo plano e apagadas junto com o objeto
+
+    O armazém é preenchido sob demanda pelos gerenciadores (primeira leitura
+    vai ao MySQL) e limitado a max_bytes, com despejo LRU dos objetos. Com
+    vários workers cada processo controla o limite pelos objetos que
+    conhece, então o total em disco é aproximado.
+    """
+
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Retorna a instância única do armazém (Singleton)."""
+        with cls._lock_instancia:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self, diretorio=None, max_bytes=None):
+        """
+        Inicializa o armazém (use get_instance() para obter a instância compartilhada).
+
+        Args:
+            diretorio (str): Diretório raiz (padrão: FOTOS_CONFIG['diretorio'])
+            max_bytes (int): Limite de ocupação dos objetos (padrão: FOTOS_CONFIG['max_bytes'])
+        """
+        self.logger = logging.getLogger('controlerfid.fotos')
+        self.diretorio = diretorio or FOTOS_CONFIG['diretorio']
+        self.max_bytes = max_bytes or FOTOS_CONFIG['max_bytes']
+        self.dir_objetos = os.path.join(self.diretorio, 'objetos')
+        self.dir_indice = os.path.join(self.diretorio, 'indice')
+        self.dir_miniaturas = os.path.join(self.diretorio, 'miniaturas')
+        os.makedirs(self.dir_objetos, exist_ok=True)
+        os.makedirs(self.dir_indice, exist_ok=True)
+
+        self.tamanhos = dict(FOTOS_CONFIG['tamanhos'])
+        self.qualidade_jpeg = FOTOS_CONFIG['qualidade_jpeg']
+        self.retencao_indice = FOTOS_CONFIG['retencao_indice']
+        self._varrido_em = 0.0
+
+        self._lock = threading.Lock()
+        self._indice = {}                   # chave -> entrada (ver _entrada)
+        self._objetos = OrderedDict()       # hash -> bytes (objeto + miniaturas); ordem = uso (LRU no início)
+        self._chaves_por_hash = {}          # hash -> {chaves} conhecidas por este processo
+        self._bytes = 0
+
+        # Miniaturas: geradas fora da thread da requisição, uma vez por (hash, tamanho)
+        self._executor_miniaturas = ThreadPoolExecutor(
+            max_workers=FOTOS_CONFIG['workers_miniaturas'], thread_name_prefix='rfid-miniaturas'
+        )
+        self._miniaturas_pendentes = set()
+
+        self._metricas = {
+            'acertos': 0,
+            'faltas': 0,
+            'gravacoes': 0,
+            'despejos': 0,
+            'miniaturas_servidas': 0,
+            'miniaturas_geradas': 0,
+            'miniaturas_pendentes': 0,
+            'erros_miniatura': 0,
+            'indices_apagados': 0
+        }
+
+        if Image is None:
+            self.logger.warning("Pillow não instalado: ?size= serve sempre a foto original")
+
+        self._carregar_objetos()
+        self._agendar_varredura()
+        self.logger.info(
+            f"Armazém de fotos em {self.diretorio}: {len(self._objetos)} objetos, "
+            f"{self._bytes / 1024 / 1024:.1f} MB (limite {self.max_bytes / 1024 / 1024:.0f} MB)"
+        )
+
+    def _carregar_objetos(self):
+        """Lê os objetos já existentes em disco, do menos para o mais recentemente gravado."""
+        encontrados = []
+        for subdiretorio in os.scandir(self.dir_objetos):
+            if not subdiretorio.is_dir():
+                continue
+            for arquivo in os.scandir(subdiretorio.path):
+                if arquivo.name.startswith('.'):
+                    continue
+                estado = arquivo.stat()
+                encontrados.append((estado.st_mtime, arquivo.name, estado.st_size))
+
+        encontrados.sort()
+        for _, hash_foto, tamanho in encontrados:
+            self._objetos[hash_foto] = tamanho
+            self._bytes += tamanho
+
+        # Miniaturas contam no limite do objeto de origem
+        if os.path.isdir(self.dir_miniaturas):
+            for caminho_tamanho in os.scandir(self.dir_miniaturas):
+                for subdiretorio in os.scandir(caminho_tamanho.path):
+                    for arquivo in os.scandir(subdiretorio.path):
+                        hash_foto = arquivo.name.split('.', 1)[0]
+                        if hash_foto in self._objetos:
+                            tamanho = arquivo.stat().st_size
+                            self._objetos[hash_foto] += tamanho
+                            self._bytes += tamanho
+
+    # ------------------------------------------------------------------
+    # Chaves e caminhos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def chave_etiqueta(etiqueta_hex):
+        """Chave da foto mais recente de uma etiqueta."""
+        return f"etiqueta:{etiqueta_hex.strip().upper()}"
+
+    @staticmethod
+    def chave_ping(local, antena, horario_sql):
+        """Chave da foto de um PING (local, antena, horário no formato SQL)."""
+        return f"ping:{local}:{antena}:{horario_sql}"
+
+    def _caminho_objeto(self, hash_foto):
+        return os.path.join(self.dir_objetos, hash_foto[:2], hash_foto)
+
+    def _caminho_miniatura(self, hash_foto, tamanho):
+        return os.path.join(self.dir_miniaturas, tamanho, hash_foto[:2], f"{hash_foto}.jpg")
+
+    def _caminho_indice(self, chave):
+        nome = hashlib.blake2b(chave.encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.dir_indice, f"{nome}.json")
+
+    def _gravar_arquivo(self, caminho, dados):
+        """Grava um arquivo de forma atômica (temporário + rename no mesmo diretório)."""
+        diretorio = os.path.dirname(caminho)
+        os.makedirs(diretorio, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix='.tmp-')
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                arquivo.write(dados)
+            os.replace(temporario, caminho)
+        except BaseException:
+            try:
+                os.unlink(temporario)
+            except OSError:
+                pass
+            raise
+
+    def _entrada(self, chave, hash_foto, mimetype, tamanho, horario, verificado_em):
+        return {
+            'chave': chave,
+            'hash': hash_foto,
+            'mimetype': mimetype,
+            'tamanho': tamanho,
+            'horario': horario,
+            'verificado_em': verificado_em,
+            'caminho': self._caminho_objeto(hash_foto)
+        }
+
+    # ------------------------------------------------------------------
+    # Operações
+    # ------------------------------------------------------------------
+
+    def obter(self, chave):
+        """
+        Obtém a foto de uma chave, se estiver no armazém.
+
+        Args:
+            chave (str): Chave (ver chave_etiqueta/chave_ping)
+
+        Returns:
+            dict: Entrada (caminho, mimetype, tamanho, hash, horario, verificado_em) ou None
+        """
+        with self._lock:
+            entrada = self._indice.get(chave)
+
+        if entrada is None:
+            entrada = self._ler_indice(chave)
+
+        # O objeto pode ter sido despejado (por este ou outro processo)
+        if entrada is None or not os.path.isfile(entrada['caminho']):
+            with self._lock:
+                self._metricas['faltas'] += 1
+            return None
+
+        with self._lock:
+            self._indice[chave] = entrada
+            self._chaves_por_hash.setdefault(entrada['hash'], set()).add(chave)
+            if entrada['hash'] in self._objetos:
+                self._objetos.move_to_end(entrada['hash'])
+            self._metricas['acertos'] += 1
+        return entrada
+
+    def obter_metadados(self, chave):
+        """
+        Obtém hash, horário e tamanho da foto de uma chave, mesmo que o objeto tenha sido despejado.
+
+        Args:
+            chave (str): Chave (ver chave_etiqueta/chave_ping)
+
+        Returns:
+            dict: Entrada (mesmo formato de obter; o arquivo pode não existir) ou None
+        """
+        with self._lock:
+            entrada = self._indice.get(chave)
+        return entrada if entrada is not None else self._ler_indice(chave)
+
+    def _ler_indice(self, chave):
+        """Lê a entrada do índice em disco (gravada por este ou outro processo)."""
+        caminho = self._caminho_indice(chave)
+        try:
+            with open(caminho, 'rb') as arquivo:
+                dados = json.loads(arquivo.read())
+            verificado_em = os.stat(caminho).st_mtime
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Índice de foto ilegível para {chave}: {e}")
+            return None
+
+        if dados.get('chave') != chave:
+            return None
+        return self._entrada(
+            chave, dados['hash'], dados['mimetype'], dados['tamanho'], dados.get('horario'), verificado_em
+        )
+
+    def gravar(self, chave, dados, horario=None):
+        """
+        Armazena a foto de uma chave.
+
+        Args:
+            chave (str): Chave (ver chave_etiqueta/chave_ping)
+            dados (bytes): Conteúdo da foto
+            horario: Horário da foto (leitura/PING), guardado como texto
+
+        Returns:
+            dict: Entrada gravada (mesmo formato de obter)
+        """
+        dados = bytes(dados)
+        hash_foto = hashlib.sha256(dados).hexdigest()
+        caminho = self._caminho_objeto(hash_foto)
+        if not os.path.isfile(caminho):
+            self._gravar_arquivo(caminho, dados)
+
+        agora = time.time()
+        entrada = self._entrada(
+            chave, hash_foto, detectar_tipo_imagem(dados), len(dados),
+            str(horario) if horario is not None else None, agora
+        )
+        self._gravar_arquivo(self._caminho_indice(chave), json.dumps({
+            'chave': chave,
+            'hash': hash_foto,
+            'mimetype': entrada['mimetype'],
+            'tamanho': entrada['tamanho'],
+            'horario': entrada['horario']
+        }).encode('utf-8'))
+
+        with self._lock:
+            anterior = self._indice.get(chave)
+            if anterior is not None and anterior['hash'] != hash_foto:
+                self._chaves_por_hash.get(anterior['hash'], set()).discard(chave)
+            self._indice[chave] = entrada
+            self._chaves_por_hash.setdefault(hash_foto, set()).add(chave)
+            if hash_foto in self._objetos:
+                self._objetos.move_to_end(hash_foto)
+            else:
+                self._objetos[hash_foto] = len(dados)
+                self._bytes += len(dados)
+            self._metricas['gravacoes'] += 1
+            despejados = self._selecionar_despejo(manter=hash_foto)
+
+        self._remover_objetos(despejados)
+        self._agendar_varredura()
+        return entrada
+
+    def confirmar(self, chave):
+        """
+        Marca a entrada como conferida agora (o banco confirmou que a foto não mudou).
+
+        Args:
+            chave (str): Chave
+        """
+        agora = time.time()
+        with self._lock:
+            entrada = self._indice.get(chave)
+            if entrada is not None:
+                entrada['verificado_em'] = agora
+        try:
+            # A data do índice em disco é o verificado_em visto pelos outros processos
+            os.utime(self._caminho_indice(chave), (agora, agora))
+        except OSError:
+            pass
+
+    def remover(self, chave):
+        """Remove a chave do índice (o objeto fica até ser despejado)."""
+        self._descartar_chave(chave)
+
+    def _descartar_chave(self, chave):
+        with self._lock:
+            entrada = self._indice.pop(chave, None)
+            if entrada is not None:
+                self._chaves_por_hash.get(entrada['hash'], set()).discard(chave)
+        try:
+            os.unlink(self._caminho_indice(chave))
+        except OSError:
+            pass
+
+    def _selecionar_despejo(self, manter):
+        """Escolhe objetos LRU até caber no limite. Chamar com o lock."""
+        despejados = []
+        while self._bytes > self.max_bytes and len(self._objetos) > 1:
+            hash_foto, tamanho = next(iter(self._objetos.items()))
+            if hash_foto == manter:
+                self._objetos.move_to_end(hash_foto)
+                continue
+            del self._objetos[hash_foto]
+            self._bytes -= tamanho
+            # O índice em disco fica (metadados) até a varredura; a memória só guarda chaves com objeto
+            for chave in self._chaves_por_hash.pop(hash_foto, ()):
+                self._indice.pop(chave, None)
+            despejados.append(hash_foto)
+            self._metricas['despejos'] += 1
+        return despejados
+
+    def _remover_objetos(self, despejados):
+        """Apaga do disco os objetos despejados e suas miniaturas."""
+        for hash_foto in despejados:
+            caminhos = [self._caminho_miniatura(hash_foto, tamanho) for tamanho in self.tamanhos]
+            caminhos.append(self._caminho_objeto(hash_foto))
+            for caminho in caminhos:
+                try:
+                    os.unlink(caminho)
+                except OSError:
+                    pass
+
+    def _agendar_varredura(self):
+        """Agenda a varredura do índice em disco, no máximo uma vez por hora."""
+        agora = time.monotonic()
+        with self._lock:
+            if self._varrido_em and agora - self._varrido_em < 3600:
+                return
+            self._varrido_em = agora
+        try:
+            self._executor_miniaturas.submit(self._varrer_indice)
+        except RuntimeError:
+            pass
+
+    def _varrer_indice(self):
+        """
+        Apaga entradas do índice em disco cujo objeto não existe mais e que não
+        foram usadas (gravadas/confirmadas) há mais de retencao_indice segundos.
+
+        Sem a varredura cada etiqueta ou PING já servido deixaria um arquivo
+        de índice para sempre, inclusive os gravados por outros processos.
+        """
+        limite = time.time() - self.retencao_indice
+        apagados = 0
+        try:
+            for arquivo in os.scandir(self.dir_indice):
+                if not arquivo.name.endswith('.json'):
+                    continue
+                try:
+                    if arquivo.stat().st_mtime > limite:
+                        continue
+                    with open(arquivo.path, 'rb') as conteudo:
+                        hash_foto = json.loads(conteudo.read()).get('hash') or ''
+                    if hash_foto and os.path.isfile(self._caminho_objeto(hash_foto)):
+                        continue
+                    os.unlink(arquivo.path)
+                    apagados += 1
+                except FileNotFoundError:
+                    continue
+                except (OSError, ValueError):
+                    # Ilegível: também é lixo depois da retenção
+                    try:
+                        os.unlink(arquivo.path)
+                        apagados += 1
+                    except OSError:
+                        pass
+        except Exception as e:
+            self.logger.warning(f"Erro na varredura do índice de fotos: {e}")
+
+        if apagados:
+            with self._lock:
+                self._metricas['indices_apagados'] += apagados
+            self.logger.info(f"Varredura do índice de fotos: {apagados} entradas sem objeto apagadas")
+
+    # ------------------------------------------------------------------
+    # Miniaturas
+    # ------------------------------------------------------------------
+
+    def obter_miniatura(self, entrada, tamanho):
+        """
+        Obtém a miniatura de uma foto, agendando a geração se ainda não existir.
+
+        Nunca redimensiona na thread de quem chama: enquanto a miniatura não
+        fica pronta (ou sem Pillow), retorna None e a rota serve a original.
+
+        Args:
+            entrada (dict): Entrada retornada por obter/gravar
+            tamanho (str): Nome do tamanho (chave de FOTOS_CONFIG['tamanhos'])
+
+        Returns:
+            dict: Entrada da miniatura (caminho, mimetype, tamanho, hash, horario) ou None
+        """
+        hash_foto = entrada['hash']
+        caminho = self._caminho_miniatura(hash_foto, tamanho)
+        try:
+            bytes_miniatura = os.stat(caminho).st_size
+        except OSError:
+            self._agendar_miniatura(hash_foto, tamanho)
+            return None
+
+        with self._lock:
+            self._metricas['miniaturas_servidas'] += 1
+        return {
+            'chave': entrada['chave'],
+            'hash': hash_foto,
+            'mimetype': 'image/jpeg',
+            'tamanho': bytes_miniatura,
+            'horario': entrada['horario'],
+            'caminho': caminho,
+            'miniatura': tamanho
+        }
+
+    def _agendar_miniatura(self, hash_foto, tamanho):
+        if Image is None:
+            return
+        pendente = (hash_foto, tamanho)
+        with self._lock:
+            if pendente in self._miniaturas_pendentes:
+                return
+            self._miniaturas_pendentes.add(pendente)
+            self._metricas['miniaturas_pendentes'] = len(self._miniaturas_pendentes)
+        try:
+            self._executor_miniaturas.submit(self._gerar_miniatura, hash_foto, tamanho)
+        except RuntimeError:
+            # Executor encerrado (desligamento do servidor)
+            with self._lock:
+                self._miniaturas_pendentes.discard(pendente)
+
+    def _gerar_miniatura(self, hash_foto, tamanho):
+        """Gera e grava uma miniatura JPEG (executa no pool de miniaturas)."""
+        lado = self.tamanhos[tamanho]
+        try:
+            with Image.open(self._caminho_objeto(hash_foto)) as imagem:
+                imagem = ImageOps.exif_transpose(imagem)
+                imagem.thumbnail((lado, lado))
+                if imagem.mode not in ('RGB', 'L'):
+                    imagem = imagem.convert('RGB')
+                saida = io.BytesIO()
+                imagem.save(saida, format='JPEG', quality=self.qualidade_jpeg, optimize=True)
+
+            dados = saida.getvalue()
+            self._gravar_arquivo(self._caminho_miniatura(hash_foto, tamanho), dados)
+            with self._lock:
+                self._metricas['miniaturas_geradas'] += 1
+                if hash_foto in self._objetos:
+                    self._objetos[hash_foto] += len(dados)
+                    self._bytes += len(dados)
+
+        except Exception as e:
+            # Objeto despejado ou imagem inválida: a rota continua servindo a original
+            with self._lock:
+                self._metricas['erros_miniatura'] += 1
+            self.logger.warning(f"Erro ao gerar miniatura {tamanho} de {hash_foto}: {e}")
+        finally:
+            with self._lock:
+                self._miniaturas_pendentes.discard((hash_foto, tamanho))
+                self._metricas['miniaturas_pendentes'] = len(self._miniaturas_pendentes)
+
+    def obter_metricas(self):
+        """Retorna ocupação e contadores deste processo."""
+        with self._lock:
+            metricas = dict(self._metricas)
+            metricas['objetos'] = len(self._objetos)
+            metricas['bytes'] = self._bytes
+            metricas['max_bytes'] = self.max_bytes
+            metricas['chaves_em_memoria'] = len(self._indice)
+        metricas['diretorio'] = self.diretorio
+        metricas['miniaturas'] = self.tamanhos if Image is not None else None
+        return metricas
+
+
+# Valor de ?size= que serve a foto original
+TAMANHO_ORIGINAL = 'full'
+
+
+def tamanhos_validos():
+    """Valores aceitos em ?size= (original + FOTOS_CONFIG['tamanhos'])."""
+    return (TAMANHO_ORIGINAL, *FOTOS_CONFIG['tamanhos'])
+
+
+def etag_foto(arquivo, tamanho):
+    """ETag forte de uma foto: hash do conteúdo original (+ tamanho, nas miniaturas)."""
+    if tamanho == TAMANHO_ORIGINAL:
+        return arquivo['hash']
+    return f"{arquivo['hash']}-{tamanho}"
+
+
+def _ultima_modificacao(horario):
+    """Horário da foto (texto SQL) como datetime UTC, como nas datas do JSON da API."""
+    if not horario:
+        return None
+    try:
+        return datetime.fromisoformat(str(horario)).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _aplicar_cache(resposta, imutavel):
+    """PING: foto nunca muda (cache longo). Etiqueta: a foto mais recente muda (sempre revalidar)."""
+    if imutavel:
+        resposta.cache_control.no_cache = None
+        resposta.cache_control.public = True
+        resposta.cache_control.max_age = 86400
+    else:
+        resposta.cache_control.no_cache = True
+    return resposta
+
+
+def resposta_nao_modificada(metadados, tamanho, imutavel):
+    """
+    Responde 304 se a requisição condicional ainda é válida para os metadados da foto.
+
+    Usa só metadados (índice do armazém/índice de fotos), sem ler o BLOB.
+    If-None-Match tem precedência sobre If-Modified-Since, como na RFC 9110.
+
+    Args:
+        metadados (dict): hash (pode ser None) e horario da foto, ou None
+        tamanho (str): Valor de ?size=
+        imutavel (bool): Foto que nunca muda (PING)
+
+    Returns:
+        Response: Resposta 304, ou None se a foto precisa ser enviada
+    """
+    from flask import current_app, request
+
+    if not metadados:
+        return None
+
+    etag = etag_foto(metadados, tamanho) if metadados.get('hash') else None
+    ultima_modificacao = _ultima_modificacao(metadados.get('horario'))
+
+    if request.if_none_match:
+        if etag is None or not request.if_none_match.contains_weak(etag):
+            return None
+    elif request.if_modified_since:
+        if ultima_modificacao is None or ultima_modificacao > request.if_modified_since:
+            return None
+    else:
+        return None
+
+    resposta = current_app.response_class(status=304)
+    if etag:
+        resposta.set_etag(etag)
+    if ultima_modificacao:
+        resposta.last_modified = ultima_modificacao
+    return _aplicar_cache(resposta, imutavel)
+
+
+def resposta_foto(arquivo, tamanho, nome_arquivo, imutavel):
+    """
+    Cria a resposta da rota de foto a partir de uma entrada do armazém.
+
+    A resposta leva ETag (hash do conteúdo) e Last-Modified (horário da
+    leitura/PING), responde If-None-Match/If-Modified-Since com 304 e aceita
+    Range (206). Se a miniatura pedida ainda está sendo gerada, a original é
+    servida com o ETag da original e sem Last-Modified, para a próxima
+    revalidação trazer a miniatura.
+
+    O arquivo é aberto uma única vez: se outro processo o despejar depois
+    disso, a resposta continua lendo o descritor aberto.
+
+    Args:
+        arquivo (dict): Entrada do ArmazemFotosRFID (original)
+        tamanho (str): Valor de ?size= (ver tamanhos_validos)
+        nome_arquivo (str): Nome sugerido no Content-Disposition
+        imutavel (bool): Foto que nunca muda (PING)
+
+    Returns:
+        Response: Resposta Flask (send_file)
+
+    Raises:
+        FileNotFoundError: O objeto foi despejado depois da consulta ao armazém
+            (a rota lê a foto do banco de novo)
+    """
+    from flask import request, send_file
+
+    servido = None
+    conteudo = None
+    ultima_modificacao = _ultima_modificacao(arquivo['horario'])
+    etag = etag_foto(arquivo, TAMANHO_ORIGINAL)
+
+    if tamanho != TAMANHO_ORIGINAL:
+        miniatura = ArmazemFotosRFID.get_instance().obter_miniatura(arquivo, tamanho)
+        if miniatura is not None:
+            try:
+                conteudo = open(miniatura['caminho'], 'rb')
+                servido = miniatura
+                etag = etag_foto(arquivo, tamanho)
+            except FileNotFoundError:
+                conteudo = None
+        if conteudo is None:
+            ultima_modificacao = None
+            imutavel = False
+
+    if conteudo is None:
+        servido = arquivo
+        conteudo = open(arquivo['caminho'], 'rb')
+
+    try:
+        tamanho_bytes = os.fstat(conteudo.fileno()).st_size
+        # Com um arquivo aberto o send_file não conhece o tamanho: Content-Length,
+        # ETag e a resposta condicional (304/206) são aplicados aqui
+        resposta = send_file(
+            conteudo,
+            mimetype=servido['mimetype'],
+            download_name=nome_arquivo,
+            conditional=False,
+            last_modified=ultima_modificacao,
+            max_age=None
+        )
+    except BaseException:
+        conteudo.close()
+        raise
+
+    resposta.content_length = tamanho_bytes
+    resposta.set_etag(etag)
+    resposta = resposta.make_conditional(request.environ, accept_ranges=True, complete_length=tamanho_bytes)
+    return _aplicar_cache(resposta, imutavel)
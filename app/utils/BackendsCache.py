@@ -0,0 +1,424 @@
+# app/utils/BackendsCache.py
+import hashlib
+import json
+import logging
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from functools import partial
+from datetime import date, datetime, time as hora
+from decimal import Decimal
+
+
+def estimar_tamanho(valor, profundidade=0):
+    """
+    Estima o tamanho em bytes de um valor (dicts/listas percorridos recursivamente).
+
+    É uma aproximação via sys.getsizeof, suficiente para o orçamento de memória
+    do cache; não segue referências compartilhadas.
+
+    Args:
+        valor: Valor a medir
+        profundidade (int): Nível atual da recursão
+
+    Returns:
+        int: Tamanho aproximado em bytes
+    """
+    tamanho = sys.getsizeof(valor)
+    if profundidade > 8:
+        return tamanho
+
+    if isinstance(valor, dict):
+        for chave, item in valor.items():
+            tamanho += estimar_tamanho(chave, profundidade + 1) + estimar_tamanho(item, profundidade + 1)
+    elif isinstance(valor, (list, tuple, set, frozenset)):
+        for item in valor:
+            tamanho += estimar_tamanho(item, profundidade + 1)
+    return tamanho
+
+
+def _forma_canonica(valor):
+    """Estrutura JSON com o tipo de cada valor (ver codificar_chave_cache)."""
+    if valor is None or isinstance(valor, str):
+        return valor
+    if isinstance(valor, bool):
+        return ['b', valor]
+    if isinstance(valor, int):
+        return ['i', str(valor)]
+    if isinstance(valor, float):
+        return ['f', valor.hex()]
+    if isinstance(valor, Decimal):
+        return ['d', str(valor.normalize())]
+    # datetime antes de date (subclasse)
+    if isinstance(valor, datetime):
+        return ['dt', valor.isoformat()]
+    if isinstance(valor, date):
+        return ['da', valor.isoformat()]
+    if isinstance(valor, hora):
+        return ['h', valor.isoformat()]
+    if isinstance(valor, bytes):
+        return ['by', valor.hex()]
+    if isinstance(valor, (tuple, list)):
+        return ['t', [_forma_canonica(item) for item in valor]]
+    if isinstance(valor, (set, frozenset)):
+        itens = [_forma_canonica(item) for item in valor]
+        return ['s', sorted(itens, key=lambda item: json.dumps(item, sort_keys=True))]
+    raise TypeError(f"Tipo sem codificação canônica em chave de cache: {type(valor).__name__}")
+
+
+def codificar_chave_cache(chave):
+    """
+    Codifica a chave de uma entrada (str ou tupla de construir_chave_cache) como texto estável.
+
+    Ao contrário de str()/repr(), o resultado não depende da versão do
+    Python nem da ordem de conjuntos, e tipos diferentes com a mesma
+    representação (ex: '1' e 1, '2024-01-05' e date) não colidem. Chaves de
+    texto ficam legíveis; as demais viram um resumo da forma canônica.
+
+    Args:
+        chave: Chave dentro do namespace (str ou tupla)
+
+    Returns:
+        str: 's:<chave>' ou 'h:<blake2b da forma canônica>'
+    """
+    if isinstance(chave, str):
+        return f"s:{chave}"
+    forma = json.dumps(_forma_canonica(chave), separators=(',', ':'), ensure_ascii=False)
+    return f"h:{hashlib.blake2b(forma.encode('utf-8'), digest_size=20).hexdigest()}"
+
+
+class BackendCache:
+    """
+    Interface de armazenamento do CacheRFID.
+
+    As chaves são tuplas (namespace, chave). Os horários (expira_em,
+    criado_em) são epoch em segundos (time.time()), comparáveis entre
+    processos. Políticas (TTL, coalescência, stale-while-revalidate,
+    métricas) ficam no CacheRFID; o backend só armazena.
+    """
+
+    nome = 'base'
+
+    def ler(self, chave):
+        """Retorna (valor, expira_em, criado_em) ou None. Conta como uso (LRU)."""
+        raise NotImplementedError
+
+    def gravar(self, chave, valor, expira_em, criado_em, tags, retencao):
+        """
+        Armazena uma entrada.
+
+        Args:
+            chave (tuple): (namespace, chave)
+            valor: Valor a armazenar
+            expira_em (float): Fim da validade (epoch)
+            criado_em (float): Momento do cálculo (epoch)
+            tags (frozenset): Tags de dependência
+            retencao (float): Segundos que a entrada deve ser mantida (validade + tolerância)
+
+        Returns:
+            list: Chaves despejadas para abrir espaço
+        """
+        raise NotImplementedError
+
+    def remover(self, chave):
+        """Remove uma entrada, se existir."""
+        raise NotImplementedError
+
+    def limpar(self, namespace=None):
+        """Remove as entradas do namespace (todas se None). Retorna a quantidade removida."""
+        raise NotImplementedError
+
+    def invalidar_tags(self, tags):
+        """Remove as entradas com qualquer uma das tags. Retorna as chaves removidas."""
+        raise NotImplementedError
+
+    def varrer(self, limite):
+        """Remove entradas com expira_em <= limite. Retorna as chaves removidas."""
+        raise NotImplementedError
+
+    def estado(self):
+        """Retorna itens e bytes armazenados (totais e, se disponível, por namespace)."""
+        raise NotImplementedError
+
+
+class BackendMemoria(BackendCache):
+    """
+    Armazenamento no próprio processo, com limite de itens/bytes e despejo LRU.
+
+    Cada processo (worker) tem o seu; invalidações não são vistas pelos demais.
+    Os corpos JSON que resposta_json() anexa aos retratos (DictCongelado._corpos)
+    entram no tamanho da entrada: os já existentes ao gravar, e os gerados
+    depois, por aviso do próprio retrato.
+    """
+
+    nome = 'memoria'
+
+    def __init__(self, max_itens, max_bytes):
+        self.max_itens = max(1, int(max_itens))
+        self.max_bytes = max(1, int(max_bytes))
+
+        # (namespace, chave) -> (valor, expira_em, criado_em, tamanho, tags); ordem = uso (LRU no início)
+        self._entradas = OrderedDict()
+        # tag -> {(namespace, chave)}
+        self._indice_tags = {}
+        self._bytes = 0
+        self._por_namespace = {}
+        # Despejos causados pelo crescimento de entradas, informados no próximo gravar()
+        self._despejos_corpos = []
+        self._lock = threading.Lock()
+
+    def _descartar(self, chave):
+        """Remove uma entrada e suas referências. Chamar com o lock."""
+        _, _, _, tamanho, tags = self._entradas.pop(chave)
+        self._bytes -= tamanho
+        for tag in tags:
+            chaves = self._indice_tags.get(tag)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._indice_tags[tag]
+        estado = self._por_namespace[chave[0]]
+        estado['itens'] -= 1
+        estado['bytes'] -= tamanho
+
+    def ler(self, chave):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            self._entradas.move_to_end(chave)
+            return entrada[0], entrada[1], entrada[2]
+
+    def _contar_corpo(self, chave, valor, tamanho):
+        """Soma ao tamanho da entrada um corpo JSON gerado depois da gravação, despejando se preciso."""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada[0] is not valor:
+                return  # Entrada já substituída ou removida
+
+            self._entradas[chave] = entrada[:3] + (entrada[3] + tamanho,) + entrada[4:]
+            self._bytes += tamanho
+            self._por_namespace[chave[0]]['bytes'] += tamanho
+
+            while self._entradas and self._bytes > self.max_bytes:
+                mais_antiga = next(iter(self._entradas))
+                self._descartar(mais_antiga)
+                self._despejos_corpos.append(mais_antiga)
+
+    def gravar(self, chave, valor, expira_em, criado_em, tags, retencao):
+        corpos = getattr(valor, '_corpos', None) or {}
+        tamanho = estimar_tamanho(valor) + sum(len(corpo) for corpo, _ in corpos.values())
+        if tamanho > self.max_bytes:
+            return []
+
+        with self._lock:
+            despejadas, self._despejos_corpos = self._despejos_corpos, []
+            if chave in self._entradas:
+                self._descartar(chave)
+
+            while self._entradas and (
+                len(self._entradas) >= self.max_itens or self._bytes + tamanho > self.max_bytes
+            ):
+                mais_antiga = next(iter(self._entradas))
+                self._descartar(mais_antiga)
+                despejadas.append(mais_antiga)
+
+            self._entradas[chave] = (valor, expira_em, criado_em, tamanho, tags)
+            self._bytes += tamanho
+            for tag in tags:
+                self._indice_tags.setdefault(tag, set()).add(chave)
+            estado = self._por_namespace.setdefault(chave[0], {'itens': 0, 'bytes': 0})
+            estado['itens'] += 1
+            estado['bytes'] += tamanho
+
+        try:
+            valor._ao_gerar_corpo = partial(self._contar_corpo, chave, valor)
+        except AttributeError:
+            pass  # Só retratos (DictCongelado) recebem corpos JSON
+
+        return despejadas
+
+    def remover(self, chave):
+        with self._lock:
+            if chave in self._entradas:
+                self._descartar(chave)
+
+    def limpar(self, namespace=None):
+        with self._lock:
+            chaves = [chave for chave in self._entradas if namespace is None or chave[0] == namespace]
+            for chave in chaves:
+                self._descartar(chave)
+        return len(chaves)
+
+    def invalidar_tags(self, tags):
+        with self._lock:
+            afetadas = set()
+            for tag in tags:
+                afetadas.update(self._indice_tags.get(tag, ()))
+            for chave in afetadas:
+                self._descartar(chave)
+        return list(afetadas)
+
+    def varrer(self, limite):
+        with self._lock:
+            expiradas = [chave for chave, entrada in self._entradas.items() if entrada[1] <= limite]
+            for chave in expiradas:
+                self._descartar(chave)
+        return expiradas
+
+    def estado(self):
+        with self._lock:
+            return {
+                'itens': len(self._entradas),
+                'bytes': self._bytes,
+                'max_itens': self.max_itens,
+                'max_bytes': self.max_bytes,
+                'namespaces': {nome: dict(estado) for nome, estado in self._por_namespace.items()}
+            }
+
+
+class BackendRedis(BackendCache):
+    """
+    Armazenamento em um servidor Redis (ou compatível) compartilhado pelos workers.
+
+    Entradas, TTLs e tags ficam no servidor, então uma invalidação feita por
+    um processo vale para todos. O limite de memória e o despejo LRU ficam a
+    cargo do servidor (maxmemory + maxmemory-policy allkeys-lru).
+
+    Os valores são serializados com pickle: use apenas um servidor local/confiável.
+    As chaves no servidor são '<prefixo>:e:<namespace>:<codificar_chave_cache>'.
+
+    Args:
+        url (str): URL do servidor (ex: redis://127.0.0.1:6379/0)
+        prefixo (str): Prefixo das chaves no servidor
+        cliente: Cliente já criado com a API do redis-py (ex: RedisLocal de
+            scripts/redis_local.py, nos testes); se omitido, é criado a partir da URL
+    """
+
+    nome = 'redis'
+
+    def __init__(self, url=None, prefixo='rfid:cache', cliente=None):
+        self.logger = logging.getLogger('controlerfid.cache')
+
+        if cliente is None:
+            import redis  # Dependência opcional (pip install redis)
+            cliente = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+        self.cliente = cliente
+        self.prefixo_entrada = f"{prefixo}:e:"
+        self.prefixo_tag = f"{prefixo}:t:"
+
+        # Conjuntos de tags vivem tanto quanto a entrada mais longa já gravada
+        self._retencao_tags = 0
+
+        # Falha aqui (servidor fora do ar) faz o CacheRFID voltar para a memória
+        self.cliente.ping()
+
+    def _chave_redis(self, chave):
+        return f"{self.prefixo_entrada}{chave[0]}:{codificar_chave_cache(chave[1])}"
+
+    def _chave_local(self, chave_redis):
+        if isinstance(chave_redis, bytes):
+            chave_redis = chave_redis.decode('utf-8')
+        namespace, chave = chave_redis[len(self.prefixo_entrada):].split(':', 1)
+        return namespace, chave
+
+    def ler(self, chave):
+        try:
+            dados = self.cliente.get(self._chave_redis(chave))
+        except Exception as e:
+            self.logger.warning(f"Erro ao ler do Redis: {e}")
+            return None
+
+        if dados is None:
+            return None
+        valor, expira_em, criado_em = pickle.loads(dados)
+        return valor, expira_em, criado_em
+
+    def gravar(self, chave, valor, expira_em, criado_em, tags, retencao):
+        chave_redis = self._chave_redis(chave)
+        retencao = max(1, int(retencao) + 1)
+        self._retencao_tags = max(self._retencao_tags, retencao)
+
+        try:
+            dados = pickle.dumps((valor, expira_em, criado_em), protocol=pickle.HIGHEST_PROTOCOL)
+            pipe = self.cliente.pipeline()
+            pipe.set(chave_redis, dados, ex=retencao)
+            for tag in tags:
+                chave_tag = f"{self.prefixo_tag}{tag}"
+                pipe.sadd(chave_tag, chave_redis)
+                pipe.expire(chave_tag, self._retencao_tags)
+            pipe.execute()
+        except Exception as e:
+            self.logger.warning(f"Erro ao gravar no Redis: {e}")
+        return []
+
+    def remover(self, chave):
+        try:
+            self.cliente.delete(self._chave_redis(chave))
+        except Exception as e:
+            self.logger.warning(f"Erro ao remover do Redis: {e}")
+
+    def limpar(self, namespace=None):
+        padrao = f"{self.prefixo_entrada}{namespace}:*" if namespace else f"{self.prefixo_entrada}*"
+        removidas = 0
+        try:
+            lote = []
+            for chave_redis in self.cliente.scan_iter(match=padrao, count=500):
+                lote.append(chave_redis)
+                if len(lote) >= 500:
+                    removidas += self.cliente.delete(*lote)
+                    lote = []
+            if lote:
+                removidas += self.cliente.delete(*lote)
+        except Exception as e:
+            self.logger.warning(f"Erro ao limpar o Redis: {e}")
+        return removidas
+
+    def invalidar_tags(self, tags):
+        try:
+            pipe = self.cliente.pipeline()
+            for tag in tags:
+                pipe.smembers(f"{self.prefixo_tag}{tag}")
+            membros = set()
+            for conjunto in pipe.execute():
+                membros.update(conjunto)
+            membros = sorted(membros)
+
+            pipe = self.cliente.pipeline()
+            for chave_redis in membros:
+                pipe.delete(chave_redis)
+            for tag in tags:
+                pipe.delete(f"{self.prefixo_tag}{tag}")
+            resultados = pipe.execute()
+        except Exception as e:
+            self.logger.warning(f"Erro ao invalidar tags no Redis: {e}")
+            return []
+
+        # Membros já expirados também aparecem nos conjuntos: contar só os removidos
+        return [self._chave_local(chave_redis) for chave_redis, removida in zip(membros, resultados) if removida]
+
+    def varrer(self, limite):
+        # O servidor remove as entradas ao fim da retenção (EX)
+        return []
+
+    def estado(self):
+        # Só as chaves deste prefixo (o banco do Redis pode ser compartilhado com outros usos)
+        try:
+            namespaces = {}
+            for chave_redis in self.cliente.scan_iter(match=f"{self.prefixo_entrada}*", count=500):
+                namespace, _ = self._chave_local(chave_redis)
+                estado = namespaces.setdefault(namespace, {'itens': 0})
+                estado['itens'] += 1
+            memoria = self.cliente.info('memory')
+            return {
+                'itens': sum(estado['itens'] for estado in namespaces.values()),
+                'bytes': None,
+                'bytes_servidor': memoria.get('used_memory'),
+                'max_bytes': memoria.get('maxmemory') or None,
+                'namespaces': namespaces
+            }
+        except Exception as e:
+            self.logger.warning(f"Erro ao consultar o estado do Redis: {e}")
+            return {'itens': None, 'bytes': None, 'namespaces': {}}
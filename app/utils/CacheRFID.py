@@ -0,0 +1,574 @@
+# app/utils/CacheRFID.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from ..config import CACHE_CONFIG
+from .BackendsCache import BackendMemoria, BackendRedis
+from .SerializacaoJSON import abrir_resultado, congelar
+
+
+def _normalizar_texto(valor):
+    """Remove espaços nas pontas; datas/horários em formatos equivalentes viram date/datetime."""
+    valor = valor.strip()
+    # Só tenta converter o que tem cara de data (AAAA-MM-DD...)
+    if len(valor) >= 10 and valor[4] == '-' and valor[7] == '-' and valor[:4].isdigit():
+        try:
+            if len(valor) == 10:
+                return date.fromisoformat(valor)
+            return datetime.fromisoformat(valor)
+        except ValueError:
+            pass
+    return valor
+
+
+def normalizar_parametros_cache(valor):
+    """
+    Converte parâmetros de consulta em uma estrutura imutável e canônica.
+
+    Filtros equivalentes produzem o mesmo resultado: strings sem espaços nas
+    pontas, '2024-01-05T08:00' == '2024-01-05 08:00:00', dict vazio == None e
+    chaves com valor None ignoradas. Dicts viram tuplas de pares ordenados
+    pela chave e listas viram tuplas.
+
+    Args:
+        valor: Valor a normalizar (dict, list, str, número, data...)
+
+    Returns:
+        Valor hashable equivalente (ou None)
+    """
+    if isinstance(valor, str):
+        return _normalizar_texto(valor)
+    if isinstance(valor, dict):
+        itens = []
+        for chave, item in valor.items():
+            item = normalizar_parametros_cache(item)
+            if item is not None:
+                itens.append((chave, item))
+        if not itens:
+            return None
+        itens.sort()  # Chaves únicas: a ordenação nunca compara os valores
+        return tuple(itens)
+    if isinstance(valor, (list, tuple)):
+        return tuple(normalizar_parametros_cache(item) for item in valor)
+    if isinstance(valor, (set, frozenset)):
+        return tuple(sorted((normalizar_parametros_cache(item) for item in valor), key=repr))
+    return valor
+
+
+def construir_chave_cache(prefixo, params=None):
+    """
+    Monta a chave de cache de uma consulta (tupla, sem serialização nem hash).
+
+    Args:
+        prefixo (str): Tipo da consulta (ex: 'leituras', 'pings_total')
+        params (dict): Parâmetros da consulta (filtros, paginação...)
+
+    Returns:
+        str ou tuple: O prefixo, se não houver parâmetros; senão (prefixo, parâmetros normalizados)
+    """
+    params = normalizar_parametros_cache(params)
+    if params is None:
+        return prefixo
+    return (prefixo, params)
+
+
+class _Calculo:
+    """Cálculo em andamento compartilhado pelas chamadas concorrentes (single-flight)."""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class NamespaceCache:
+    """
+    Vista de um namespace do CacheRFID (ex: 'etiquetas', 'leituras').
+
+    Cada gerenciador usa o próprio namespace, com TTL próprio, sobre o
+    mesmo armazenamento limitado.
+    """
+
+    def __init__(self, cache, nome):
+        self._cache = cache
+        self.nome = nome
+
+    def obter(self, chave):
+        """Retorna o valor válido da chave ou None."""
+        return self._cache.obter(self.nome, chave)
+
+    def definir(self, chave, valor, ttl=None, tags=None):
+        """Armazena o valor (ttl em segundos; padrão do namespace se omitido) com suas tags."""
+        self._cache.definir(self.nome, chave, valor, ttl, tags)
+
+    def obter_obsoleto(self, chave):
+        """Retorna o valor mesmo expirado (dentro da tolerância) ou None."""
+        return self._cache.obter_obsoleto(self.nome, chave)
+
+    def coalescer(self, chave, calcular, timeout=None):
+        """Executa calcular() uma única vez para chamadas concorrentes com a mesma chave."""
+        return self._cache.coalescer(self.nome, chave, calcular, timeout)
+
+    def obter_swr(self, chave, calcular, force_refresh=False):
+        """Obtém o valor com stale-while-revalidate (ver CacheRFID.obter_swr)."""
+        return self._cache.obter_swr(self.nome, chave, calcular, force_refresh)
+
+    def remover(self, chave):
+        """Remove a chave, se existir."""
+        self._cache.remover(self.nome, chave)
+
+    def limpar(self):
+        """Remove todas as entradas do namespace."""
+        self._cache.limpar(self.nome)
+
+    def invalidar(self, *tags):
+        """Remove as entradas com qualquer uma das tags, em todos os namespaces."""
+        return self._cache.invalidar_tags(tags)
+
+    def obter_metricas(self):
+        """Retorna as métricas do namespace."""
+        return self._cache.obter_metricas()['namespaces'].get(self.nome, {})
+
+
+class CacheRFID:
+    """
+    Cache compartilhado pelos gerenciadores RFID.
+
+    Features:
+    - Armazenamento plugável (CACHE_CONFIG['backend']): 'memoria' (no
+      processo, limite de itens e de bytes com despejo LRU) ou 'redis'
+      (compartilhado entre os workers do waitress/gunicorn, de modo que
+      TTLs e invalidações valem para todos os processos)
+    - TTL por namespace (cada gerenciador registra o seu)
+    - Varredura periódica de entradas expiradas em thread de fundo; expiradas
+      continuam disponíveis como fallback (obsoletas) durante a tolerância
+    - Coalescência (single-flight): chamadas concorrentes com a mesma chave
+      compartilham um único cálculo (por processo)
+    - Stale-while-revalidate: valores expirados são servidos na hora enquanto
+      uma thread de fundo os recalcula; force_refresh limitado por chave
+    - Invalidação por tags de dependência (ex: 'inventario:12', 'etiqueta:<hex>'),
+      válida entre namespaces: uma escrita remove só as entradas afetadas
+    - Seguro entre threads
+    - Métricas (por processo): acertos, falhas, despejos, expirações,
+      invalidações, coalescências, obsoletos servidos, revalidações
+    """
+
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Retorna a instância única do cache (Singleton)."""
+        with cls._lock_instancia:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self, config=None, backend=None):
+        """
+        Inicializa o cache (use get_instance() para obter a instância compartilhada).
+
+        Args:
+            config (dict): Sobrescreve itens de CACHE_CONFIG
+            backend (BackendCache): Armazenamento já criado (ignora CACHE_CONFIG['backend'])
+        """
+        self.logger = logging.getLogger('controlerfid.cache')
+
+        config_cache = dict(CACHE_CONFIG)
+        if config:
+            config_cache.update(config)
+
+        self.intervalo_varredura = config_cache['intervalo_varredura']
+        self.tolerancia_obsoleto = config_cache['tolerancia_obsoleto']
+        self.timeout_coalescencia = config_cache['timeout_coalescencia']
+        self.intervalo_refresh_forcado = config_cache['intervalo_refresh_forcado']
+
+        self.backend = backend or self._criar_backend(config_cache)
+
+        self._ttls = {}
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+        # (namespace, chave) -> _Calculo em andamento
+        self._calculos = {}
+        self._lock_calculos = threading.Lock()
+
+        # Revalidações em segundo plano (stale-while-revalidate)
+        self._executor_revalidacao = ThreadPoolExecutor(max_workers=2, thread_name_prefix='rfid-cache-swr')
+        self._revalidando = set()
+
+        self._parar = threading.Event()
+        self._thread_varredura = threading.Thread(
+            target=self._executar_varredura, name='rfid-cache-varredura', daemon=True
+        )
+        self._thread_varredura.start()
+
+        self.logger.info(f"Cache RFID inicializado (backend: {self.backend.nome})")
+
+    def _criar_backend(self, config_cache):
+        """Cria o armazenamento configurado; sem Redis disponível, usa a memória do processo."""
+        if config_cache.get('backend') == 'redis':
+            try:
+                return BackendRedis(
+                    url=config_cache['redis_url'],
+                    prefixo=config_cache.get('prefixo_redis', 'rfid:cache')
+                )
+            except Exception as e:
+                self.logger.warning(f"Backend Redis indisponível ({e}): usando cache em memória")
+
+        return BackendMemoria(config_cache['max_itens'], config_cache['max_bytes'])
+
+    def _metricas_namespace(self, namespace):
+        """Contadores do namespace (criados na primeira utilização). Chamar com o lock."""
+        metricas = self._metricas.get(namespace)
+        if metricas is None:
+            metricas = {
+                'acertos': 0,
+                'falhas': 0,
+                'despejos': 0,
+                'expiracoes': 0,
+                'invalidacoes': 0,
+                'coalescidas': 0,
+                'obsoletos_servidos': 0,
+                'revalidacoes': 0,
+                'refresh_limitados': 0
+            }
+            self._metricas[namespace] = metricas
+        return metricas
+
+    def _contar(self, chaves, motivo):
+        """Soma as chaves removidas do backend ao contador do seu namespace."""
+        if not chaves:
+            return
+        with self._lock:
+            for namespace, _ in chaves:
+                self._metricas_namespace(namespace)[motivo] += 1
+
+    def namespace(self, nome, ttl):
+        """
+        Registra (ou reconfigura) um namespace e retorna sua vista.
+
+        Args:
+            nome (str): Nome do namespace
+            ttl (float): Validade padrão das entradas, em segundos
+
+        Returns:
+            NamespaceCache: Vista do namespace
+        """
+        with self._lock:
+            self._ttls[nome] = ttl
+            self._metricas_namespace(nome)
+        return NamespaceCache(self, nome)
+
+    def obter(self, namespace, chave):
+        """
+        Obtém um valor válido do cache.
+
+        Args:
+            namespace (str): Namespace da entrada
+            chave (str): Chave da entrada
+
+        Returns:
+            Valor armazenado ou None se ausente/expirado
+        """
+        chave_interna = (namespace, chave)
+        entrada = self.backend.ler(chave_interna)
+        agora = time.time()
+
+        with self._lock:
+            metricas = self._metricas_namespace(namespace)
+            if entrada is None or entrada[1] <= agora:
+                metricas['falhas'] += 1
+            else:
+                metricas['acertos'] += 1
+                return entrada[0]
+
+        # Expirada: continua guardada como fallback até o fim da tolerância
+        if entrada is not None and entrada[1] + self.tolerancia_obsoleto <= agora:
+            self.backend.remover(chave_interna)
+            self._contar([chave_interna], 'expiracoes')
+        return None
+
+    def obter_obsoleto(self, namespace, chave):
+        """
+        Obtém um valor mesmo que expirado, desde que dentro da tolerância.
+
+        Args:
+            namespace (str): Namespace da entrada
+            chave (str): Chave da entrada
+
+        Returns:
+            Valor armazenado ou None
+        """
+        entrada = self.backend.ler((namespace, chave))
+        if entrada is None or entrada[1] + self.tolerancia_obsoleto <= time.time():
+            return None
+        with self._lock:
+            self._metricas_namespace(namespace)['obsoletos_servidos'] += 1
+        return entrada[0]
+
+    def coalescer(self, namespace, chave, calcular, timeout=None):
+        """
+        Executa calcular() uma única vez para chamadas concorrentes com a mesma chave.
+
+        A primeira chamada calcula; as demais esperam e recebem o mesmo
+        resultado. Se a espera passar do timeout, usam o valor obsoleto do
+        cache (se houver) ou calculam por conta própria.
+
+        Args:
+            namespace (str): Namespace da chave
+            chave (str): Chave do cálculo (normalmente a chave de cache)
+            calcular (callable): Função sem argumentos que produz o resultado
+            timeout (float): Espera máxima em segundos (padrão: timeout_coalescencia)
+
+        Returns:
+            Resultado de calcular()
+        """
+        chave_interna = (namespace, chave)
+        with self._lock_calculos:
+            calculo = self._calculos.get(chave_interna)
+            lider = calculo is None
+            if lider:
+                calculo = _Calculo()
+                self._calculos[chave_interna] = calculo
+
+        if lider:
+            try:
+                calculo.resultado = calcular()
+                return calculo.resultado
+            except BaseException as e:
+                calculo.erro = e
+                raise
+            finally:
+                with self._lock_calculos:
+                    self._calculos.pop(chave_interna, None)
+                calculo.evento.set()
+
+        with self._lock:
+            self._metricas_namespace(namespace)['coalescidas'] += 1
+
+        if calculo.evento.wait(self.timeout_coalescencia if timeout is None else timeout):
+            if calculo.erro is None:
+                return calculo.resultado
+            obsoleto = self.obter_obsoleto(namespace, chave)
+            if obsoleto is not None:
+                return obsoleto
+            raise calculo.erro
+
+        obsoleto = self.obter_obsoleto(namespace, chave)
+        if obsoleto is not None:
+            self.logger.warning(f"Timeout aguardando cálculo de {namespace}/{chave}: usando valor obsoleto")
+            return obsoleto
+
+        self.logger.warning(f"Timeout aguardando cálculo de {namespace}/{chave}: calculando novamente")
+        return calcular()
+
+    def obter_swr(self, namespace, chave, calcular, force_refresh=False):
+        """
+        Obtém um valor com a política stale-while-revalidate.
+
+        - Válido: retornado do cache.
+        - Expirado (dentro da tolerância): retornado na hora com stale=True e
+          recalculado em segundo plano.
+        - Ausente: calculado (com coalescência) e retornado.
+        - force_refresh: recalcula, exceto se o valor tiver menos que
+          intervalo_refresh_forcado segundos (evita avalanches de recargas da UI).
+
+        calcular() deve armazenar o próprio resultado no cache (como os
+        métodos _calcular_* dos gerenciadores), para poder escolher tags e
+        não armazenar respostas de erro.
+
+        Args:
+            namespace (str): Namespace da chave
+            chave (str): Chave de cache
+            calcular (callable): Função sem argumentos que produz e armazena o resultado
+            force_refresh (bool): Pedido de atualização forçada
+
+        Returns:
+            dict: Cópia do resultado com from_cache, stale e idade (segundos)
+        """
+        chave_interna = (namespace, chave)
+        entrada = self.backend.ler(chave_interna)
+        agora = time.time()
+
+        if entrada is not None and entrada[1] + self.tolerancia_obsoleto <= agora:
+            entrada = None
+
+        with self._lock:
+            metricas = self._metricas_namespace(namespace)
+
+            if entrada is not None:
+                valor, expira_em, criado_em = entrada
+                idade = max(0.0, agora - criado_em)
+                expirada = expira_em <= agora
+
+                if force_refresh and idade < self.intervalo_refresh_forcado:
+                    metricas['refresh_limitados'] += 1
+                    force_refresh = False
+
+                if not force_refresh:
+                    if expirada:
+                        metricas['obsoletos_servidos'] += 1
+                    else:
+                        metricas['acertos'] += 1
+            else:
+                metricas['falhas'] += 1
+
+        if entrada is not None and not force_refresh:
+            if expirada:
+                self._agendar_revalidacao(namespace, chave, calcular)
+            return self._com_metadados(valor, from_cache=True, stale=expirada, idade=idade)
+
+        resultado = self.coalescer(namespace, chave, calcular)
+        return self._com_metadados(resultado, from_cache=False, stale=False, idade=0)
+
+    def _com_metadados(self, valor, from_cache, stale, idade):
+        """Cópia rasa do resultado com os metadados de cache (o valor armazenado não é alterado)."""
+        return abrir_resultado(valor, from_cache=from_cache, stale=stale, idade=round(idade, 1))
+
+    def _agendar_revalidacao(self, namespace, chave, calcular):
+        """Recalcula a chave em segundo plano (no máximo uma revalidação por chave)."""
+        chave_interna = (namespace, chave)
+        with self._lock_calculos:
+            if chave_interna in self._revalidando:
+                return
+            self._revalidando.add(chave_interna)
+
+        def revalidar():
+            try:
+                self.coalescer(namespace, chave, calcular)
+                with self._lock:
+                    self._metricas_namespace(namespace)['revalidacoes'] += 1
+            except Exception as e:
+                self.logger.warning(f"Erro ao revalidar {namespace}/{chave}: {e}")
+            finally:
+                with self._lock_calculos:
+                    self._revalidando.discard(chave_interna)
+
+        try:
+            self._executor_revalidacao.submit(revalidar)
+        except RuntimeError:
+            # Executor encerrado (desligamento do servidor)
+            with self._lock_calculos:
+                self._revalidando.discard(chave_interna)
+
+    def definir(self, namespace, chave, valor, ttl=None, tags=None):
+        """
+        Armazena um valor (o backend em memória despeja as entradas menos usadas se necessário).
+
+        O valor é guardado como retrato imutável (congelar): alterações feitas
+        depois pelo chamador não chegam ao cache, e quem lê não consegue alterá-lo.
+
+        Args:
+            namespace (str): Namespace da entrada
+            chave (str): Chave da entrada
+            valor: Valor a armazenar
+            ttl (float): Validade em segundos (padrão: TTL do namespace)
+            tags (iterable): Tags de dependência usadas por invalidar_tags()
+        """
+        if ttl is None:
+            with self._lock:
+                ttl = self._ttls.get(namespace, 300)
+
+        agora = time.time()
+        despejadas = self.backend.gravar(
+            (namespace, chave), congelar(valor), agora + ttl, agora,
+            frozenset(tags or ()), ttl + self.tolerancia_obsoleto
+        )
+        self._contar(despejadas, 'despejos')
+
+    def remover(self, namespace, chave):
+        """Remove uma entrada, se existir."""
+        self.backend.remover((namespace, chave))
+
+    def limpar(self, namespace=None):
+        """
+        Remove entradas do cache.
+
+        Args:
+            namespace (str): Remove só as entradas deste namespace (todas se None)
+        """
+        removidas = self.backend.limpar(namespace)
+        self.logger.info(f"Cache limpo ({namespace or 'todos os namespaces'}, {removidas} entradas)")
+
+    def invalidar_tags(self, tags):
+        """
+        Remove as entradas marcadas com qualquer uma das tags (em todos os namespaces).
+
+        Args:
+            tags (iterable): Tags afetadas por uma escrita
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        tags = list(tags)
+        afetadas = self.backend.invalidar_tags(tags)
+        self._contar(afetadas, 'invalidacoes')
+
+        if afetadas:
+            self.logger.debug(f"Invalidação por tags {sorted(tags)}: {len(afetadas)} entradas")
+        return len(afetadas)
+
+    def varrer_expirados(self):
+        """
+        Remove as entradas expiradas há mais que a tolerância de obsoletos.
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        expiradas = self.backend.varrer(time.time() - self.tolerancia_obsoleto)
+        self._contar(expiradas, 'expiracoes')
+
+        if expiradas:
+            self.logger.debug(f"Varredura do cache removeu {len(expiradas)} entradas expiradas")
+        return len(expiradas)
+
+    def _executar_varredura(self):
+        """Laço da thread de varredura."""
+        while not self._parar.wait(self.intervalo_varredura):
+            try:
+                self.varrer_expirados()
+            except Exception as e:
+                self.logger.warning(f"Erro na varredura do cache: {e}")
+
+    def parar(self):
+        """Encerra a thread de varredura e as revalidações em segundo plano."""
+        self._parar.set()
+        self._executor_revalidacao.shutdown(wait=False)
+
+    def obter_metricas(self):
+        """Retorna um retrato das métricas atuais do cache (contadores deste processo)."""
+        with self._lock:
+            namespaces = {nome: dict(metricas) for nome, metricas in self._metricas.items()}
+
+        estado = self.backend.estado()
+        for nome, ocupacao in estado.get('namespaces', {}).items():
+            namespaces.setdefault(nome, {}).update(ocupacao)
+
+        acertos = sum(m.get('acertos', 0) for m in namespaces.values())
+        falhas = sum(m.get('falhas', 0) for m in namespaces.values())
+
+        def total(contador):
+            return sum(m.get(contador, 0) for m in namespaces.values())
+
+        return {
+            'backend': self.backend.nome,
+            'itens': estado.get('itens'),
+            'bytes': estado.get('bytes'),
+            'bytes_servidor': estado.get('bytes_servidor'),  # Redis: memória do servidor inteiro
+            'max_itens': estado.get('max_itens'),
+            'max_bytes': estado.get('max_bytes'),
+            'acertos': acertos,
+            'falhas': falhas,
+            'despejos': total('despejos'),
+            'expiracoes': total('expiracoes'),
+            'invalidacoes': total('invalidacoes'),
+            'coalescidas': total('coalescidas'),
+            'obsoletos_servidos': total('obsoletos_servidos'),
+            'revalidacoes': total('revalidacoes'),
+            'refresh_limitados': total('refresh_limitados'),
+            'taxa_acerto': round(acertos / (acertos + falhas), 4) if acertos + falhas else None,
+            'namespaces': namespaces
+        }
@@ -0,0 +1,287 @@
+# app/utils/ClienteHelpDesk.py
+import logging
+import threading
+import time
+from urllib.parse import quote
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from ..config import HELPDESK_CONFIG
+from .CacheRFID import CacheRFID
+
+# Suprimir avisos de SSL (certificado interno, verificar_ssl=False)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class HelpDeskIndisponivel(Exception):
+    """A API do HelpDesk Monitor falhou ou o circuito está aberto."""
+
+
+class ClienteHelpDesk:
+    """
+    Cliente da API do HelpDesk Monitor usado na autorização das páginas.
+
+    Features:
+    - Sessão HTTP com conexões reaproveitadas (keep-alive)
+    - Circuit breaker: depois de falhas seguidas, as chamadas falham na hora
+      durante tempo_circuito_aberto; depois uma única chamada de teste decide
+      se o circuito fecha
+    - Competências em cache (namespace 'helpdesk') com TTL, resultado negativo
+      em cache (usuário não encontrado/sem competências) e atualização em
+      segundo plano (stale-while-revalidate)
+    - Com o HelpDesk fora do ar, o último resultado conhecido continua valendo
+      (guardado em chave própria por ttl_ultimo_conhecido, além do TTL normal)
+    - Lista de técnicos baixada uma vez e indexada por nome_usuario_htpasswd
+
+    A URL base vem de HELPDESK_API_BASE, o que permite testar contra um
+    servidor local (scripts/helpdesk_stub.py, ver COMPETENCIAS.md).
+    """
+
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Retorna a instância única do cliente (Singleton)."""
+        with cls._lock_instancia:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self, config=None, sessao=None):
+        """
+        Inicializa o cliente (use get_instance() para obter a instância compartilhada).
+
+        Args:
+            config (dict): Sobrescreve itens de HELPDESK_CONFIG
+            sessao: Sessão HTTP com a API de requests.Session (padrão: uma nova sessão)
+        """
+        self.logger = logging.getLogger('controlerfid.helpdesk')
+
+        config_helpdesk = dict(HELPDESK_CONFIG)
+        if config:
+            config_helpdesk.update(config)
+
+        self.api_base = config_helpdesk['api_base'].rstrip('/')
+        self.timeout = config_helpdesk['timeout']
+        self.ttl_competencias = config_helpdesk['ttl_competencias']
+        self.ttl_negativo = config_helpdesk['ttl_negativo']
+        self.ttl_erro = config_helpdesk['ttl_erro']
+        self.ttl_tecnicos = config_helpdesk['ttl_tecnicos']
+        self.ttl_ultimo_conhecido = config_helpdesk['ttl_ultimo_conhecido']
+        self.falhas_para_abrir = config_helpdesk['falhas_para_abrir']
+        self.tempo_circuito_aberto = config_helpdesk['tempo_circuito_aberto']
+
+        if sessao is None:
+            sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=config_helpdesk['conexoes'])
+            sessao.mount('http://', adaptador)
+            sessao.mount('https://', adaptador)
+            sessao.verify = config_helpdesk['verificar_ssl']
+        self.sessao = sessao
+
+        self.cache = CacheRFID.get_instance().namespace('helpdesk', ttl=self.ttl_competencias)
+
+        # Estado do circuito
+        self._lock_circuito = threading.Lock()
+        self._falhas_seguidas = 0
+        self._aberto_ate = 0.0
+        self._testando = False
+
+        self._metricas = {
+            'requisicoes': 0,
+            'falhas': 0,
+            'rejeitadas': 0,
+            'aberturas_circuito': 0
+        }
+
+        self.logger.info(f"Cliente do HelpDesk Monitor inicializado ({self.api_base})")
+
+    # ------------------------------------------------------------------
+    # Circuit breaker
+    # ------------------------------------------------------------------
+
+    def _pode_chamar(self):
+        """Indica se uma chamada pode ser feita agora (circuito fechado ou em teste)."""
+        with self._lock_circuito:
+            if not self._aberto_ate:
+                return True
+            if time.monotonic() < self._aberto_ate or self._testando:
+                self._metricas['rejeitadas'] += 1
+                return False
+            # Meio-aberto: só esta chamada testa a API
+            self._testando = True
+            return True
+
+    def _registrar_sucesso(self):
+        with self._lock_circuito:
+            if self._aberto_ate:
+                self.logger.info("HelpDesk Monitor respondeu: circuito fechado")
+            self._falhas_seguidas = 0
+            self._aberto_ate = 0.0
+            self._testando = False
+
+    def _registrar_falha(self, erro):
+        with self._lock_circuito:
+            self._metricas['falhas'] += 1
+            self._falhas_seguidas += 1
+            reabrir = self._testando
+            self._testando = False
+            if reabrir or self._falhas_seguidas >= self.falhas_para_abrir:
+                if not self._aberto_ate or reabrir:
+                    self._metricas['aberturas_circuito'] += 1
+                self._aberto_ate = time.monotonic() + self.tempo_circuito_aberto
+                self.logger.warning(
+                    f"HelpDesk Monitor indisponível ({erro}): circuito aberto por {self.tempo_circuito_aberto}s"
+                )
+
+    def _get(self, caminho):
+        """
+        GET na API do HelpDesk, passando pelo circuit breaker.
+
+        Args:
+            caminho (str): Caminho após a URL base (ex: '/contatos_tecnicos')
+
+        Returns:
+            Response: Resposta com status < 500
+
+        Raises:
+            HelpDeskIndisponivel: Circuito aberto, erro de rede ou erro 5xx
+        """
+        if not self._pode_chamar():
+            raise HelpDeskIndisponivel("circuito aberto")
+
+        with self._lock_circuito:
+            self._metricas['requisicoes'] += 1
+
+        try:
+            resposta = self.sessao.get(f"{self.api_base}{caminho}", timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self._registrar_falha(e)
+            raise HelpDeskIndisponivel(str(e)) from e
+
+        if resposta.status_code >= 500:
+            self._registrar_falha(f"HTTP {resposta.status_code}")
+            raise HelpDeskIndisponivel(f"HTTP {resposta.status_code}")
+
+        self._registrar_sucesso()
+        return resposta
+
+    # ------------------------------------------------------------------
+    # Competências
+    # ------------------------------------------------------------------
+
+    def obter_competencias(self, usuario_htpasswd):
+        """
+        Obtém as competências (funções) de um usuário.
+
+        Args:
+            usuario_htpasswd (str): Usuário autenticado
+
+        Returns:
+            list: Competências do usuário (vazia se não encontrado ou sem dados)
+        """
+        if not usuario_htpasswd:
+            return []
+
+        usuario = usuario_htpasswd.lower()
+        chave = f"competencias:{usuario}"
+        resultado = self.cache.obter_swr(chave, lambda: self._calcular_competencias(usuario, chave))
+        return list(resultado.get('competencias', ()))
+
+    def _calcular_competencias(self, usuario, chave):
+        """
+        Consulta a API e armazena as competências no cache.
+
+        Cada resposta da API também é guardada em 'ultimo:<usuario>' por
+        ttl_ultimo_conhecido: a entrada normal some tolerancia_obsoleto
+        segundos após expirar, e uma indisponibilidade mais longa não pode
+        tirar o acesso de quem já tinha competências.
+
+        Args:
+            usuario (str): Usuário (minúsculas)
+            chave (str): Chave de cache
+
+        Returns:
+            dict: {'competencias': [...]} (com 'erro' se o HelpDesk estiver indisponível)
+        """
+        try:
+            resposta = self._get(f"/usuarios_htpasswd/{quote(usuario)}")
+
+            if resposta.status_code == 200:
+                competencias = resposta.json().get('funcoes') or []
+                # Sem funções no cadastro do usuário: procurar no cadastro de técnicos
+                if not competencias:
+                    competencias = self._obter_indice_tecnicos().get(usuario, [])
+            else:
+                self.logger.warning(f"Usuário {usuario} não encontrado na API do HelpDesk Monitor")
+                competencias = []
+
+        except (HelpDeskIndisponivel, ValueError) as e:
+            # Mantém o último resultado conhecido; sem ele, nega por pouco tempo
+            anterior = self.cache.obter_obsoleto(chave)
+            if anterior is None or 'erro' in anterior:
+                anterior = self.cache.obter(f"ultimo:{usuario}")
+            if anterior is not None:
+                self.logger.warning(f"HelpDesk indisponível para {usuario} ({e}): usando competências anteriores")
+                # Volta a consultar a API quando a entrada expirar (o circuito limita as tentativas)
+                self.cache.definir(chave, anterior, ttl=self.ttl_erro)
+                return anterior
+
+            self.logger.error(f"Erro ao consultar competências de {usuario}: {e}")
+            resultado = {'competencias': [], 'erro': str(e)}
+            self.cache.definir(chave, resultado, ttl=self.ttl_erro)
+            return resultado
+
+        resultado = {'competencias': list(competencias)}
+        ttl = self.ttl_competencias if competencias else self.ttl_negativo
+        self.cache.definir(chave, resultado, ttl=ttl)
+        self.cache.definir(f"ultimo:{usuario}", resultado, ttl=self.ttl_ultimo_conhecido)
+        self.logger.info(f"Competências obtidas para {usuario}: {competencias}")
+        return resultado
+
+    def _obter_indice_tecnicos(self):
+        """
+        Índice nome_usuario_htpasswd (minúsculas) -> funções dos técnicos.
+
+        Returns:
+            dict: Índice (vazio se a lista não puder ser obtida)
+
+        Raises:
+            HelpDeskIndisponivel: Se a API estiver indisponível
+        """
+        indice = self.cache.obter('tecnicos')
+        if indice is not None:
+            return indice
+        return self.cache.coalescer('tecnicos', self._carregar_indice_tecnicos)
+
+    def _carregar_indice_tecnicos(self):
+        """Baixa a lista de técnicos e a indexa por usuário."""
+        resposta = self._get('/contatos_tecnicos')
+
+        indice = {}
+        if resposta.status_code == 200:
+            for tecnico in resposta.json():
+                nome_usuario = tecnico.get('nome_usuario_htpasswd')
+                if nome_usuario:
+                    indice[nome_usuario.lower()] = tecnico.get('funcoes') or []
+        else:
+            self.logger.warning(f"Lista de técnicos indisponível (HTTP {resposta.status_code})")
+
+        self.cache.definir('tecnicos', indice, ttl=self.ttl_tecnicos if indice else self.ttl_negativo)
+        self.logger.info(f"Índice de técnicos carregado ({len(indice)} usuários)")
+        return indice
+
+    def limpar_cache(self):
+        """Descarta competências e índice de técnicos (próxima consulta vai à API)."""
+        self.cache.limpar()
+
+    def obter_metricas(self):
+        """Retorna o estado do circuito e os contadores de chamadas deste processo."""
+        with self._lock_circuito:
+            metricas = dict(self._metricas)
+            aberto = bool(self._aberto_ate) and time.monotonic() < self._aberto_ate
+            metricas['circuito'] = 'aberto' if aberto else ('meio-aberto' if self._aberto_ate else 'fechado')
+            metricas['falhas_seguidas'] = self._falhas_seguidas
+        metricas['api_base'] = self.api_base
+        return metricas
@@ -0,0 +1,298 @@
+# app/utils/ContagemSQL.py
+"""
+Utilitários para combinar contagens irmãs em uma única consulta.
+
+Em vez de executar um SELECT COUNT(*) por condição (cada um varrendo a
+tabela), todas as contagens são calculadas na mesma varredura:
+
+    SELECT COUNT(*) AS total,
+           COUNT(CASE WHEN Destruida IS NOT NULL THEN 1 END) AS destruidas
+    FROM etiquetasRFID
+
+Também oferece estratégias de contagem mais baratas que o COUNT(*) exato
+para listagens grandes:
+- contar_estimado: estimativa do otimizador (EXPLAIN / information_schema)
+- ContadorIncremental: contadores mantidos em memória para o filtro base
+  (total desde uma marca d'água) e para janelas de tempo (baldes por minuto,
+  para janelas de até max_baldes minutos)
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Modos de contagem aceitos pelas listagens
+MODOS_CONTAGEM = ('auto', 'exata', 'estimada', 'incremental')
+
+
+def montar_contagens_combinadas(tabela, contagens, where=None):
+    """
+    Monta o SQL de várias contagens sobre a mesma tabela/filtro.
+
+    Args:
+        tabela (str): Tabela (ou expressão FROM com JOINs)
+        contagens (dict): Alias -> condição SQL (None = COUNT(*))
+        where (str): Condição WHERE comum a todas as contagens (opcional)
+
+    Returns:
+        str: Consulta SQL com uma coluna por alias
+    """
+    colunas = []
+    for alias, condicao in contagens.items():
+        if condicao is None:
+            colunas.append(f"COUNT(*) AS {alias}")
+        else:
+            colunas.append(f"COUNT(CASE WHEN {condicao} THEN 1 END) AS {alias}")
+
+    query = f"SELECT {', '.join(colunas)} FROM {tabela}"
+    if where:
+        query += f" WHERE {where}"
+    return query
+
+
+def executar_contagens_combinadas(cursor, tabela, contagens, where=None, params=None):
+    """
+    Executa várias contagens em uma única consulta.
+
+    Args:
+        cursor: Cursor MySQL (dictionary=True ou não)
+        tabela (str): Tabela (ou expressão FROM com JOINs)
+        contagens (dict): Alias -> condição SQL (None = COUNT(*))
+        where (str): Condição WHERE comum a todas as contagens (opcional)
+        params (list): Parâmetros da consulta (condições e WHERE, na ordem em que aparecem)
+
+    Returns:
+        dict: Alias -> contagem (int)
+    """
+    cursor.execute(montar_contagens_combinadas(tabela, contagens, where), params or [])
+    linha = cursor.fetchone()
+
+    if not linha:
+        return {alias: 0 for alias in contagens}
+
+    if not isinstance(linha, dict):
+        linha = dict(zip(contagens.keys(), linha))
+
+    return {alias: int(linha.get(alias) or 0) for alias in contagens}
+
+
+def contar_estimado(cursor, tabela, where=None, params=None):
+    """
+    Estima a quantidade de linhas sem executar o COUNT(*).
+
+    Sem WHERE usa TABLE_ROWS de information_schema; com WHERE usa as linhas
+    estimadas pelo EXPLAIN para a tabela principal (rows * filtered).
+
+    Args:
+        cursor: Cursor MySQL com dictionary=True
+        tabela (str): Tabela (ou expressão FROM com JOINs)
+        where (str): Condição WHERE (opcional)
+        params (list): Parâmetros da condição
+
+    Returns:
+        int: Quantidade estimada de linhas
+    """
+    if not where and ' ' not in tabela.strip():
+        cursor.execute("""
+            SELECT TABLE_ROWS AS linhas
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """, [tabela.strip()])
+        linha = cursor.fetchone()
+        return int(linha['linhas'] or 0) if linha else 0
+
+    query = f"EXPLAIN SELECT 1 FROM {tabela}"
+    if where:
+        query += f" WHERE {where}"
+    cursor.execute(query, params or [])
+    plano = cursor.fetchall()
+    if not plano:
+        return 0
+
+    # A primeira linha do plano é a tabela que conduz a consulta
+    principal = plano[0]
+    linhas = float(principal.get('rows') or 0)
+    filtrado = float(principal.get('filtered') or 100)
+    return int(round(linhas * filtrado / 100))
+
+
+class ContadorIncremental:
+    """
+    Contador mantido em memória para um filtro base fixo.
+
+    - Total: contagem completa uma vez (com a marca d'água MAX(coluna_tempo)) e,
+      nas chamadas seguintes, só as linhas novas após a marca. Uma recontagem
+      completa periódica corrige remoções e inserções fora de ordem.
+    - Janelas de tempo: minutos completos são contados uma vez e guardados;
+      só as bordas parciais e os minutos recentes são contados a cada chamada.
+      Os minutos guardados são recontados a cada intervalo_reconciliacao
+      (linhas inseridas com atraso). Janelas maiores que max_baldes minutos
+      não são atendidas (o chamador usa outra estratégia).
+    """
+
+    def __init__(self, tabela, coluna_tempo, where_base, intervalo_reconciliacao=1800,
+                 margem_minutos=2, max_baldes=2880):
+        """
+        Args:
+            tabela (str): Tabela (ou expressão FROM com alias)
+            coluna_tempo (str): Coluna DATETIME usada como marca d'água
+            where_base (str): Condição fixa do contador (parâmetros em cada chamada)
+            intervalo_reconciliacao (int): Segundos entre recontagens completas do total
+                e dos minutos guardados
+            margem_minutos (int): Minutos recentes que nunca são guardados (ainda recebem linhas)
+            max_baldes (int): Máximo de minutos guardados (os mais antigos são descartados)
+                e maior janela atendida por contar_janela
+        """
+        self.tabela = tabela
+        self.coluna_tempo = coluna_tempo
+        self.where_base = where_base
+        self.intervalo_reconciliacao = intervalo_reconciliacao
+        self.margem = timedelta(minutes=margem_minutos)
+        self.max_baldes = max_baldes
+
+        self._lock = threading.Lock()
+        self._total = None
+        self._marca = None
+        self._reconciliado_em = 0.0
+        self._baldes = {}  # minuto -> (total, contado_em)
+
+    def contar_total(self, cursor, params_base=None):
+        """
+        Retorna o total de linhas do filtro base.
+
+        Args:
+            cursor: Cursor MySQL com dictionary=True
+            params_base (list): Parâmetros de where_base
+
+        Returns:
+            int: Total de linhas
+        """
+        params_base = list(params_base or [])
+
+        with self._lock:
+            total, marca = self._total, self._marca
+            reconciliar = (total is None or marca is None or
+                           time.monotonic() - self._reconciliado_em > self.intervalo_reconciliacao)
+
+        if reconciliar:
+            cursor.execute(f"""
+                SELECT COUNT(*) AS total, MAX({self.coluna_tempo}) AS marca
+                FROM {self.tabela}
+                WHERE {self.where_base}
+            """, params_base)
+            linha = cursor.fetchone() or {}
+            with self._lock:
+                self._total = int(linha.get('total') or 0)
+                self._marca = linha.get('marca')
+                self._reconciliado_em = time.monotonic()
+                return self._total
+
+        cursor.execute(f"""
+            SELECT COUNT(*) AS novos, MAX({self.coluna_tempo}) AS marca
+            FROM {self.tabela}
+            WHERE {self.where_base} AND {self.coluna_tempo} > %s
+        """, params_base + [marca])
+        linha = cursor.fetchone() or {}
+        novos = int(linha.get('novos') or 0)
+
+        with self._lock:
+            # Outra thread pode ter avançado a marca enquanto a consulta rodava
+            if novos and self._marca == marca:
+                self._total += novos
+                self._marca = linha.get('marca')
+            return self._total
+
+    def contar_janela(self, cursor, params_base, inicio, fim=None):
+        """
+        Retorna o total de linhas do filtro base com inicio <= coluna_tempo <= fim.
+
+        Args:
+            cursor: Cursor MySQL com dictionary=True
+            params_base (list): Parâmetros de where_base
+            inicio (datetime): Início da janela (inclusivo)
+            fim (datetime): Fim da janela (inclusivo; None = sem limite)
+
+        Returns:
+            int: Total de linhas na janela, ou None se a janela tem mais de
+                max_baldes minutos (os baldes se descartariam a cada chamada)
+        """
+        params_base = list(params_base or [])
+        coluna = self.coluna_tempo
+
+        # Minutos completos dentro da janela e antigos o bastante para serem guardados
+        primeiro = inicio.replace(second=0, microsecond=0)
+        if primeiro < inicio:
+            primeiro += timedelta(minutes=1)
+        limite = (datetime.now() - self.margem).replace(second=0, microsecond=0)
+        if fim is not None:
+            limite = min(limite, fim.replace(second=0, microsecond=0))
+
+        if limite <= primeiro:
+            where = f"{self.where_base} AND {coluna} >= %s"
+            params = params_base + [inicio]
+            if fim is not None:
+                where += f" AND {coluna} <= %s"
+                params.append(fim)
+            return executar_contagens_combinadas(cursor, self.tabela, {'total': None}, where, params)['total']
+
+        if (limite - primeiro) > timedelta(minutes=self.max_baldes):
+            return None
+
+        minutos = []
+        minuto = primeiro
+        while minuto < limite:
+            minutos.append(minuto)
+            minuto += timedelta(minutes=1)
+
+        agora = time.monotonic()
+        with self._lock:
+            # Ausentes ou contados há mais de intervalo_reconciliacao (inserções atrasadas)
+            faltantes = [
+                m for m in minutos
+                if m not in self._baldes or agora - self._baldes[m][1] > self.intervalo_reconciliacao
+            ]
+
+        if faltantes:
+            cursor.execute(f"""
+                SELECT DATE_FORMAT({coluna}, '%%Y-%%m-%%d %%H:%%i') AS minuto, COUNT(*) AS total
+                FROM {self.tabela}
+                WHERE {self.where_base} AND {coluna} >= %s AND {coluna} < %s
+                GROUP BY minuto
+            """, params_base + [faltantes[0], faltantes[-1] + timedelta(minutes=1)])
+            contados = {
+                datetime.strptime(linha['minuto'], '%Y-%m-%d %H:%M'): int(linha['total'])
+                for linha in cursor.fetchall()
+            }
+            with self._lock:
+                for m in faltantes:
+                    self._baldes[m] = (contados.get(m, 0), agora)
+                self._descartar_baldes_antigos()
+
+        with self._lock:
+            total = sum(self._baldes.get(m, (0, 0.0))[0] for m in minutos)
+
+        # Bordas parciais (antes do primeiro minuto completo e após o último) em uma consulta
+        where_bordas = f"{self.where_base} AND (({coluna} >= %s AND {coluna} < %s) OR ({coluna} >= %s"
+        params_bordas = params_base + [inicio, primeiro, limite]
+        if fim is not None:
+            where_bordas += f" AND {coluna} <= %s"
+            params_bordas.append(fim)
+        where_bordas += "))"
+        total += executar_contagens_combinadas(
+            cursor, self.tabela, {'total': None}, where_bordas, params_bordas
+        )['total']
+
+        return total
+
+    def _descartar_baldes_antigos(self):
+        """Mantém apenas os max_baldes minutos mais recentes (chamar com o lock)."""
+        excesso = len(self._baldes) - self.max_baldes
+        if excesso > 0:
+            for minuto in sorted(self._baldes)[:excesso]:
+                del self._baldes[minuto]
+
+    def limpar(self):
+        """Descarta o estado do contador (próxima chamada reconta tudo)."""
+        with self._lock:
+            self._total = None
+            self._marca = None
+            self._baldes.clear()
@@ -0,0 +1,177 @@
+# app/utils/CursorPaginacao.py
+"""
+Paginação por cursor (keyset/seek) para listagens ordenadas por Horario DESC.
+
+Em vez de LIMIT/OFFSET (que obriga o MySQL a ler e descartar todas as linhas
+anteriores), a próxima página começa logo após a última linha recebida:
+
+    WHERE Horario <= %s AND (Horario < %s OR (Horario = %s AND Local < %s) ...)
+    ORDER BY Horario DESC, Local DESC ...
+    LIMIT %s
+
+O cursor entregue ao cliente é opaco: JSON com os valores da última linha,
+codificado em base64 url-safe.
+
+As tabelas não têm chave primária, então a tupla de ordenação pode se repetir
+(linhas duplicadas). O cursor leva também quantas linhas com a tupla da última
+linha já foram entregues; a página seguinte busca a partir da tupla, inclusive
+(<=), e descarta essas linhas (pular_entregues). Duplicatas que caem na
+fronteira entre páginas não são perdidas.
+"""
+import base64
+import json
+from datetime import datetime
+
+
+def codificar_cursor(valores, entregues=1):
+    """
+    Gera o cursor opaco a partir dos valores de ordenação da última linha.
+
+    Args:
+        valores (list): Valores das colunas de ordenação (datetime é suportado)
+        entregues (int): Linhas com esses valores já entregues ao cliente
+
+    Returns:
+        str: Cursor para a próxima página
+    """
+    serializaveis = []
+    for valor in list(valores) + [entregues]:
+        if isinstance(valor, datetime):
+            serializaveis.append({'dt': valor.isoformat()})
+        else:
+            serializaveis.append(valor)
+
+    dados = json.dumps(serializaveis, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(dados).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor, quantidade):
+    """
+    Recupera os valores de ordenação de um cursor.
+
+    Args:
+        cursor (str): Cursor recebido do cliente
+        quantidade (int): Número de colunas de ordenação esperado
+
+    Returns:
+        tuple: (valores de ordenação, linhas com esses valores já entregues;
+            None em cursores antigos, sem a contagem)
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        dados = base64.urlsafe_b64decode(cursor + preenchimento)
+        valores = json.loads(dados.decode('utf-8'))
+    except Exception:
+        raise ValueError('Cursor de paginação inválido')
+
+    if not isinstance(valores, list) or len(valores) not in (quantidade, quantidade + 1):
+        raise ValueError('Cursor de paginação inválido')
+
+    entregues = None
+    if len(valores) > quantidade:
+        entregues = valores.pop()
+        if not isinstance(entregues, int) or isinstance(entregues, bool) or entregues < 1:
+            raise ValueError('Cursor de paginação inválido')
+
+    resultado = []
+    for valor in valores:
+        if isinstance(valor, dict):
+            try:
+                valor = datetime.fromisoformat(valor['dt'])
+            except Exception:
+                raise ValueError('Cursor de paginação inválido')
+        resultado.append(valor)
+    return resultado, entregues
+
+
+def montar_condicao_seek(colunas, valores, inclusiva=False):
+    """
+    Monta a condição que seleciona as linhas após o cursor (ordem decrescente).
+
+    A primeira coluna também aparece isolada (col <= %s) para que o MySQL
+    use o índice como range.
+
+    Args:
+        colunas (list): Colunas de ordenação, da mais para a menos significativa
+        valores (list): Valores da última linha da página anterior
+        inclusiva (bool): Inclui as linhas com exatamente esses valores
+            (descartadas depois com pular_entregues)
+
+    Returns:
+        tuple: (condição SQL, parâmetros)
+    """
+    alternativas = []
+    params = []
+
+    for i, coluna in enumerate(colunas):
+        partes = []
+        for anterior, valor_anterior in zip(colunas[:i], valores[:i]):
+            partes.append(f"{anterior} = %s")
+            params.append(valor_anterior)
+        ultima = i == len(colunas) - 1
+        partes.append(f"{coluna} {'<=' if inclusiva and ultima else '<'} %s")
+        params.append(valores[i])
+        alternativas.append(f"({' AND '.join(partes)})")
+
+    condicao = f"{colunas[0]} <= %s AND ({' OR '.join(alternativas)})"
+    return condicao, [valores[0]] + params
+
+
+def _mesma_posicao(valores, outros):
+    """Compara tuplas de ordenação (texto sem diferenciar maiúsculas, como a collation do MySQL)."""
+    if len(valores) != len(outros):
+        return False
+    for valor, outro in zip(valores, outros):
+        if isinstance(valor, str) and isinstance(outro, str):
+            if valor.casefold() != outro.casefold():
+                return False
+        elif valor != outro:
+            return False
+    return True
+
+
+def pular_entregues(linhas, posicao, entregues, chave):
+    """
+    Descarta do início da página as linhas já entregues na posição do cursor.
+
+    Args:
+        linhas (list): Linhas lidas com a condição inclusiva (até limite + entregues)
+        posicao (list): Valores de ordenação do cursor
+        entregues (int): Linhas com esses valores já entregues
+        chave (callable): linha -> valores de ordenação
+
+    Returns:
+        list: Linhas da página
+    """
+    pular = 0
+    while pular < min(entregues, len(linhas)) and _mesma_posicao(chave(linhas[pular]), posicao):
+        pular += 1
+    return linhas[pular:]
+
+
+def cursor_seguinte(linhas, chave, posicao=None, entregues=0):
+    """
+    Gera o cursor após a última linha da página.
+
+    Args:
+        linhas (list): Linhas da página (não vazia)
+        chave (callable): linha -> valores de ordenação
+        posicao (list): Valores do cursor recebido (None na primeira página)
+        entregues (int): Linhas entregues antes nessa posição
+
+    Returns:
+        str: Cursor para a próxima página
+    """
+    ultima = list(chave(linhas[-1]))
+    repetidas = 0
+    for linha in reversed(linhas):
+        if not _mesma_posicao(chave(linha), ultima):
+            break
+        repetidas += 1
+    # Grupo de linhas iguais que atravessa mais de uma página
+    if repetidas == len(linhas) and posicao is not None and _mesma_posicao(posicao, ultima):
+        repetidas += entregues
+    return codificar_cursor(ultima, repetidas)
@@ -2,10 +2,12 @@
 import mysql.connector
 from mysql.connector import Error
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from ..config import MYSQL_CONFIG
-import json
-import hashlib
+from .PoolConexoesMySQL import PoolConexoesMySQL
+from .SerializacaoJSON import abrir_resultado
+from .CacheRFID import CacheRFID, construir_chave_cache
+from .ContagemSQL import executar_contagens_combinadas
 
 class GerenciadorEmprestimosRFID:
     """Gerenciador para operações com empréstimos de ferramentas RFID no MySQL com sistema de cache."""
@@ -26,61 +28,48 @@ class GerenciadorEmprestimosRFID:
         
         self.logger = logging.getLogger('controlerfid.gerenciador_emprestimos')
         self.config = MYSQL_CONFIG
+        self.pool = PoolConexoesMySQL.get_pool()
         
-        # Sistema de cache
-        self.cache = {}
-        self.cache_timeout = timedelta(minutes=5)  # Cache válido por 5 minutos
+        # Sistema de cache (LRU + TTL compartilhado, namespace próprio)
+        self.cache = CacheRFID.get_instance().namespace('emprestimos', ttl=300)  # 5 minutos
         
         self.logger.info("Gerenciador de Empréstimos RFID inicializado com cache")
     
-    def _get_cache_key(self, prefix, params=None):
-        """Gera uma chave única para o cache baseada nos parâmetros."""
-        if params:
-            params_str = json.dumps(params, sort_keys=True)
-            params_hash = hashlib.md5(params_str.encode()).hexdigest()
-            return f"{prefix}_{params_hash}"
-        return prefix
-    
     def _get_from_cache(self, key):
         """Obtém dados do cache se ainda válidos."""
-        if key in self.cache:
-            cached_data, timestamp = self.cache[key]
-            if datetime.now() - timestamp < self.cache_timeout:
-                self.logger.debug(f"Cache hit para key: {key}")
-                return cached_data
-            else:
-                del self.cache[key]
-                self.logger.debug(f"Cache expirado para key: {key}")
-        return None
+        cached_data = self.cache.obter(key)
+        if cached_data is not None:
+            self.logger.debug(f"Cache hit para key: {key}")
+        return cached_data
     
-    def _set_cache(self, key, data):
-        """Armazena dados no cache."""
-        self.cache[key] = (data, datetime.now())
+    def _set_cache(self, key, data, tags=None):
+        """Armazena dados no cache, com tags de dependência para invalidação seletiva."""
+        self.cache.definir(key, data, tags=tags)
         self.logger.debug(f"Dados armazenados no cache para key: {key}")
     
     def limpar_cache(self):
         """Limpa todo o cache."""
-        self.cache.clear()
-        self.logger.info("Cache limpo")
+        self.cache.limpar()
+    
+    def _invalidar_cache(self, *tags):
+        """Remove do cache (de todos os gerenciadores) as entradas com as tags informadas."""
+        removidas = self.cache.invalidar(*tags)
+        self.logger.debug(f"Cache invalidado para tags {tags}: {removidas} entradas")
+    
+    def _tag_lista(self, filtros):
+        """Tag de uma lista de empréstimos: por colaborador quando filtrada por ele."""
+        if filtros and filtros.get('id_colaborador'):
+            return f"emprestimos:colaborador:{filtros['id_colaborador']}"
+        return 'emprestimos'
+    
+    def _tags_escrita(self, id_colaborador):
+        """Tags invalidadas por uma escrita (empréstimo ou devolução) de um colaborador."""
+        return ('emprestimos', f"emprestimos:colaborador:{id_colaborador}", 'emprestimos:stats')
     
     def _get_connection(self):
-        """Cria e retorna uma conexão com o MySQL."""
+        """Obtém uma conexão do pool compartilhado (close() devolve ao pool)."""
         try:
-            connection_params = {
-                'host': self.config['host'],
-                'database': self.config['database'],
-                'user': self.config['user'],
-                'password': self.config['password'],
-                'connection_timeout': self.config['connection_timeout'],
-                'autocommit': True
-            }
-            
-            # Desabilita verificação SSL apenas para domínios tce.go.gov.br
-            if 'tce.go.gov.br' in self.config['host'].lower():
-                connection_params['ssl_disabled'] = True
-            
-            connection = mysql.connector.connect(**connection_params)
-            return connection
+            return self.pool.obter_conexao()
         except Error as e:
             self.logger.error(f"Erro ao conectar ao MySQL: {e}")
             raise
@@ -169,8 +158,8 @@ class GerenciadorEmprestimosRFID:
             
             id_emprestimo = cursor.lastrowid
             
-            # Limpar cache após inserção
-            self.limpar_cache()
+            # Invalidar listas e estatísticas afetadas (listas de outros colaboradores continuam válidas)
+            self._invalidar_cache(*self._tags_escrita(dados['id_colaborador']))
             
             return {
                 'success': True,
@@ -211,7 +200,7 @@ class GerenciadorEmprestimosRFID:
             
             # Verificar se o empréstimo existe e está ativo
             check_query = """
-                SELECT id, dataDevolucao 
+                SELECT id, dataDevolucao, id_colaborador 
                 FROM emprestimosRFID 
                 WHERE id = %s
             """
@@ -245,8 +234,8 @@ class GerenciadorEmprestimosRFID:
                 id_emprestimo
             ))
             
-            # Limpar cache após atualização
-            self.limpar_cache()
+            # Invalidar listas e estatísticas afetadas
+            self._invalidar_cache(*self._tags_escrita(emprestimo[2]))
             
             return {
                 'success': True,
@@ -288,14 +277,13 @@ class GerenciadorEmprestimosRFID:
             'limite': limite,
             'offset': offset
         }
-        cache_key = self._get_cache_key('emprestimos', cache_params)
+        cache_key = construir_chave_cache('emprestimos', cache_params)
         
         # Verificar cache primeiro
         if not force_refresh:
             cached_result = self._get_from_cache(cache_key)
             if cached_result:
-                cached_result['from_cache'] = True
-                return cached_result
+                return abrir_resultado(cached_result, from_cache=True)
         
         connection = None
         cursor = None
@@ -383,8 +371,10 @@ class GerenciadorEmprestimosRFID:
                 'from_cache': False
             }
             
-            # Armazenar no cache
-            self._set_cache(cache_key, result)
+            # Armazenar no cache: depende do escopo da lista e das etiquetas exibidas (descrições)
+            tags = [self._tag_lista(filtros)]
+            tags.extend(f"etiqueta:{emp['EtiquetaRFID_hex']}" for emp in emprestimos)
+            self._set_cache(cache_key, result, tags=tags)
             
             return result
             
@@ -440,19 +430,22 @@ class GerenciadorEmprestimosRFID:
         Obtém estatísticas gerais dos empréstimos.
         
         Args:
-            force_refresh (bool): Força atualização ignorando o cache
+            force_refresh (bool): Força atualização (ignorado se o valor em cache tem poucos segundos)
             
         Returns:
             dict: Estatísticas dos empréstimos
         """
         cache_key = 'estatisticas_emprestimos'
         
-        if not force_refresh:
-            cached_result = self._get_from_cache(cache_key)
-            if cached_result:
-                cached_result['from_cache'] = True
-                return cached_result
-        
+        # Stale-while-revalidate: expirado é servido na hora (stale=True) e recalculado em segundo plano
+        return self.cache.obter_swr(
+            cache_key,
+            lambda: self._calcular_estatisticas_emprestimos(cache_key),
+            force_refresh=force_refresh
+        )
+    
+    def _calcular_estatisticas_emprestimos(self, cache_key):
+        """Consulta as estatísticas dos empréstimos e armazena o resultado no cache."""
         connection = None
         cursor = None
         
@@ -460,13 +453,13 @@ class GerenciadorEmprestimosRFID:
             connection = self._get_connection()
             cursor = connection.cursor(dictionary=True)
             
-            # Total de empréstimos
-            cursor.execute("SELECT COUNT(*) as total FROM emprestimosRFID")
-            total_emprestimos = cursor.fetchone()['total']
-            
-            # Empréstimos ativos
-            cursor.execute("SELECT COUNT(*) as ativos FROM emprestimosRFID WHERE dataDevolucao IS NULL")
-            emprestimos_ativos = cursor.fetchone()['ativos']
+            # Total de empréstimos e ativos em uma única varredura
+            contagens = executar_contagens_combinadas(cursor, 'emprestimosRFID', {
+                'total': None,
+                'ativos': 'dataDevolucao IS NULL'
+            })
+            total_emprestimos = contagens['total']
+            emprestimos_ativos = contagens['ativos']
             
             # Ferramentas mais emprestadas
             query_top_ferramentas = """
@@ -511,7 +504,9 @@ class GerenciadorEmprestimosRFID:
             }
             
             # Armazenar no cache
-            self._set_cache(cache_key, result)
+            tags = ['emprestimos:stats']
+            tags.extend(f"etiqueta:{item['EtiquetaRFID_hex']}" for item in top_ferramentas)
+            self._set_cache(cache_key, result, tags=tags)
             
             return result
             
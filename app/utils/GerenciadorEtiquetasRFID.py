@@ -2,10 +2,12 @@
 import mysql.connector
 from mysql.connector import Error
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from ..config import MYSQL_CONFIG
-import json
-import hashlib
+from .PoolConexoesMySQL import PoolConexoesMySQL
+from .SerializacaoJSON import abrir_resultado
+from .CacheRFID import CacheRFID, construir_chave_cache
+from .ContagemSQL import executar_contagens_combinadas
 import base64
 
 class GerenciadorEtiquetasRFID:
@@ -34,63 +36,38 @@ class GerenciadorEtiquetasRFID:
         
         self.logger = logging.getLogger('controlerfid.gerenciador')
         self.config = MYSQL_CONFIG
+        self.pool = PoolConexoesMySQL.get_pool()
         
-        # Sistema de cache
-        self.cache = {}
-        self.cache_timeout = timedelta(minutes=5)  # Cache válido por 5 minutos
+        # Sistema de cache (LRU + TTL compartilhado, namespace próprio)
+        self.cache = CacheRFID.get_instance().namespace('etiquetas', ttl=300)  # 5 minutos
         
         self.logger.info("Gerenciador de Etiquetas RFID inicializado com cache")
     
-    def _get_cache_key(self, prefix, params=None):
-        """Gera uma chave única para o cache baseada nos parâmetros."""
-        if params:
-            # Criar hash dos parâmetros para a chave
-            params_str = json.dumps(params, sort_keys=True)
-            params_hash = hashlib.md5(params_str.encode()).hexdigest()
-            return f"{prefix}_{params_hash}"
-        return prefix
-    
     def _get_from_cache(self, key):
         """Obtém dados do cache se ainda válidos."""
-        if key in self.cache:
-            cached_data, timestamp = self.cache[key]
-            if datetime.now() - timestamp < self.cache_timeout:
-                self.logger.debug(f"Cache hit para key: {key}")
-                return cached_data
-            else:
-                # Cache expirado, remover
-                del self.cache[key]
-                self.logger.debug(f"Cache expirado para key: {key}")
-        return None
+        cached_data = self.cache.obter(key)
+        if cached_data is not None:
+            self.logger.debug(f"Cache hit para key: {key}")
+        return cached_data
     
-    def _set_cache(self, key, data):
-        """Armazena dados no cache."""
-        self.cache[key] = (data, datetime.now())
+    def _set_cache(self, key, data, tags=None):
+        """Armazena dados no cache, com tags de dependência para invalidação seletiva."""
+        self.cache.definir(key, data, tags=tags)
         self.logger.debug(f"Dados armazenados no cache para key: {key}")
     
     def limpar_cache(self):
         """Limpa todo o cache."""
-        self.cache.clear()
-        self.logger.info("Cache limpo")
+        self.cache.limpar()
+    
+    def _invalidar_cache(self, *tags):
+        """Remove do cache (de todos os gerenciadores) as entradas com as tags informadas."""
+        removidas = self.cache.invalidar(*tags)
+        self.logger.debug(f"Cache invalidado para tags {tags}: {removidas} entradas")
     
     def _get_connection(self):
-        """Cria e retorna uma conexão com o MySQL."""
+        """Obtém uma conexão do pool compartilhado (close() devolve ao pool)."""
         try:
-            connection_params = {
-                'host': self.config['host'],
-                'database': self.config['database'],
-                'user': self.config['user'],
-                'password': self.config['password'],
-                'connection_timeout': self.config['connection_timeout'],
-                'autocommit': True
-            }
-            
-            # Desabilita verificação SSL apenas para domínios tce.go.gov.br
-            if 'tce.go.gov.br' in self.config['host'].lower():
-                connection_params['ssl_disabled'] = True
-            
-            connection = mysql.connector.connect(**connection_params)
-            return connection
+            return self.pool.obter_conexao()
         except Error as e:
             self.logger.error(f"Erro ao conectar ao MySQL: {e}")
             raise
@@ -196,8 +173,8 @@ class GerenciadorEtiquetasRFID:
             cursor.execute(insert_query, valores)
             id_etiqueta = cursor.lastrowid
             
-            # Limpar cache após inserção
-            self.limpar_cache()
+            # Invalidar listas, estatísticas e quem exibe esta etiqueta (ex: empréstimos)
+            self._invalidar_cache('etiquetas', 'etiquetas:stats', f"etiqueta:{dados['EtiquetaRFID_hex']}")
             
             return {
                 'success': True,
@@ -217,6 +194,37 @@ class GerenciadorEtiquetasRFID:
             if connection:
                 connection.close()
     
+    def _adicionar_status(self, etiqueta):
+        """
+        Adiciona status, ativa e data_destruicao_formatada a partir de Destruida.
+
+        Feito antes de o resultado ir para o cache, para que a rota devolva
+        o retrato sem reconstruir as linhas.
+
+        Args:
+            etiqueta (dict): Linha de etiquetasRFID (alterada no lugar)
+        """
+        destruida = etiqueta.get('Destruida')
+        if destruida is None:
+            etiqueta['status'] = 'ativa'
+            etiqueta['ativa'] = True
+            etiqueta['data_destruicao_formatada'] = None
+            return
+
+        etiqueta['status'] = 'destruida'
+        etiqueta['ativa'] = False
+        formatada = str(destruida)
+        if hasattr(destruida, 'strftime'):
+            formatada = destruida.strftime('%d/%m/%Y às %H:%M')
+        elif isinstance(destruida, str):
+            for fmt in ['%Y-%m-%d %H:%M:%S', '%a, %d %b %Y %H:%M:%S GMT']:
+                try:
+                    formatada = datetime.strptime(destruida, fmt).strftime('%d/%m/%Y às %H:%M')
+                    break
+                except ValueError:
+                    continue
+        etiqueta['data_destruicao_formatada'] = formatada
+
     def obter_etiquetas(self, filtros=None, limite=100, offset=0, force_refresh=False):
         """
         Obtém lista de etiquetas com filtros opcionais.
@@ -236,15 +244,14 @@ class GerenciadorEtiquetasRFID:
             'limite': limite,
             'offset': offset
         }
-        cache_key = self._get_cache_key('etiquetas', cache_params)
+        cache_key = construir_chave_cache('etiquetas', cache_params)
         
         # Verificar cache primeiro (a menos que force_refresh seja True)
         # IMPORTANTE: Não usar cache quando há filtro de status para evitar inconsistências
         if not force_refresh and not (filtros and 'destruida' in filtros):
             cached_result = self._get_from_cache(cache_key)
             if cached_result:
-                cached_result['from_cache'] = True
-                return cached_result
+                return abrir_resultado(cached_result, from_cache=True)
         
         total = 0
         etiquetas = []
@@ -272,34 +279,18 @@ class GerenciadorEtiquetasRFID:
             
             where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
             
-            # PRIMEIRA CONEXÃO: Obter o total
-            connection1 = None
-            cursor1 = None
+            # Uma única conexão para o total e a página
+            connection = None
+            cursor = None
             try:
-                connection1 = self._get_connection()
-                cursor1 = connection1.cursor(dictionary=True)
+                connection = self._get_connection()
+                cursor = connection.cursor(dictionary=True)
                 
                 count_query = f"SELECT COUNT(*) as total FROM etiquetasRFID WHERE {where_clause}"
-                cursor1.execute(count_query, params)
-                result = cursor1.fetchone()
+                cursor.execute(count_query, params)
+                result = cursor.fetchone()
                 total = result['total'] if result and 'total' in result else 0
                 
-            except Exception as e:
-                self.logger.error(f"Erro ao contar registros: {e}")
-                raise
-            finally:
-                if cursor1:
-                    cursor1.close()
-                if connection1:
-                    connection1.close()
-            
-            # SEGUNDA CONEXÃO: Obter os registros
-            connection2 = None
-            cursor2 = None
-            try:
-                connection2 = self._get_connection()
-                cursor2 = connection2.cursor(dictionary=True)
-                
                 data_query = f"""
                     SELECT 
                         id_listaEtiquetasRFID,
@@ -318,17 +309,19 @@ class GerenciadorEtiquetasRFID:
                 query_params = params.copy()
                 query_params.extend([limite, offset])
                 
-                cursor2.execute(data_query, query_params)
-                etiquetas = cursor2.fetchall()
+                cursor.execute(data_query, query_params)
+                etiquetas = cursor.fetchall()
+                for etiqueta in etiquetas:
+                    self._adicionar_status(etiqueta)
                 
             except Exception as e:
                 self.logger.error(f"Erro ao buscar registros: {e}")
                 raise
             finally:
-                if cursor2:
-                    cursor2.close()
-                if connection2:
-                    connection2.close()
+                if cursor:
+                    cursor.close()
+                if connection:
+                    connection.close()
             
             result = {
                 'success': True,
@@ -340,7 +333,7 @@ class GerenciadorEtiquetasRFID:
             }
             
             # Armazenar no cache
-            self._set_cache(cache_key, result)
+            self._set_cache(cache_key, result, tags=['etiquetas'])
             
             return result
             
@@ -365,7 +358,7 @@ class GerenciadorEtiquetasRFID:
             dict: Dados da etiqueta ou None
         """
         # Verificar cache primeiro
-        cache_key = self._get_cache_key(f'etiqueta_{id_etiqueta}')
+        cache_key = construir_chave_cache(f'etiqueta_{id_etiqueta}')
         cached_result = self._get_from_cache(cache_key)
         if cached_result:
             return cached_result
@@ -407,7 +400,7 @@ class GerenciadorEtiquetasRFID:
             
             # Armazenar no cache se encontrado
             if etiqueta:
-                self._set_cache(cache_key, etiqueta)
+                self._set_cache(cache_key, etiqueta, tags=[f"etiqueta:{etiqueta['EtiquetaRFID_hex']}"])
             
             return etiqueta
             
@@ -438,6 +431,14 @@ class GerenciadorEtiquetasRFID:
             connection = self._get_connection()
             cursor = connection.cursor()
             
+            # Código atual da etiqueta (para invalidar o cache de quem a exibe)
+            cursor.execute(
+                "SELECT EtiquetaRFID_hex FROM etiquetasRFID WHERE id_listaEtiquetasRFID = %s",
+                (id_etiqueta,)
+            )
+            linha = cursor.fetchone()
+            etiqueta_hex_atual = linha[0] if linha else None
+            
             # Construir query de atualização
             campos = []
             valores = []
@@ -562,8 +563,13 @@ class GerenciadorEtiquetasRFID:
                     'error': 'Etiqueta não encontrada'
                 }
             
-            # Limpar cache após atualização
-            self.limpar_cache()
+            # Invalidar só o que depende desta etiqueta
+            tags = ['etiquetas', f"etiqueta:{etiqueta_hex_atual}"]
+            if dados.get('EtiquetaRFID_hex'):
+                tags.append(f"etiqueta:{dados['EtiquetaRFID_hex']}")
+            if 'destruida' in dados or 'Destruida' in dados:
+                tags.append('etiquetas:stats')
+            self._invalidar_cache(*tags)
             
             return {
                 'success': True,
@@ -615,57 +621,35 @@ class GerenciadorEtiquetasRFID:
         Obtém estatísticas gerais das etiquetas.
         
         Args:
-            force_refresh (bool): Força atualização ignorando o cache
+            force_refresh (bool): Força atualização (ignorado se o valor em cache tem poucos segundos)
             
         Returns:
             dict: Estatísticas
         """
         cache_key = 'estatisticas'
         
-        # Verificar cache primeiro
-        if not force_refresh:
-            cached_result = self._get_from_cache(cache_key)
-            if cached_result:
-                cached_result['from_cache'] = True
-                return cached_result
-        
+        # Stale-while-revalidate: expirado é servido na hora (stale=True) e recalculado em segundo plano
+        return self.cache.obter_swr(
+            cache_key,
+            lambda: self._calcular_estatisticas(cache_key),
+            force_refresh=force_refresh
+        )
+    
+    def _calcular_estatisticas(self, cache_key):
+        """Consulta as estatísticas das etiquetas e armazena o resultado no cache."""
+        connection = None
+        cursor = None
         try:
-            total = 0
-            destruidas = 0
+            connection = self._get_connection()
+            cursor = connection.cursor(dictionary=True)
             
-            # Primeira conexão: total de etiquetas
-            connection1 = None
-            cursor1 = None
-            try:
-                connection1 = self._get_connection()
-                cursor1 = connection1.cursor(dictionary=True)
-                
-                cursor1.execute("SELECT COUNT(*) as total FROM etiquetasRFID")
-                result = cursor1.fetchone()
-                total = result['total'] if result and 'total' in result else 0
-                
-            finally:
-                if cursor1:
-                    cursor1.close()
-                if connection1:
-                    connection1.close()
-            
-            # Segunda conexão: total de destruídas
-            connection2 = None
-            cursor2 = None
-            try:
-                connection2 = self._get_connection()
-                cursor2 = connection2.cursor(dictionary=True)
-                
-                cursor2.execute("SELECT COUNT(*) as destruidas FROM etiquetasRFID WHERE Destruida IS NOT NULL")
-                result = cursor2.fetchone()
-                destruidas = result['destruidas'] if result and 'destruidas' in result else 0
-                
-            finally:
-                if cursor2:
-                    cursor2.close()
-                if connection2:
-                    connection2.close()
+            # Total e destruídas em uma única varredura
+            contagens = executar_contagens_combinadas(cursor, 'etiquetasRFID', {
+                'total': None,
+                'destruidas': 'Destruida IS NOT NULL'
+            })
+            total = contagens['total']
+            destruidas = contagens['destruidas']
             
             # Calcular ativas
             ativas = total - destruidas
@@ -682,7 +666,7 @@ class GerenciadorEtiquetasRFID:
             }
             
             # Armazenar no cache
-            self._set_cache(cache_key, result)
+            self._set_cache(cache_key, result, tags=['etiquetas:stats'])
             
             return result
             
@@ -698,4 +682,9 @@ class GerenciadorEtiquetasRFID:
                     'percentual_ativas': 0
                 },
                 'from_cache': False
-            }
\ No newline at end of file
+            }
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
@@ -4,18 +4,35 @@ from mysql.connector import Error
 import logging
 from datetime import datetime, timedelta
 from ..config import MYSQL_CONFIG
-import json
-import hashlib
+from .PoolConexoesMySQL import PoolConexoesMySQL
+from .SerializacaoJSON import abrir_resultado
+from .CacheRFID import CacheRFID, construir_chave_cache
 import csv
+import codecs
 import io
+import time
 from .GerenciadorEtiquetasRFID import GerenciadorEtiquetasRFID
 from .GerenciadorLeitoresRFID import GerenciadorLeitoresRFID
+from .GerenciadorUltimasLeiturasRFID import GerenciadorUltimasLeiturasRFID
+from .GerenciadorJobsRFID import JobCancelado
 
 class GerenciadorInventariosRFID:
     """Gerenciador para operações de inventário RFID."""
     
     _instance = None
     
+    # Linhas por INSERT multi-VALUES na inserção em lotes
+    TAMANHO_LOTE_INSERCAO = 1000
+    
+    # EPCs enviados ao MySQL por vez no processamento de CSV
+    TAMANHO_LOTE_CSV = 5000
+    
+    # Observação acrescentada às etiquetas localizadas pelo leitor móvel (CSV)
+    OBSERVACAO_MOBILE = (
+        "CONCAT({coluna}, ' | Localizado via leitor móvel em: ', "
+        "DATE_FORMAT(NOW(), '%%d/%%m/%%Y %%H:%%i'))"
+    )
+    
     @classmethod
     def get_instance(cls):
         """Retorna a instância única do gerenciador (Singleton)."""
@@ -30,65 +47,43 @@ class GerenciadorInventariosRFID:
         
         self.logger = logging.getLogger('controlerfid.inventarios')
         self.config = MYSQL_CONFIG
+        self.pool = PoolConexoesMySQL.get_pool()
         
-        # Sistema de cache
-        self.cache = {}
-        self.cache_timeout = timedelta(minutes=5)
+        # Sistema de cache (LRU + TTL compartilhado, namespace próprio)
+        self.cache = CacheRFID.get_instance().namespace('inventarios', ttl=300)  # 5 minutos
         
         # Referências aos outros gerenciadores
         self.gerenciador_etiquetas = GerenciadorEtiquetasRFID.get_instance()
         self.gerenciador_leitores = GerenciadorLeitoresRFID.get_instance()
+        self.ultimas_leituras = GerenciadorUltimasLeiturasRFID.get_instance()
         
         self.logger.info("Gerenciador de Inventários RFID inicializado")
     
-    def _get_cache_key(self, prefix, params=None):
-        """Gera uma chave única para o cache baseada nos parâmetros."""
-        if params:
-            params_str = json.dumps(params, sort_keys=True)
-            params_hash = hashlib.md5(params_str.encode()).hexdigest()
-            return f"{prefix}_{params_hash}"
-        return prefix
-    
     def _get_from_cache(self, key):
         """Obtém dados do cache se ainda válidos."""
-        if key in self.cache:
-            cached_data, timestamp = self.cache[key]
-            if datetime.now() - timestamp < self.cache_timeout:
-                self.logger.debug(f"Cache hit para key: {key}")
-                return cached_data
-            else:
-                del self.cache[key]
-                self.logger.debug(f"Cache expirado para key: {key}")
-        return None
+        cached_data = self.cache.obter(key)
+        if cached_data is not None:
+            self.logger.debug(f"Cache hit para key: {key}")
+        return cached_data
     
-    def _set_cache(self, key, data):
-        """Armazena dados no cache."""
-        self.cache[key] = (data, datetime.now())
+    def _set_cache(self, key, data, tags=None):
+        """Armazena dados no cache, com tags de dependência para invalidação seletiva."""
+        self.cache.definir(key, data, tags=tags)
         self.logger.debug(f"Dados armazenados no cache para key: {key}")
     
     def limpar_cache(self):
         """Limpa todo o cache."""
-        self.cache.clear()
-        self.logger.info("Cache limpo")
+        self.cache.limpar()
+    
+    def _invalidar_cache(self, *tags):
+        """Remove do cache (de todos os gerenciadores) as entradas com as tags informadas."""
+        removidas = self.cache.invalidar(*tags)
+        self.logger.debug(f"Cache invalidado para tags {tags}: {removidas} entradas")
     
     def _get_connection(self):
-        """Cria e retorna uma conexão com o MySQL."""
+        """Obtém uma conexão do pool compartilhado (close() devolve ao pool)."""
         try:
-            connection_params = {
-                'host': self.config['host'],
-                'database': self.config['database'],
-                'user': self.config['user'],
-                'password': self.config['password'],
-                'connection_timeout': self.config['connection_timeout'],
-                'autocommit': True
-            }
-            
-            # Desabilita verificação SSL apenas para domínios tce.go.gov.br
-            if 'tce.go.gov.br' in self.config['host'].lower():
-                connection_params['ssl_disabled'] = True
-            
-            connection = mysql.connector.connect(**connection_params)
-            return connection
+            return self.pool.obter_conexao()
         except Error as e:
             self.logger.error(f"Erro ao conectar ao MySQL: {e}")
             raise
@@ -122,7 +117,7 @@ class GerenciadorInventariosRFID:
             if connection:
                 connection.close()
     
-    def criar_inventario(self, dados):
+    def criar_inventario(self, dados, callback_progresso=None):
         """
         Cria um novo inventário.
         
@@ -131,6 +126,9 @@ class GerenciadorInventariosRFID:
                 - dataInventario: Data do inventário (opcional, padrão: agora)
                 - id_colaborador: ID do colaborador responsável (obrigatório)
                 - Observacao: Observações sobre o inventário (opcional)
+            callback_progresso (callable): Chamado ao fim de cada fase com um dict
+                (fase, id_inventario, total_etiquetas, ...); pode levantar
+                JobCancelado, e nesse caso nada do inventário é gravado
                 
         Returns:
             dict: Resultado da operação com ID do novo inventário
@@ -156,68 +154,78 @@ class GerenciadorInventariosRFID:
             dataInventario = dados.get('dataInventario', datetime.now())
             observacao = dados.get('Observacao', '')
             
-            # Obter todas as etiquetas ativas
-            etiquetas_result = self.gerenciador_etiquetas.obter_etiquetas(
-                filtros={'destruida': 0},
-                limite=10000  # Buscar todas
-            )
+            inicio = time.perf_counter()
+            tempos = {}
             
-            if not etiquetas_result['success']:
-                return {
-                    'success': False,
-                    'error': 'Erro ao obter etiquetas ativas'
-                }
+            # Semeadura e leituras históricas em uma transação: um cancelamento
+            # (JobCancelado no callback) desfaz tudo antes do commit
+            connection.start_transaction()
             
-            etiquetas = etiquetas_result['etiquetas']
-            total_etiquetas = len(etiquetas)
+            # Semear o inventário com todas as etiquetas ativas (operação em conjunto)
+            total_etiquetas = self._semear_inventario(
+                connection, cursor, id_inventario, dataInventario, dados['id_colaborador'], observacao
+            )
+            tempos['semeadura_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
             
             if total_etiquetas == 0:
+                connection.rollback()
                 return {
                     'success': False,
                     'error': 'Nenhuma etiqueta ativa encontrada para inventariar'
                 }
             
-            # Inserir cada etiqueta como uma linha do inventário
-            insert_query = """
-                INSERT INTO inventariosRFID 
-                (idInventarioRFID, dataInventario, id_colaborador, EtiquetaRFID_hex, 
-                 Status, Observacao, CodigoLeitor)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            # Inserir todas as etiquetas com status inicial
-            for etiqueta in etiquetas:
-                valores = (
-                    id_inventario,
-                    dataInventario,
-                    dados['id_colaborador'],
-                    etiqueta['EtiquetaRFID_hex'],
-                    'Não localizado',
-                    observacao,
-                    None  # CodigoLeitor inicial vazio
-                )
-                cursor.execute(insert_query, valores)
-            
-            connection.commit()  # COMMIT após inserir todas as etiquetas
+            if callback_progresso:
+                callback_progresso({
+                    'fase': 'leituras_historicas',
+                    'id_inventario': id_inventario,
+                    'total_etiquetas': total_etiquetas,
+                    'tempos': dict(tempos)
+                })
             
             # Processar leituras dos últimos 6 meses
+            inicio_historico = time.perf_counter()
             localizados = self._processar_leituras_historicas(id_inventario, connection, cursor)
+            tempos['leituras_historicas_ms'] = round((time.perf_counter() - inicio_historico) * 1000, 2)
+            tempos['total_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+            
+            # Último ponto de cancelamento antes de gravar
+            if callback_progresso:
+                callback_progresso({
+                    'fase': 'gravando',
+                    'id_inventario': id_inventario,
+                    'total_etiquetas': total_etiquetas,
+                    'etiquetas_localizadas': localizados,
+                    'tempos': dict(tempos)
+                })
+            
+            connection.commit()
+            
+            self.logger.info(
+                f"Inventário {id_inventario} criado: {total_etiquetas} etiquetas, "
+                f"{localizados} localizadas, tempos: {tempos}"
+            )
             
-            connection.commit()  # COMMIT após processar leituras históricas
-            
-            # Limpar cache
-            self.limpar_cache()
+            # Um inventário novo muda a composição das listas
+            self._invalidar_cache('inventarios')
             
             return {
                 'success': True,
                 'message': 'Inventário criado com sucesso',
                 'id_inventario': id_inventario,
                 'total_etiquetas': total_etiquetas,
-                'etiquetas_localizadas': localizados
+                'etiquetas_localizadas': localizados,
+                'tempos': tempos
             }
             
+        except JobCancelado:
+            self.logger.info("Criação de inventário cancelada, transação desfeita")
+            if connection and connection.in_transaction:
+                connection.rollback()
+            raise
         except Error as e:
             self.logger.error(f"Erro ao criar inventário: {e}")
+            if connection and connection.in_transaction:
+                connection.rollback()
             return {
                 'success': False,
                 'error': str(e)
@@ -228,10 +236,79 @@ class GerenciadorInventariosRFID:
             if connection:
                 connection.close()
     
+    def _semear_inventario(self, connection, cursor, id_inventario, data_inventario, id_colaborador, observacao):
+        """
+        Insere todas as etiquetas ativas no inventário com status 'Não localizado'.
+        
+        Usa um único INSERT ... SELECT; se o servidor recusar, cai para inserções
+        em lotes de múltiplas linhas (executemany) dentro de uma transação
+        (a do chamador, se já houver uma aberta).
+        
+        Args:
+            connection: Conexão MySQL
+            cursor: Cursor MySQL da conexão
+            id_inventario (int): ID do inventário
+            data_inventario: Data do inventário
+            id_colaborador: ID do colaborador responsável
+            observacao (str): Observação inicial das linhas
+            
+        Returns:
+            int: Número de etiquetas inseridas
+        """
+        try:
+            cursor.execute("""
+                INSERT INTO inventariosRFID 
+                (idInventarioRFID, dataInventario, id_colaborador, EtiquetaRFID_hex, 
+                 Status, Observacao, CodigoLeitor)
+                SELECT %s, %s, %s, EtiquetaRFID_hex, 'Não localizado', %s, NULL
+                FROM etiquetasRFID
+                WHERE Destruida IS NULL
+            """, (id_inventario, data_inventario, id_colaborador, observacao))
+            return cursor.rowcount
+        except Error as e:
+            self.logger.warning(f"INSERT ... SELECT falhou ({e}), usando inserção em lotes")
+        
+        cursor.execute("SELECT EtiquetaRFID_hex FROM etiquetasRFID WHERE Destruida IS NULL")
+        etiquetas = [linha[0] if not isinstance(linha, dict) else linha['EtiquetaRFID_hex']
+                     for linha in cursor.fetchall()]
+        
+        insert_query = """
+            INSERT INTO inventariosRFID 
+            (idInventarioRFID, dataInventario, id_colaborador, EtiquetaRFID_hex, 
+             Status, Observacao, CodigoLeitor)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+        
+        propria = not connection.in_transaction
+        if propria:
+            connection.start_transaction()
+        try:
+            # executemany converte cada lote em um único INSERT com múltiplos VALUES
+            for i in range(0, len(etiquetas), self.TAMANHO_LOTE_INSERCAO):
+                lote = etiquetas[i:i + self.TAMANHO_LOTE_INSERCAO]
+                cursor.executemany(insert_query, [
+                    (id_inventario, data_inventario, id_colaborador, etiqueta,
+                     'Não localizado', observacao, None)
+                    for etiqueta in lote
+                ])
+            if propria:
+                connection.commit()
+        except Error:
+            if propria:
+                connection.rollback()
+            raise
+        
+        return len(etiquetas)
+    
     def _processar_leituras_historicas(self, id_inventario, connection=None, cursor=None):
         """
         Processa leituras históricas dos últimos 6 meses para marcar itens como localizados.
         
+        O cruzamento usa a materialização de últimas leituras (uma linha por
+        etiqueta, atualizada de forma incremental) em vez de agregar 6 meses de
+        leitoresRFID a cada inventário. Se a materialização não estiver
+        disponível, volta para a agregação direta.
+        
         Args:
             id_inventario (int): ID do inventário
             connection: Conexão MySQL (opcional, reutiliza se fornecida)
@@ -257,27 +334,44 @@ class GerenciadorInventariosRFID:
             # Data de 6 meses atrás
             data_inicio = datetime.now() - timedelta(days=180)
             
-            # Buscar etiquetas com leituras nos últimos 6 meses que fazem parte do inventário
-            query_update = """
-                UPDATE inventariosRFID i
-                INNER JOIN (
-                    SELECT DISTINCT 
-                        l.EtiquetaRFID_hex,
-                        l.CodigoLeitor,
-                        MAX(l.Horario) as UltimaLeitura
-                    FROM leitoresRFID l
-                    WHERE l.Horario >= %s AND l.RSSI != 0
-                    GROUP BY l.EtiquetaRFID_hex, l.CodigoLeitor
-                ) AS leituras ON i.EtiquetaRFID_hex = leituras.EtiquetaRFID_hex
-                SET 
-                    i.Status = 'Localizado',
-                    i.CodigoLeitor = leituras.CodigoLeitor,
-                    i.Observacao = CONCAT(i.Observacao, ' | Localizado no BD em: ', 
-                                         DATE_FORMAT(leituras.UltimaLeitura, '%%d/%%m/%%Y %%H:%%i'))
-                WHERE i.idInventarioRFID = %s AND i.Status = 'Não localizado'
-            """
+            # Incorpora as leituras desde a última atualização (só o delta)
+            atualizacao = self.ultimas_leituras.atualizar(forcar=True, connection=connection, cursor=cursor)
+            
+            if atualizacao['success']:
+                query_update = """
+                    UPDATE inventariosRFID i
+                    INNER JOIN ultimasLeiturasRFID u ON i.EtiquetaRFID_hex = u.EtiquetaRFID_hex
+                    SET 
+                        i.Status = 'Localizado',
+                        i.CodigoLeitor = u.CodigoLeitor,
+                        i.Observacao = CONCAT(i.Observacao, ' | Localizado no BD em: ', 
+                                             DATE_FORMAT(u.Horario, '%%d/%%m/%%Y %%H:%%i'))
+                    WHERE i.idInventarioRFID = %s AND i.Status = 'Não localizado'
+                      AND u.Horario >= %s
+                """
+                cursor.execute(query_update, (id_inventario, data_inicio))
+            else:
+                self.logger.warning("Materialização de últimas leituras indisponível, agregando leitoresRFID")
+                query_update = """
+                    UPDATE inventariosRFID i
+                    INNER JOIN (
+                        SELECT DISTINCT 
+                            l.EtiquetaRFID_hex,
+                            l.CodigoLeitor,
+                            MAX(l.Horario) as UltimaLeitura
+                        FROM leitoresRFID l
+                        WHERE l.Horario >= %s AND l.RSSI != 0
+                        GROUP BY l.EtiquetaRFID_hex, l.CodigoLeitor
+                    ) AS leituras ON i.EtiquetaRFID_hex = leituras.EtiquetaRFID_hex
+                    SET 
+                        i.Status = 'Localizado',
+                        i.CodigoLeitor = leituras.CodigoLeitor,
+                        i.Observacao = CONCAT(i.Observacao, ' | Localizado no BD em: ', 
+                                             DATE_FORMAT(leituras.UltimaLeitura, '%%d/%%m/%%Y %%H:%%i'))
+                    WHERE i.idInventarioRFID = %s AND i.Status = 'Não localizado'
+                """
+                cursor.execute(query_update, (data_inicio, id_inventario))
             
-            cursor.execute(query_update, (data_inicio, id_inventario))
             localizados = cursor.rowcount
             
             # Se criou a conexão aqui, faz commit
@@ -299,13 +393,19 @@ class GerenciadorInventariosRFID:
             if fechar_conexao and connection:
                 connection.close()
     
-    def processar_csv_leituras(self, id_inventario, arquivo_csv):
+    def processar_csv_leituras(self, id_inventario, arquivo_csv, callback_progresso=None):
         """
         Processa arquivo CSV com leituras de leitor móvel.
         
+        O arquivo é lido em fluxo (decodificação incremental) e enviado ao MySQL
+        em lotes de TAMANHO_LOTE_CSV EPCs: a memória usada depende do lote e da
+        quantidade de EPCs distintos, não do tamanho do arquivo.
+        
         Args:
             id_inventario (int): ID do inventário
-            arquivo_csv: Arquivo CSV ou string com conteúdo CSV
+            arquivo_csv: String com conteúdo CSV ou fluxo binário/texto (arquivo, request.stream)
+            callback_progresso (callable): Chamado após cada lote com um dict
+                (linhas_processadas, etiquetas_atualizadas, lotes)
             
         Returns:
             dict: Resultado do processamento
@@ -315,6 +415,7 @@ class GerenciadorInventariosRFID:
         etiquetas_processadas = 0
         etiquetas_atualizadas = 0
         erros = []
+        lotes = 0
         
         try:
             connection = self._get_connection()
@@ -342,70 +443,67 @@ class GerenciadorInventariosRFID:
                     'error': 'Inventário já foi finalizado'
                 }
             
-            # Processar CSV
+            # Processar CSV em fluxo
             if isinstance(arquivo_csv, str):
-                csv_file = io.StringIO(arquivo_csv)
+                linhas = io.StringIO(arquivo_csv)
             else:
-                # Se for um arquivo, decodificar para string
-                csv_content = arquivo_csv.read()
-                if isinstance(csv_content, bytes):
-                    csv_content = csv_content.decode('utf-8-sig')  # Remove BOM se presente
-                csv_file = io.StringIO(csv_content)
+                linhas = self._ler_linhas_csv(arquivo_csv)
             
-            reader = csv.DictReader(csv_file)
+            reader = csv.DictReader(linhas)
             
             # Verificar se tem coluna EPC
-            if 'EPC' not in reader.fieldnames:
+            if not reader.fieldnames or 'EPC' not in reader.fieldnames:
                 return {
                     'success': False,
                     'error': 'Arquivo CSV deve conter coluna "EPC"'
                 }
             
-            # Processar cada linha
+            # EPCs já vistos (em maiúsculas): repetições são ignoradas, como antes
+            vistos = set()
+            lote = []
+            
+            def processar_lote():
+                nonlocal etiquetas_atualizadas, lotes
+                # Atualização e diagnóstico em conjunto (duas instruções em vez de uma por EPC)
+                atualizadas, nao_encontrados = self._reconciliar_epcs(cursor, id_inventario, lote)
+                etiquetas_atualizadas += atualizadas
+                erros.extend(f"EPC {epc}: não encontrado no inventário" for epc in nao_encontrados)
+                lotes += 1
+                lote.clear()
+                
+                if callback_progresso:
+                    callback_progresso({
+                        'linhas_processadas': etiquetas_processadas,
+                        'etiquetas_atualizadas': etiquetas_atualizadas,
+                        'lotes': lotes
+                    })
+            
             for row in reader:
                 etiquetas_processadas += 1
-                epc = row.get('EPC', '').strip()
+                epc = (row.get('EPC') or '').strip()
                 
                 if not epc:
                     erros.append(f"Linha {etiquetas_processadas}: EPC vazio")
                     continue
                 
-                # Atualizar etiqueta se existir no inventário e ainda não foi localizada
-                update_query = """
-                    UPDATE inventariosRFID
-                    SET Status = 'Localizado',
-                        CodigoLeitor = 'MOBILE',
-                        Observacao = CONCAT(Observacao, ' | Localizado via leitor móvel em: ', 
-                                          DATE_FORMAT(NOW(), '%%d/%%m/%%Y %%H:%%i'))
-                    WHERE idInventarioRFID = %s 
-                        AND EtiquetaRFID_hex = %s 
-                        AND Status = 'Não localizado'
-                """
-                
-                cursor.execute(update_query, (id_inventario, epc))
+                chave = epc.upper()
+                if chave in vistos:
+                    continue
+                vistos.add(chave)
+                lote.append(epc)
                 
-                if cursor.rowcount > 0:
-                    etiquetas_atualizadas += 1
-                else:
-                    # Verificar se a etiqueta existe no inventário
-                    check_etiqueta = """
-                        SELECT Status 
-                        FROM inventariosRFID 
-                        WHERE idInventarioRFID = %s AND EtiquetaRFID_hex = %s
-                    """
-                    cursor.execute(check_etiqueta, (id_inventario, epc))
-                    result = cursor.fetchone()
-                    
-                    if not result:
-                        erros.append(f"EPC {epc}: não encontrado no inventário")
-                    elif result[0] == 'Localizado':
-                        # Etiqueta já foi localizada anteriormente
-                        pass
+                if len(lote) >= self.TAMANHO_LOTE_CSV:
+                    processar_lote()
             
-            connection.commit()  # COMMIT após processar todas as etiquetas do CSV
+            if lote:
+                processar_lote()
+            
+            self.logger.info(
+                f"CSV do inventário {id_inventario}: {etiquetas_processadas} linhas, "
+                f"{len(vistos)} EPCs distintos, {etiquetas_atualizadas} localizadas em {lotes} lotes"
+            )
             
-            # Limpar cache
-            self.limpar_cache()
+            connection.commit()  # COMMIT após processar todas as etiquetas do CSV
             
             return {
                 'success': True,
@@ -415,6 +513,12 @@ class GerenciadorInventariosRFID:
                 'erros': erros if erros else None
             }
             
+        except JobCancelado:
+            # Cancelamento pelo job: o executor registra o status
+            self.logger.info(
+                f"CSV do inventário {id_inventario} cancelado após {etiquetas_processadas} linhas"
+            )
+            raise
         except Exception as e:
             self.logger.error(f"Erro ao processar CSV: {e}")
             return {
@@ -424,11 +528,131 @@ class GerenciadorInventariosRFID:
                 'etiquetas_atualizadas': etiquetas_atualizadas
             }
         finally:
+            # Lotes já aplicados ficam gravados mesmo com cancelamento ou erro:
+            # só as listas que exibem este inventário mudam (itens localizados)
+            if lotes:
+                self._invalidar_cache(f"inventario:{id_inventario}")
             if cursor:
                 cursor.close()
             if connection:
                 connection.close()
     
+    def _ler_linhas_csv(self, fluxo, tamanho_bloco=65536):
+        """
+        Lê um fluxo de CSV em blocos, decodificando de forma incremental.
+        
+        Args:
+            fluxo: Objeto com read() (bytes em UTF-8, com ou sem BOM, ou texto)
+            tamanho_bloco (int): Bytes lidos por vez
+            
+        Yields:
+            str: Linhas do arquivo (com o terminador de linha)
+        """
+        decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+        pendente = ''
+        
+        while True:
+            bloco = fluxo.read(tamanho_bloco)
+            if not bloco:
+                break
+            
+            texto = bloco if isinstance(bloco, str) else decodificador.decode(bloco)
+            partes = (pendente + texto).split('\n')
+            pendente = partes.pop()
+            for parte in partes:
+                yield parte + '\n'
+        
+        pendente += decodificador.decode(b'', final=True)
+        if pendente:
+            yield pendente
+    
+    def _reconciliar_epcs(self, cursor, id_inventario, epcs):
+        """
+        Marca como localizadas as etiquetas lidas pelo leitor móvel.
+        
+        Carrega os EPCs em uma tabela temporária e executa o UPDATE e o
+        diagnóstico ("não encontrado no inventário") com um JOIN cada. Se a
+        tabela temporária não puder ser criada, usa lotes de IN (...).
+        
+        Args:
+            cursor: Cursor MySQL
+            id_inventario (int): ID do inventário
+            epcs (list): EPCs lidos, sem repetição
+            
+        Returns:
+            tuple: (etiquetas atualizadas, lista de EPCs fora do inventário)
+        """
+        try:
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS tmp_epcs_csv")
+            # Copia o tipo/collation da coluna original para o JOIN usar o índice
+            cursor.execute("""
+                CREATE TEMPORARY TABLE tmp_epcs_csv
+                SELECT EtiquetaRFID_hex FROM inventariosRFID WHERE 1 = 0
+            """)
+        except Error as e:
+            self.logger.warning(f"Tabela temporária indisponível ({e}), usando lotes IN (...)")
+            return self._reconciliar_epcs_em_lotes(cursor, id_inventario, epcs)
+        
+        try:
+            for i in range(0, len(epcs), self.TAMANHO_LOTE_INSERCAO):
+                cursor.executemany(
+                    "INSERT INTO tmp_epcs_csv (EtiquetaRFID_hex) VALUES (%s)",
+                    [(epc,) for epc in epcs[i:i + self.TAMANHO_LOTE_INSERCAO]]
+                )
+            
+            cursor.execute(f"""
+                UPDATE inventariosRFID i
+                INNER JOIN tmp_epcs_csv t ON i.EtiquetaRFID_hex = t.EtiquetaRFID_hex
+                SET i.Status = 'Localizado',
+                    i.CodigoLeitor = 'MOBILE',
+                    i.Observacao = {self.OBSERVACAO_MOBILE.format(coluna='i.Observacao')}
+                WHERE i.idInventarioRFID = %s 
+                    AND i.Status = 'Não localizado'
+            """, (id_inventario,))
+            atualizadas = cursor.rowcount
+            
+            cursor.execute("""
+                SELECT t.EtiquetaRFID_hex
+                FROM tmp_epcs_csv t
+                LEFT JOIN inventariosRFID i 
+                    ON i.EtiquetaRFID_hex = t.EtiquetaRFID_hex AND i.idInventarioRFID = %s
+                WHERE i.EtiquetaRFID_hex IS NULL
+            """, (id_inventario,))
+            ausentes = {linha[0].upper() for linha in cursor.fetchall()}
+        finally:
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS tmp_epcs_csv")
+        
+        return atualizadas, [epc for epc in epcs if epc.upper() in ausentes]
+    
+    def _reconciliar_epcs_em_lotes(self, cursor, id_inventario, epcs):
+        """Versão de _reconciliar_epcs com lotes de IN (...) (sem tabela temporária)."""
+        atualizadas = 0
+        encontrados = set()
+        
+        for i in range(0, len(epcs), self.TAMANHO_LOTE_INSERCAO):
+            lote = epcs[i:i + self.TAMANHO_LOTE_INSERCAO]
+            marcadores = ', '.join(['%s'] * len(lote))
+            
+            cursor.execute(f"""
+                UPDATE inventariosRFID
+                SET Status = 'Localizado',
+                    CodigoLeitor = 'MOBILE',
+                    Observacao = {self.OBSERVACAO_MOBILE.format(coluna='Observacao')}
+                WHERE idInventarioRFID = %s 
+                    AND Status = 'Não localizado'
+                    AND EtiquetaRFID_hex IN ({marcadores})
+            """, [id_inventario] + lote)
+            atualizadas += cursor.rowcount
+            
+            cursor.execute(f"""
+                SELECT EtiquetaRFID_hex 
+                FROM inventariosRFID 
+                WHERE idInventarioRFID = %s AND EtiquetaRFID_hex IN ({marcadores})
+            """, [id_inventario] + lote)
+            encontrados.update(linha[0].upper() for linha in cursor.fetchall())
+        
+        return atualizadas, [epc for epc in epcs if epc.upper() not in encontrados]
+    
     def obter_inventarios(self, filtros=None, limite=100, offset=0, force_refresh=False):
         """
         Obtém lista de inventários com filtros opcionais.
@@ -447,13 +671,12 @@ class GerenciadorInventariosRFID:
             'limite': limite,
             'offset': offset
         }
-        cache_key = self._get_cache_key('inventarios', cache_params)
+        cache_key = construir_chave_cache('inventarios', cache_params)
         
         if not force_refresh:
             cached_result = self._get_from_cache(cache_key)
             if cached_result:
-                cached_result['from_cache'] = True
-                return cached_result
+                return abrir_resultado(cached_result, from_cache=True)
         
         connection = None
         cursor = None
@@ -538,7 +761,12 @@ class GerenciadorInventariosRFID:
                 'from_cache': False
             }
             
-            self._set_cache(cache_key, result)
+            # Tags: composição da lista, inventários exibidos e (se filtrada) status
+            tags = ['inventarios']
+            tags.extend(f"inventario:{inv['idInventarioRFID']}" for inv in inventarios)
+            if filtros and filtros.get('status'):
+                tags.append('inventarios:status')
+            self._set_cache(cache_key, result, tags=tags)
             
             return result
             
@@ -557,6 +785,100 @@ class GerenciadorInventariosRFID:
             if connection:
                 connection.close()
     
+    def obter_estatisticas_inventarios(self, periodo_dias=30, force_refresh=False):
+        """
+        Obtém estatísticas gerais dos inventários de um período.
+        
+        Args:
+            periodo_dias (int): Últimos X dias considerados
+            force_refresh (bool): Força atualização (ignorado se o valor em cache tem poucos segundos)
+            
+        Returns:
+            dict: Estatísticas dos inventários
+        """
+        cache_key = construir_chave_cache('estatisticas_inventarios', {'periodo_dias': periodo_dias})
+        
+        # Stale-while-revalidate: expirado é servido na hora (stale=True) e recalculado em segundo plano
+        return self.cache.obter_swr(
+            cache_key,
+            lambda: self._calcular_estatisticas_inventarios(periodo_dias, cache_key),
+            force_refresh=force_refresh
+        )
+    
+    def _calcular_estatisticas_inventarios(self, periodo_dias, cache_key):
+        """Calcula as estatísticas dos inventários do período e armazena o resultado no cache."""
+        data_inicio = (datetime.now() - timedelta(days=periodo_dias)).strftime('%Y-%m-%d')
+        
+        # Buscar todos os inventários do período
+        resultado = self.obter_inventarios(
+            filtros={'data_inicio': data_inicio},
+            limite=1000,  # Buscar todos
+            force_refresh=True
+        )
+        
+        if not resultado['success']:
+            return resultado
+        
+        inventarios = resultado.get('inventarios', [])
+        
+        # Calcular estatísticas
+        total_inventarios = len(inventarios)
+        inventarios_finalizados = sum(1 for inv in inventarios if inv.get('Status') == 'Finalizado')
+        inventarios_em_andamento = sum(1 for inv in inventarios if inv.get('Status') == 'Em andamento')
+        
+        # Estatísticas de itens
+        total_itens_verificados = sum(inv.get('total_itens', 0) for inv in inventarios)
+        total_itens_localizados = sum(inv.get('itens_localizados', 0) for inv in inventarios)
+        
+        # Taxa média de localização
+        taxa_localizacao_media = 0
+        if inventarios:
+            taxas = [inv.get('percentual_localizado', 0) for inv in inventarios if inv.get('total_itens', 0) > 0]
+            if taxas:
+                taxa_localizacao_media = round(sum(taxas) / len(taxas), 2)
+        
+        # Inventários por colaborador
+        inventarios_por_colaborador = {}
+        for inv in inventarios:
+            colab_id = inv.get('id_colaborador')
+            if colab_id:
+                if colab_id not in inventarios_por_colaborador:
+                    inventarios_por_colaborador[colab_id] = 0
+                inventarios_por_colaborador[colab_id] += 1
+        
+        # Top 5 colaboradores
+        top_colaboradores = sorted(
+            inventarios_por_colaborador.items(),
+            key=lambda x: x[1],
+            reverse=True
+        )[:5]
+        
+        result = {
+            'success': True,
+            'periodo_dias': periodo_dias,
+            'data_inicio': data_inicio,
+            'estatisticas': {
+                'total_inventarios': total_inventarios,
+                'inventarios_finalizados': inventarios_finalizados,
+                'inventarios_em_andamento': inventarios_em_andamento,
+                'total_itens_verificados': total_itens_verificados,
+                'total_itens_localizados': total_itens_localizados,
+                'taxa_localizacao_media': taxa_localizacao_media,
+                'top_colaboradores': [
+                    {'id_colaborador': colab[0], 'total_inventarios': colab[1]}
+                    for colab in top_colaboradores
+                ]
+            },
+            'from_cache': False
+        }
+        
+        # Mesmas dependências da lista: inventários novos, exibidos e mudanças de status
+        tags = ['inventarios', 'inventarios:status']
+        tags.extend(f"inventario:{inv['idInventarioRFID']}" for inv in inventarios)
+        self._set_cache(cache_key, result, tags=tags)
+        
+        return result
+    
     def obter_detalhes_inventario(self, id_inventario):
         """
         Obtém detalhes completos de um inventário específico.
@@ -698,8 +1020,8 @@ class GerenciadorInventariosRFID:
             cursor.execute(update_query, (id_inventario,))
             connection.commit()  # COMMIT necessário para persistir a mudança
             
-            # Limpar cache
-            self.limpar_cache()
+            # Invalidar as listas que exibem o inventário e as filtradas por status
+            self._invalidar_cache(f"inventario:{id_inventario}", 'inventarios:status')
             
             return {
                 'success': True,
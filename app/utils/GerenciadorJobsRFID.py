@@ -0,0 +1,465 @@
+# app/utils/GerenciadorJobsRFID.py
+import logging
+import json
+import os
+import socket
+import sqlite3
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from ..config import DATA_DIR
+from .PoolConexoesMySQL import PoolConexoesMySQL
+
+
+class JobCancelado(Exception):
+    """Levantada dentro de um job quando o cancelamento foi solicitado."""
+    pass
+
+
+class ContextoJob:
+    """
+    Contexto entregue à função do job.
+
+    Permite publicar o progresso e verificar se o cancelamento foi solicitado.
+    """
+
+    def __init__(self, gerenciador, job_id):
+        self._gerenciador = gerenciador
+        self.job_id = job_id
+
+    def cancelado(self):
+        """Indica se o cancelamento do job foi solicitado."""
+        return self._gerenciador._cancelamento_solicitado(self.job_id)
+
+    def atualizar_progresso(self, progresso, interromper=True):
+        """
+        Publica o progresso do job.
+
+        Levanta JobCancelado se o cancelamento foi solicitado, interrompendo o
+        job no próximo ponto de progresso (ex: entre lotes do CSV).
+
+        Args:
+            progresso (dict): Dados de progresso (serializáveis em JSON)
+            interromper (bool): False em pontos onde parar deixaria dados pela metade
+        """
+        self._gerenciador._salvar_progresso(self.job_id, progresso)
+        if interromper and self.cancelado():
+            raise JobCancelado()
+
+
+class GerenciadorJobsRFID:
+    """
+    Executor de jobs em segundo plano para operações longas (inventários, CSV).
+
+    Os jobs rodam em um pool de threads e o estado (status, progresso,
+    resultado) fica em um SQLite local, consultável por GET /api/jobs/<id>
+    mesmo depois que a requisição que criou o job já respondeu.
+
+    O SQLite é compartilhado pelos processos do servidor (vários workers):
+    cada job guarda o processo dono (host:pid) e um sinal de vida renovado
+    periodicamente. Só são encerrados como interrompidos os jobs cujo dono
+    morreu (pid inexistente no mesmo host) ou parou de renovar o sinal;
+    o upload desses jobs (coluna arquivo) é apagado junto.
+    """
+
+    _instance = None
+
+    STATUS_PENDENTE = 'pendente'
+    STATUS_EXECUTANDO = 'executando'
+    STATUS_CONCLUIDO = 'concluido'
+    STATUS_ERRO = 'erro'
+    STATUS_CANCELADO = 'cancelado'
+
+    STATUS_FINAIS = (STATUS_CONCLUIDO, STATUS_ERRO, STATUS_CANCELADO)
+
+    @classmethod
+    def get_instance(cls):
+        """Retorna a instância única do gerenciador (Singleton)."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, max_workers=2, retencao_dias=7, intervalo_sinal_vida=30):
+        """Inicializa o gerenciador."""
+        if GerenciadorJobsRFID._instance is not None:
+            raise Exception("Use get_instance() para obter a instância")
+
+        self.logger = logging.getLogger('controlerfid.jobs')
+        self.caminho_banco = os.path.join(DATA_DIR, 'jobs.sqlite3')
+        self.diretorio_uploads = os.path.join(DATA_DIR, 'uploads')
+        os.makedirs(self.diretorio_uploads, exist_ok=True)
+
+        self.retencao = timedelta(days=retencao_dias)
+        self.host = socket.gethostname()
+        self.dono = f"{self.host}:{os.getpid()}"
+        self.intervalo_sinal_vida = intervalo_sinal_vida
+        # Sem sinal de vida por 3 intervalos: o processo dono morreu ou travou
+        self.tolerancia_sinal_vida = timedelta(seconds=intervalo_sinal_vida * 3)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='rfid-job')
+        self._futuros = {}
+        self._lock = threading.Lock()
+
+        self._inicializar_banco()
+
+        self._parar = threading.Event()
+        self._thread_sinal_vida = threading.Thread(
+            target=self._manter_sinal_vida, name='rfid-job-sinal-vida', daemon=True
+        )
+        self._thread_sinal_vida.start()
+
+        self.logger.info(f"Gerenciador de Jobs RFID inicializado ({max_workers} workers, dono {self.dono})")
+
+    def _conectar(self):
+        """Abre uma conexão SQLite (uma por operação: seguro entre threads)."""
+        conexao = sqlite3.connect(self.caminho_banco, timeout=10)
+        conexao.row_factory = sqlite3.Row
+        return conexao
+
+    def _inicializar_banco(self):
+        """Cria a tabela de jobs e encerra jobs de processos que não existem mais."""
+        conexao = self._conectar()
+        try:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    tipo TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    descricao TEXT,
+                    progresso TEXT,
+                    resultado TEXT,
+                    erro TEXT,
+                    cancelamento_solicitado INTEGER NOT NULL DEFAULT 0,
+                    criado_em TEXT NOT NULL,
+                    iniciado_em TEXT,
+                    finalizado_em TEXT,
+                    dono TEXT,
+                    sinal_vida TEXT,
+                    arquivo TEXT
+                )
+            """)
+            # Bancos criados antes das colunas de dono e de arquivo
+            colunas = {linha['name'] for linha in conexao.execute("PRAGMA table_info(jobs)")}
+            for coluna in ('dono', 'sinal_vida', 'arquivo'):
+                if coluna not in colunas:
+                    conexao.execute(f"ALTER TABLE jobs ADD COLUMN {coluna} TEXT")
+            limite = (datetime.now() - self.retencao).isoformat(timespec='seconds')
+            conexao.execute("DELETE FROM jobs WHERE criado_em < ?", (limite,))
+            conexao.commit()
+        finally:
+            conexao.close()
+
+        self._encerrar_jobs_orfaos()
+
+    def _dono_vivo(self, dono):
+        """
+        Indica se o processo dono de um job ainda existe.
+
+        Só é possível verificar processos do mesmo host; os demais são
+        considerados vivos (o sinal de vida decide).
+
+        Args:
+            dono (str): host:pid
+
+        Returns:
+            bool: False se o processo certamente não existe mais
+        """
+        host, _, pid = (dono or '').rpartition(':')
+        if host != self.host or not pid.isdigit():
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            # Ex: PermissionError - o processo existe
+            return True
+        return True
+
+    def _remover_arquivo(self, caminho):
+        """Apaga o upload de um job (só arquivos dentro de diretorio_uploads)."""
+        if not caminho:
+            return
+        if os.path.dirname(os.path.abspath(caminho)) != os.path.abspath(self.diretorio_uploads):
+            self.logger.warning(f"Arquivo de job fora do diretório de uploads ignorado: {caminho}")
+            return
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Erro ao apagar o upload {caminho}: {e}")
+
+    def _encerrar_jobs_orfaos(self):
+        """Marca como erro os jobs ativos de processos mortos ou sem sinal de vida e apaga seus uploads."""
+        agora = datetime.now()
+        limite_sinal = (agora - self.tolerancia_sinal_vida).isoformat(timespec='seconds')
+
+        conexao = self._conectar()
+        try:
+            linhas = conexao.execute("""
+                SELECT id, dono, sinal_vida, arquivo FROM jobs
+                WHERE status IN (?, ?) AND (dono IS NULL OR dono != ?)
+            """, (self.STATUS_PENDENTE, self.STATUS_EXECUTANDO, self.dono)).fetchall()
+
+            orfaos = [
+                linha for linha in linhas
+                if not linha['sinal_vida'] or linha['sinal_vida'] < limite_sinal or not self._dono_vivo(linha['dono'])
+            ]
+            encerrados = []
+            for linha in orfaos:
+                # Condição repetida: o dono pode ter finalizado o job enquanto isso
+                cursor = conexao.execute("""
+                    UPDATE jobs
+                    SET status = ?, erro = 'Interrompido: o processo do servidor que executava o job foi encerrado',
+                        finalizado_em = ?
+                    WHERE id = ? AND status IN (?, ?)
+                """, (self.STATUS_ERRO, agora.isoformat(timespec='seconds'), linha['id'],
+                      self.STATUS_PENDENTE, self.STATUS_EXECUTANDO))
+                if cursor.rowcount:
+                    encerrados.append(linha)
+            conexao.commit()
+        finally:
+            conexao.close()
+
+        # ao_finalizar não roda para jobs de outro processo: o upload é apagado aqui
+        for linha in encerrados:
+            self._remover_arquivo(linha['arquivo'])
+
+        if orfaos:
+            self.logger.warning(f"{len(orfaos)} job(s) de processos encerrados marcados como interrompidos")
+
+    def _manter_sinal_vida(self):
+        """Renova o sinal de vida dos jobs deste processo e encerra os órfãos dos demais."""
+        while not self._parar.wait(self.intervalo_sinal_vida):
+            try:
+                conexao = self._conectar()
+                try:
+                    conexao.execute("""
+                        UPDATE jobs SET sinal_vida = ?
+                        WHERE dono = ? AND status IN (?, ?)
+                    """, (datetime.now().isoformat(timespec='seconds'), self.dono,
+                          self.STATUS_PENDENTE, self.STATUS_EXECUTANDO))
+                    conexao.commit()
+                finally:
+                    conexao.close()
+                self._encerrar_jobs_orfaos()
+            except Exception as e:
+                self.logger.warning(f"Erro ao renovar sinal de vida dos jobs: {e}")
+
+    def _atualizar(self, job_id, **campos):
+        """Atualiza colunas de um job."""
+        colunas = ', '.join(f"{coluna} = ?" for coluna in campos)
+        conexao = self._conectar()
+        try:
+            conexao.execute(f"UPDATE jobs SET {colunas} WHERE id = ?", list(campos.values()) + [job_id])
+            conexao.commit()
+        finally:
+            conexao.close()
+
+    def _salvar_progresso(self, job_id, progresso):
+        """Grava o progresso publicado pelo job."""
+        self._atualizar(job_id, progresso=json.dumps(progresso, default=str))
+
+    def _cancelamento_solicitado(self, job_id):
+        """Consulta se o cancelamento do job foi solicitado."""
+        conexao = self._conectar()
+        try:
+            linha = conexao.execute(
+                "SELECT cancelamento_solicitado FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            return bool(linha and linha['cancelamento_solicitado'])
+        finally:
+            conexao.close()
+
+    def submeter(self, tipo, funcao, *args, descricao=None, ao_finalizar=None, arquivo=None, **kwargs):
+        """
+        Agenda uma função para execução em segundo plano.
+
+        A função recebe o ContextoJob como primeiro argumento e deve retornar
+        um dict serializável (o resultado do job).
+
+        Args:
+            tipo (str): Tipo do job (ex: 'criar_inventario', 'processar_csv')
+            funcao (callable): Função executada como funcao(contexto, *args, **kwargs)
+            descricao (str): Descrição legível do job (opcional)
+            ao_finalizar (callable): Chamado sem argumentos ao final, com sucesso ou não
+            arquivo (str): Upload do job (salvar_upload), apagado ao final, no cancelamento
+                ou quando o job é encerrado como órfão por outro processo
+
+        Returns:
+            str: ID do job
+        """
+        job_id = uuid.uuid4().hex
+        conexao = self._conectar()
+        try:
+            agora = datetime.now().isoformat(timespec='seconds')
+            conexao.execute("""
+                INSERT INTO jobs (id, tipo, status, descricao, criado_em, dono, sinal_vida, arquivo)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (job_id, tipo, self.STATUS_PENDENTE, descricao, agora, self.dono, agora, arquivo))
+            conexao.commit()
+        finally:
+            conexao.close()
+
+        # O registro acontece sob o lock para que o job não termine antes de ser registrado
+        with self._lock:
+            ao_finalizar = self._com_remocao(ao_finalizar, arquivo)
+            futuro = self.executor.submit(self._executar, job_id, funcao, args, kwargs, ao_finalizar)
+            self._futuros[job_id] = (futuro, ao_finalizar)
+
+        self.logger.info(f"Job {job_id} ({tipo}) agendado")
+        return job_id
+
+    def _com_remocao(self, ao_finalizar, arquivo):
+        """Acrescenta a remoção do upload do job ao ao_finalizar."""
+        if not arquivo:
+            return ao_finalizar
+
+        def finalizar():
+            try:
+                if ao_finalizar:
+                    ao_finalizar()
+            finally:
+                self._remover_arquivo(arquivo)
+
+        return finalizar
+
+    def _executar(self, job_id, funcao, args, kwargs, ao_finalizar):
+        """Executa o job registrando status, resultado e erros."""
+        try:
+            if self._cancelamento_solicitado(job_id):
+                self._atualizar(job_id, status=self.STATUS_CANCELADO,
+                                finalizado_em=datetime.now().isoformat(timespec='seconds'))
+                return
+
+            self._atualizar(job_id, status=self.STATUS_EXECUTANDO,
+                            iniciado_em=datetime.now().isoformat(timespec='seconds'))
+
+            # Todas as consultas do job compartilham uma conexão MySQL
+            with PoolConexoesMySQL.escopo():
+                resultado = funcao(ContextoJob(self, job_id), *args, **kwargs)
+
+            if isinstance(resultado, dict) and resultado.get('success') is False:
+                # Gerenciadores capturam exceções: falha após pedido de cancelamento = cancelado
+                status = self.STATUS_CANCELADO if self._cancelamento_solicitado(job_id) else self.STATUS_ERRO
+                erro = resultado.get('error')
+            else:
+                status = self.STATUS_CONCLUIDO
+                erro = None
+                if self._cancelamento_solicitado(job_id):
+                    self.logger.info(f"Job {job_id}: cancelamento chegou depois do último ponto de interrupção")
+
+            self._atualizar(job_id, status=status, erro=erro,
+                            resultado=json.dumps(resultado, default=str),
+                            finalizado_em=datetime.now().isoformat(timespec='seconds'))
+            self.logger.info(f"Job {job_id} finalizado: {status}")
+
+        except JobCancelado:
+            self._atualizar(job_id, status=self.STATUS_CANCELADO,
+                            finalizado_em=datetime.now().isoformat(timespec='seconds'))
+            self.logger.info(f"Job {job_id} cancelado")
+
+        except Exception as e:
+            self.logger.error(f"Erro no job {job_id}: {e}\n{traceback.format_exc()}")
+            self._atualizar(job_id, status=self.STATUS_ERRO, erro=str(e),
+                            finalizado_em=datetime.now().isoformat(timespec='seconds'))
+
+        finally:
+            with self._lock:
+                self._futuros.pop(job_id, None)
+            if ao_finalizar:
+                try:
+                    ao_finalizar()
+                except Exception as e:
+                    self.logger.warning(f"Erro ao finalizar job {job_id}: {e}")
+
+    def obter_job(self, job_id):
+        """
+        Obtém o estado de um job.
+
+        Args:
+            job_id (str): ID do job
+
+        Returns:
+            dict: Dados do job ou None se não existir
+        """
+        conexao = self._conectar()
+        try:
+            linha = conexao.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conexao.close()
+
+        if not linha:
+            return None
+
+        job = dict(linha)
+        job['progresso'] = json.loads(job['progresso']) if job['progresso'] else None
+        job['resultado'] = json.loads(job['resultado']) if job['resultado'] else None
+        job['cancelamento_solicitado'] = bool(job['cancelamento_solicitado'])
+        job['finalizado'] = job['status'] in self.STATUS_FINAIS
+        return job
+
+    def cancelar_job(self, job_id):
+        """
+        Solicita o cancelamento de um job.
+
+        Jobs pendentes são cancelados imediatamente; jobs em execução param no
+        próximo ponto de progresso.
+
+        Args:
+            job_id (str): ID do job
+
+        Returns:
+            dict: Resultado da operação
+        """
+        job = self.obter_job(job_id)
+        if not job:
+            return {'success': False, 'error': 'Job não encontrado'}
+
+        if job['finalizado']:
+            return {'success': False, 'error': f"Job já finalizado ({job['status']})"}
+
+        self._atualizar(job_id, cancelamento_solicitado=1)
+
+        with self._lock:
+            futuro, ao_finalizar = self._futuros.get(job_id, (None, None))
+            cancelado = futuro is not None and futuro.cancel()
+            if cancelado:
+                self._futuros.pop(job_id, None)
+
+        if cancelado:
+            # Ainda não tinha começado: _executar não vai rodar
+            self._atualizar(job_id, status=self.STATUS_CANCELADO,
+                            finalizado_em=datetime.now().isoformat(timespec='seconds'))
+            if ao_finalizar:
+                ao_finalizar()
+
+        self.logger.info(f"Cancelamento solicitado para o job {job_id}")
+        return {'success': True, 'message': 'Cancelamento solicitado', 'job_id': job_id}
+
+    def salvar_upload(self, fluxo, sufixo='.csv', tamanho_bloco=65536):
+        """
+        Copia um upload para um arquivo temporário em DATA_DIR/uploads.
+
+        O fluxo da requisição deixa de existir quando a resposta é enviada;
+        jobs que processam arquivos leem desta cópia.
+
+        Args:
+            fluxo: Objeto com read() (bytes)
+            sufixo (str): Extensão do arquivo
+            tamanho_bloco (int): Bytes copiados por vez
+
+        Returns:
+            str: Caminho do arquivo salvo
+        """
+        caminho = os.path.join(self.diretorio_uploads, f"{uuid.uuid4().hex}{sufixo}")
+        with open(caminho, 'wb') as destino:
+            while True:
+                bloco = fluxo.read(tamanho_bloco)
+                if not bloco:
+                    break
+                destino.write(bloco if isinstance(bloco, bytes) else bloco.encode('utf-8'))
+        return caminho
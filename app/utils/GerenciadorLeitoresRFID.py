@@ -2,10 +2,17 @@
 import mysql.connector
 from mysql.connector import Error
 import logging
-from datetime import datetime, timedelta
-from ..config import MYSQL_CONFIG
-import json
-import hashlib
+import time
+from datetime import datetime
+from ..config import MYSQL_CONFIG, FOTOS_CONFIG
+from .PoolConexoesMySQL import PoolConexoesMySQL
+from .SerializacaoJSON import abrir_resultado
+from .CacheRFID import CacheRFID, construir_chave_cache, normalizar_parametros_cache
+from .ContagemSQL import ContadorIncremental, contar_estimado
+from .IndiceFotosRFID import IndiceFotosRFID
+from .ArmazemFotosRFID import ArmazemFotosRFID
+from .RepositorioFotosRFID import RepositorioFotosRFID
+from .CursorPaginacao import cursor_seguinte, decodificar_cursor, montar_condicao_seek, pular_entregues
 import re
 
 class GerenciadorLeitoresRFID:
@@ -21,6 +28,11 @@ class GerenciadorLeitoresRFID:
         '32366259FC'
     ]
     
+    # Ordenação das listagens (Horario + desempate), usada também pelo cursor de paginação.
+    # A tupla não é única (sem chave primária): o cursor leva a contagem de repetidas (CursorPaginacao).
+    # Requer idx_leituras_ordenacao (scripts/indices_leituras.sql) para não ordenar em memória
+    COLUNAS_ORDENACAO = ['l.Horario', 'l.CodigoLeitor', 'l.Antena', 'l.EtiquetaRFID_hex']
+    
     @classmethod
     def get_instance(cls):
         """Retorna a instância única do gerenciador (Singleton)."""
@@ -35,61 +47,51 @@ class GerenciadorLeitoresRFID:
         
         self.logger = logging.getLogger('controlerfid.leitores')
         self.config = MYSQL_CONFIG
+        self.pool = PoolConexoesMySQL.get_pool()
+        
+        # Contador incremental do total de leituras (filtro base: RSSI e prefixos válidos)
+        condicao_base, _ = self._condicao_base()
+        self.contador = ContadorIncremental('leitoresRFID l', 'l.Horario', condicao_base)
+        
+        # Fotos fora da linha (fotosRFID), com a coluna Foto ainda aceita
+        self.fotos = RepositorioFotosRFID('leitoresRFID')
+        
+        # Resumo de fotos por etiqueta (substitui os EXISTS/COUNT sobre a coluna Foto)
+        self.indice_fotos = IndiceFotosRFID(repositorio=self.fotos, obter_conexao=self._get_connection)
+        
+        # Fotos já lidas do banco, servidas do disco
+        self.armazem_fotos = ArmazemFotosRFID.get_instance()
         
-        # Sistema de cache
-        self.cache = {}
-        self.cache_timeout = timedelta(minutes=3)  # Cache menor devido ao volume de dados
+        # Sistema de cache (LRU + TTL compartilhado, namespace próprio)
+        self.cache = CacheRFID.get_instance().namespace('leitores', ttl=180)  # 3 minutos
         
         self.logger.info("Gerenciador de Leitores RFID inicializado")
     
-    def _get_cache_key(self, prefix, params=None):
-        """Gera uma chave única para o cache baseada nos parâmetros."""
-        if params:
-            params_str = json.dumps(params, sort_keys=True)
-            params_hash = hashlib.md5(params_str.encode()).hexdigest()
-            return f"{prefix}_{params_hash}"
-        return prefix
-    
     def _get_from_cache(self, key):
         """Obtém dados do cache se ainda válidos."""
-        if key in self.cache:
-            cached_data, timestamp = self.cache[key]
-            if datetime.now() - timestamp < self.cache_timeout:
-                self.logger.debug(f"Cache hit para key: {key}")
-                return cached_data
-            else:
-                del self.cache[key]
-                self.logger.debug(f"Cache expirado para key: {key}")
-        return None
+        cached_data = self.cache.obter(key)
+        if cached_data is not None:
+            self.logger.debug(f"Cache hit para key: {key}")
+        return cached_data
     
-    def _set_cache(self, key, data):
-        """Armazena dados no cache."""
-        self.cache[key] = (data, datetime.now())
+    def _set_cache(self, key, data, tags=None):
+        """Armazena dados no cache, com tags de dependência para invalidação seletiva."""
+        self.cache.definir(key, data, tags=tags)
         self.logger.debug(f"Dados armazenados no cache para key: {key}")
     
     def limpar_cache(self):
         """Limpa todo o cache."""
-        self.cache.clear()
-        self.logger.info("Cache limpo")
+        self.cache.limpar()
+    
+    def _invalidar_cache(self, *tags):
+        """Remove do cache (de todos os gerenciadores) as entradas com as tags informadas."""
+        removidas = self.cache.invalidar(*tags)
+        self.logger.debug(f"Cache invalidado para tags {tags}: {removidas} entradas")
     
     def _get_connection(self):
-        """Cria e retorna uma conexão com o MySQL."""
+        """Obtém uma conexão do pool compartilhado (close() devolve ao pool)."""
         try:
-            connection_params = {
-                'host': self.config['host'],
-                'database': self.config['database'],
-                'user': self.config['user'],
-                'password': self.config['password'],
-                'connection_timeout': self.config['connection_timeout'],
-                'autocommit': True
-            }
-            
-            # Desabilita verificação SSL apenas para domínios tce.go.gov.br
-            if 'tce.go.gov.br' in self.config['host'].lower():
-                connection_params['ssl_disabled'] = True
-            
-            connection = mysql.connector.connect(**connection_params)
-            return connection
+            return self.pool.obter_conexao()
         except Error as e:
             self.logger.error(f"Erro ao conectar ao MySQL: {e}")
             raise
@@ -102,48 +104,64 @@ class GerenciadorLeitoresRFID:
         etiqueta_upper = etiqueta_hex.upper()
         return any(etiqueta_upper.startswith(prefixo.upper()) for prefixo in self.PREFIXOS_VALIDOS)
     
-    def obter_leituras(self, filtros=None, limite=100, offset=0, force_refresh=False):
+    @staticmethod
+    def _chave_ordenacao(leitura):
+        """Valores de COLUNAS_ORDENACAO de uma linha de leitoresRFID."""
+        return [leitura['Horario'], leitura['CodigoLeitor'], leitura['Antena'], leitura['EtiquetaRFID_hex']]
+
+    def obter_leituras(self, filtros=None, limite=100, offset=0, force_refresh=False, cursor_paginacao=None,
+                       modo_contagem='auto'):
         """
         Obtém lista de leituras com filtros opcionais.
         
         Args:
             filtros (dict): Dicionário com filtros (etiqueta, antena, horario_inicio, horario_fim)
             limite (int): Número máximo de registros
-            offset (int): Deslocamento para paginação
+            offset (int): Deslocamento para paginação (ignorado no modo cursor)
             force_refresh (bool): Força atualização ignorando o cache
+            cursor_paginacao (str): Cursor da página (next_cursor da resposta anterior;
+                '' = primeira página no modo cursor; None = modo offset)
+            modo_contagem (str): Estratégia do total ('auto', 'exata', 'estimada', 'incremental')
             
         Returns:
-            dict: Resultado com leituras e total
+            dict: Resultado com leituras, total (e total_is_estimate) e next_cursor
+            
+        Raises:
+            ValueError: Se o cursor de paginação for inválido
         """
+        modo_cursor = cursor_paginacao is not None
+        posicao = None
+        entregues = None
+        if cursor_paginacao:
+            posicao, entregues = decodificar_cursor(cursor_paginacao, len(self.COLUNAS_ORDENACAO))
+        
         # Gerar chave do cache
+        # Filtros normalizados uma vez, usados nas chaves da página e do total
+        filtros_chave = normalizar_parametros_cache(filtros)
         cache_params = {
-            'filtros': filtros or {},
+            'filtros': filtros_chave,
             'limite': limite,
-            'offset': offset
+            'offset': 0 if modo_cursor else offset,
+            'cursor': cursor_paginacao
         }
-        cache_key = self._get_cache_key('leituras', cache_params)
+        cache_key = construir_chave_cache('leituras', cache_params)
+        total_cache_key = construir_chave_cache('leituras_total', {'filtros': filtros_chave, 'modo': modo_contagem})
         
         # Verificar cache primeiro
         if not force_refresh:
             cached_result = self._get_from_cache(cache_key)
             if cached_result:
-                cached_result['from_cache'] = True
-                return cached_result
+                return abrir_resultado(cached_result, from_cache=True)
         
         total = 0
+        contagem = {'total': 0, 'total_is_estimate': False, 'modo_contagem': 'exata'}
         leituras = []
+        next_cursor = None
         
         try:
             # Construir query base com filtros de prefixo e RSSI
-            where_conditions = []
-            params = []
-
-            where_conditions.append("RSSI != 0")
-            prefixo_conditions = []
-            for prefixo in self.PREFIXOS_VALIDOS:
-                prefixo_conditions.append("l.EtiquetaRFID_hex LIKE %s")
-                params.append(f"{prefixo}%")
-            where_conditions.append(f"({' OR '.join(prefixo_conditions)})")
+            condicao_base, params = self._condicao_base()
+            where_conditions = [condicao_base]
 
             # Filtros adicionais do usuário
             if filtros:
@@ -190,41 +208,35 @@ class GerenciadorLeitoresRFID:
                     params.append(filtros['horario_fim'])
 
             where_clause = " AND ".join(where_conditions)
+            
+            # Modo cursor: a página começa logo após a última linha da anterior
+            page_clause = where_clause
+            page_params = params.copy()
+            if posicao:
+                # A tupla de ordenação se repete: inclui a posição e descarta as já entregues
+                condicao_seek, params_seek = montar_condicao_seek(
+                    self.COLUNAS_ORDENACAO, posicao, inclusiva=bool(entregues)
+                )
+                page_clause = f"{where_clause} AND {condicao_seek}"
+                page_params.extend(params_seek)
 
-            # PRIMEIRA CONEXÃO: Obter o total (agora com JOIN para descrição)
-            connection1 = None
-            cursor1 = None
+            # Uma única conexão para o total e a página
+            connection = None
+            cursor = None
             try:
-                connection1 = self._get_connection()
-                cursor1 = connection1.cursor(dictionary=True)
+                connection = self._get_connection()
+                cursor = connection.cursor(dictionary=True)
                 
-                count_query = f"""
-                    SELECT COUNT(*) as total
-                    FROM leitoresRFID l
-                    LEFT JOIN etiquetasRFID e ON l.EtiquetaRFID_hex = e.EtiquetaRFID_hex
-                    WHERE {where_clause}
-                """
-                cursor1.execute(count_query, params)
-                result = cursor1.fetchone()
-                total = result['total'] if result and 'total' in result else 0
+                # Páginas seguintes do modo cursor reaproveitam o total da primeira
+                cached_contagem = self._get_from_cache(total_cache_key) if posicao else None
+                if cached_contagem is not None:
+                    contagem = cached_contagem
+                else:
+                    contagem = self._contar_leituras(cursor, filtros or {}, where_clause, params, modo_contagem)
+                    self._set_cache(total_cache_key, contagem)
+                total = contagem['total']
                 
-            except Exception as e:
-                self.logger.error(f"Erro ao contar registros: {e}")
-                raise
-            finally:
-                if cursor1:
-                    cursor1.close()
-                if connection1:
-                    connection1.close()
-            
-            # SEGUNDA CONEXÃO: Obter os registros (já havia JOIN)
-            connection2 = None
-            cursor2 = None
-            try:
-                connection2 = self._get_connection()
-                cursor2 = connection2.cursor(dictionary=True)
-                
-                # Query com LEFT JOIN para obter descrição da etiqueta e informação sobre foto
+                # Query com LEFT JOIN para obter descrição da etiqueta (fotos vêm do índice em memória)
                 data_query = f"""
                     SELECT 
                         l.CodigoLeitor,
@@ -238,29 +250,34 @@ class GerenciadorLeitoresRFID:
                             WHEN e.Destruida IS NOT NULL THEN 'destruida'
                             WHEN e.id_listaEtiquetasRFID IS NOT NULL THEN 'ativa'
                             ELSE 'nao_cadastrada'
-                        END as StatusEtiqueta,
-                        CASE 
-                            WHEN EXISTS (
-                                SELECT 1 FROM leitoresRFID l2 
-                                WHERE l2.EtiquetaRFID_hex = l.EtiquetaRFID_hex 
-                                  AND l2.Foto IS NOT NULL 
-                                  AND LENGTH(l2.Foto) > 0
-                            ) THEN 1 
-                            ELSE 0 
-                        END as TemFoto
+                        END as StatusEtiqueta
                     FROM leitoresRFID l
                     LEFT JOIN etiquetasRFID e ON l.EtiquetaRFID_hex = e.EtiquetaRFID_hex
-                    WHERE {where_clause}
-                    ORDER BY l.Horario DESC
-                    LIMIT %s OFFSET %s
+                    WHERE {page_clause}
+                    ORDER BY {', '.join(f'{coluna} DESC' for coluna in self.COLUNAS_ORDENACAO)}
+                    LIMIT %s
                 """
                 
-                # Adicionar limite e offset aos parâmetros
-                query_params = params.copy()
-                query_params.extend([limite, offset])
+                # Adicionar limite (e offset no modo legado) aos parâmetros
+                query_params = page_params
+                query_params.append(limite + (entregues or 0))
+                if not modo_cursor:
+                    data_query += " OFFSET %s"
+                    query_params.append(offset)
                 
-                cursor2.execute(data_query, query_params)
-                leituras_raw = cursor2.fetchall()
+                cursor.execute(data_query, query_params)
+                leituras_raw = cursor.fetchall()
+                if entregues:
+                    leituras_raw = pular_entregues(leituras_raw, posicao, entregues, self._chave_ordenacao)[:limite]
+                
+                # Página cheia: pode haver mais registros após a última linha
+                if len(leituras_raw) == limite:
+                    next_cursor = cursor_seguinte(leituras_raw, self._chave_ordenacao, posicao, entregues or 0)
+                
+                # Disponibilidade de foto pelo índice (sem varrer os BLOBs de cada etiqueta)
+                fotos = self.indice_fotos.obter_varios(
+                    cursor, {leitura['EtiquetaRFID_hex'] for leitura in leituras_raw}
+                )
                 
                 # Processar leituras para formatar dados
                 for leitura in leituras_raw:
@@ -273,7 +290,7 @@ class GerenciadorLeitoresRFID:
                         'rssi': leitura['RSSI'],
                         'descricao_equipamento': leitura['DescricaoEquipamento'] or 'Sem descrição',
                         'status_etiqueta': leitura['StatusEtiqueta'],
-                        'tem_foto': bool(leitura['TemFoto'])
+                        'tem_foto': fotos[leitura['EtiquetaRFID_hex']]['tem_foto']
                     }
                     
                     # Formatar horário se for datetime
@@ -288,22 +305,29 @@ class GerenciadorLeitoresRFID:
                 self.logger.error(f"Erro ao buscar leituras: {e}")
                 raise
             finally:
-                if cursor2:
-                    cursor2.close()
-                if connection2:
-                    connection2.close()
+                if cursor:
+                    cursor.close()
+                if connection:
+                    connection.close()
             
             result = {
                 'success': True,
                 'leituras': leituras,
                 'total': total,
+                'total_is_estimate': contagem['total_is_estimate'],
+                'modo_contagem': contagem['modo_contagem'],
                 'limite': limite,
                 'offset': offset,
+                'paginacao': 'cursor' if modo_cursor else 'offset',
+                'next_cursor': next_cursor,
                 'from_cache': False
             }
             
-            # Armazenar no cache
-            self._set_cache(cache_key, result)
+            # Armazenar no cache: descrição/status vêm de etiquetasRFID
+            tags = {f"etiqueta:{leitura['etiqueta_hex']}" for leitura in leituras}
+            if filtros and filtros.get('descricao'):
+                tags.add('etiquetas')
+            self._set_cache(cache_key, result, tags=tags)
             
             return result
             
@@ -317,25 +341,99 @@ class GerenciadorLeitoresRFID:
                 'from_cache': False
             }
     
+    def _condicao_base(self):
+        """Retorna a condição fixa das listagens (RSSI e prefixos válidos) e seus parâmetros."""
+        prefixo_conditions = ["l.EtiquetaRFID_hex LIKE %s"] * len(self.PREFIXOS_VALIDOS)
+        condicao = f"l.RSSI != 0 AND ({' OR '.join(prefixo_conditions)})"
+        return condicao, [f"{prefixo}%" for prefixo in self.PREFIXOS_VALIDOS]
+    
+    def _contar_leituras(self, cursor, filtros, where_clause, params, modo_contagem='auto'):
+        """
+        Calcula o total da listagem de leituras conforme a estratégia de contagem.
+        
+        - exata: COUNT(*) (o JOIN com etiquetasRFID só entra com filtro de descrição)
+        - estimada: linhas estimadas pelo otimizador (EXPLAIN)
+        - incremental: contador em memória do filtro base, sem filtros ou com janela de tempo
+          (janelas maiores que o contador atende usam a contagem exata)
+        - auto: incremental quando aplicável, senão exata
+        
+        Args:
+            cursor: Cursor MySQL com dictionary=True
+            filtros (dict): Filtros da listagem
+            where_clause (str): Condição WHERE completa
+            params (list): Parâmetros da condição
+            modo_contagem (str): Estratégia solicitada
+            
+        Returns:
+            dict: total, total_is_estimate e modo_contagem efetivamente usado
+        """
+        tabela = "leitoresRFID l"
+        if filtros.get('descricao'):
+            tabela += " LEFT JOIN etiquetasRFID e ON l.EtiquetaRFID_hex = e.EtiquetaRFID_hex"
+        
+        if modo_contagem == 'estimada':
+            total = contar_estimado(cursor, tabela, where_clause, params)
+            return {'total': total, 'total_is_estimate': True, 'modo_contagem': 'estimada'}
+        
+        # Contador incremental: apenas filtro base, opcionalmente com janela de tempo
+        apenas_tempo = set(filtros) <= {'horario_inicio', 'horario_fim'}
+        janela_valida = not filtros.get('horario_fim') or filtros.get('horario_inicio')
+        if modo_contagem in ('auto', 'incremental') and apenas_tempo and janela_valida:
+            _, params_base = self._condicao_base()
+            if filtros.get('horario_inicio'):
+                inicio = datetime.strptime(filtros['horario_inicio'], '%Y-%m-%d %H:%M:%S')
+                fim = None
+                if filtros.get('horario_fim'):
+                    fim = datetime.strptime(filtros['horario_fim'], '%Y-%m-%d %H:%M:%S')
+                # None: janela longa demais para os baldes por minuto (segue para a exata)
+                total = self.contador.contar_janela(cursor, params_base, inicio, fim)
+            else:
+                total = self.contador.contar_total(cursor, params_base)
+            if total is not None:
+                return {'total': total, 'total_is_estimate': False, 'modo_contagem': 'incremental'}
+        
+        count_query = f"""
+            SELECT COUNT(*) as total
+            FROM {tabela}
+            WHERE {where_clause}
+        """
+        cursor.execute(count_query, params)
+        result = cursor.fetchone()
+        total = result['total'] if result and 'total' in result else 0
+        return {'total': total, 'total_is_estimate': False, 'modo_contagem': 'exata'}
+    
     def obter_estatisticas_leituras(self, filtros=None, force_refresh=False):
         """
         Obtém estatísticas das leituras.
         
         Args:
             filtros (dict): Filtros opcionais
-            force_refresh (bool): Força atualização ignorando o cache
+            force_refresh (bool): Força atualização (ignorado se o valor em cache tem poucos segundos)
             
         Returns:
             dict: Estatísticas das leituras
         """
-        cache_key = self._get_cache_key('estatisticas_leituras', filtros)
+        cache_key = construir_chave_cache('estatisticas_leituras', filtros)
         
-        if not force_refresh:
-            cached_result = self._get_from_cache(cache_key)
-            if cached_result:
-                cached_result['from_cache'] = True
-                return cached_result
+        # Stale-while-revalidate: expirado é servido na hora (stale=True) e recalculado em
+        # segundo plano; ausências compartilham uma única consulta
+        return self.cache.obter_swr(
+            cache_key,
+            lambda: self._calcular_estatisticas_leituras(filtros, cache_key),
+            force_refresh=force_refresh
+        )
+    
+    def _calcular_estatisticas_leituras(self, filtros, cache_key):
+        """
+        Executa a consulta de estatísticas de leituras e armazena o resultado no cache.
         
+        Args:
+            filtros (dict): Filtros opcionais
+            cache_key: Chave de cache do resultado (ver construir_chave_cache)
+            
+        Returns:
+            dict: Estatísticas das leituras
+        """
         try:
             connection = None
             cursor = None
@@ -399,8 +497,8 @@ class GerenciadorLeitoresRFID:
                     'from_cache': False
                 }
                 
-                # Armazenar no cache
-                self._set_cache(cache_key, result)
+                # Armazenar no cache (cadastradas/não cadastradas dependem de etiquetasRFID)
+                self._set_cache(cache_key, result, tags=['etiquetas'])
                 
                 return result
                 
@@ -412,6 +510,12 @@ class GerenciadorLeitoresRFID:
             
         except Exception as e:
             self.logger.error(f"Erro ao obter estatísticas de leituras: {e}")
+            
+            # Preferir o último resultado conhecido (mesmo expirado) ao erro
+            obsoleto = self.cache.obter_obsoleto(cache_key)
+            if obsoleto is not None:
+                return obsoleto
+            
             return {
                 'success': False,
                 'error': str(e),
@@ -430,6 +534,9 @@ class GerenciadorLeitoresRFID:
         Returns:
             dict: Histórico de leituras da etiqueta
         """
+        connection = None
+        cursor = None
+        
         try:
             connection = self._get_connection()
             cursor = connection.cursor(dictionary=True)
@@ -486,7 +593,14 @@ class GerenciadorLeitoresRFID:
         if not force_refresh:
             cached_result = self._get_from_cache(cache_key)
             if cached_result:
-                return cached_result
+                return abrir_resultado(cached_result)
+        
+        return self.cache.coalescer(cache_key, lambda: self._calcular_antenas_com_leitor(cache_key))
+    
+    def _calcular_antenas_com_leitor(self, cache_key):
+        """Consulta as antenas agrupadas por leitor e armazena o resultado no cache."""
+        connection = None
+        cursor = None
         
         try:
             connection = self._get_connection()
@@ -539,6 +653,11 @@ class GerenciadorLeitoresRFID:
             
         except Exception as e:
             self.logger.error(f"Erro ao obter antenas com leitor: {e}")
+            
+            obsoleto = self.cache.obter_obsoleto(cache_key)
+            if obsoleto is not None:
+                return obsoleto
+            
             return {
                 'success': False,
                 'error': str(e),
@@ -554,39 +673,70 @@ class GerenciadorLeitoresRFID:
         """
         Obtém a foto mais recente de uma etiqueta específica.
         
+        A foto é servida do armazém em disco; o banco só é consultado na
+        primeira vez e, depois, a cada FOTOS_CONFIG['revalidar_etiqueta']
+        segundos para conferir (pelo índice, sem ler o BLOB) se há foto mais nova.
+        
         Args:
             etiqueta_hex (str): Código hexadecimal da etiqueta
             
         Returns:
-            dict: Resultado com foto (binário) ou erro
+            dict: Resultado com arquivo (entrada do ArmazemFotosRFID) ou erro
         """
+        chave = self.armazem_fotos.chave_etiqueta(etiqueta_hex)
+        arquivo = self.armazem_fotos.obter(chave)
+        if arquivo and time.time() - arquivo['verificado_em'] < FOTOS_CONFIG['revalidar_etiqueta']:
+            return {
+                'success': True,
+                'arquivo': arquivo,
+                'horario': arquivo['horario'],
+                'etiqueta': etiqueta_hex
+            }
+        
+        connection = None
+        cursor = None
+        
         try:
             connection = self._get_connection()
             cursor = connection.cursor(dictionary=True)
             
-            # Buscar a foto mais recente para a etiqueta
-            query = """
-                SELECT Foto, Horario
-                FROM leitoresRFID
-                WHERE EtiquetaRFID_hex = %s 
-                  AND Foto IS NOT NULL 
-                  AND LENGTH(Foto) > 0
-                ORDER BY Horario DESC
-                LIMIT 1
-            """
+            resumo = self.indice_fotos.obter(cursor, etiqueta_hex)
+            resultado = None
             
-            cursor.execute(query, (etiqueta_hex,))
-            resultado = cursor.fetchone()
+            if resumo['tem_foto'] and arquivo and arquivo['horario'] == str(resumo['ultima_foto']):
+                # Mesma foto do armazém: nada a ler do banco
+                self.armazem_fotos.confirmar(chave)
+                return {
+                    'success': True,
+                    'arquivo': arquivo,
+                    'horario': arquivo['horario'],
+                    'etiqueta': etiqueta_hex
+                }
+            
+            if resumo['tem_foto']:
+                # Busca direta pela leitura da foto mais recente (etiqueta + horário do índice)
+                resultado = self.fotos.ler(cursor, {
+                    'EtiquetaRFID_hex': etiqueta_hex,
+                    'Horario': resumo['ultima_foto']
+                })
+                
+                if not resultado:
+                    # Foto removida desde a última reconstrução do índice
+                    self.indice_fotos.invalidar()
             
             if not resultado:
+                if arquivo:
+                    self.armazem_fotos.remover(chave)
                 return {
                     'success': False,
                     'error': 'Nenhuma foto encontrada para esta etiqueta'
                 }
             
+            arquivo = self.armazem_fotos.gravar(chave, resultado['Foto'], resultado['Horario'])
+            
             return {
                 'success': True,
-                'foto': resultado['Foto'],
+                'arquivo': arquivo,
                 'horario': resultado['Horario'],
                 'etiqueta': etiqueta_hex
             }
@@ -603,6 +753,49 @@ class GerenciadorLeitoresRFID:
             if connection:
                 connection.close()
     
+    def obter_metadados_foto_etiqueta(self, etiqueta_hex):
+        """
+        Obtém hash e horário da foto mais recente de uma etiqueta, sem ler o BLOB.
+        
+        Usado para responder requisições condicionais (ETag/Last-Modified) com 304.
+        
+        Args:
+            etiqueta_hex (str): Código hexadecimal da etiqueta
+            
+        Returns:
+            dict: hash (None se a foto ainda não passou pelo armazém) e horario, ou None se não há foto
+        """
+        chave = self.armazem_fotos.chave_etiqueta(etiqueta_hex)
+        metadados = self.armazem_fotos.obter_metadados(chave)
+        if metadados and time.time() - metadados['verificado_em'] < FOTOS_CONFIG['revalidar_etiqueta']:
+            return metadados
+        
+        connection = None
+        cursor = None
+        
+        try:
+            connection = self._get_connection()
+            cursor = connection.cursor(dictionary=True)
+            
+            resumo = self.indice_fotos.obter(cursor, etiqueta_hex)
+            if not resumo['tem_foto']:
+                return None
+            
+            if metadados and metadados['horario'] == str(resumo['ultima_foto']):
+                self.armazem_fotos.confirmar(chave)
+                return metadados
+            
+            return {'hash': None, 'horario': str(resumo['ultima_foto'])}
+            
+        except Exception as e:
+            self.logger.error(f"Erro ao obter metadados da foto da etiqueta {etiqueta_hex}: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+    
     def verificar_foto_etiqueta(self, etiqueta_hex):
         """
         Verifica se uma etiqueta possui foto disponível.
@@ -613,31 +806,21 @@ class GerenciadorLeitoresRFID:
         Returns:
             dict: Informações sobre disponibilidade da foto
         """
+        connection = None
+        cursor = None
+        
         try:
             connection = self._get_connection()
             cursor = connection.cursor(dictionary=True)
             
-            # Verificar se existe foto para a etiqueta
-            query = """
-                SELECT 
-                    COUNT(*) as total_fotos,
-                    MAX(Horario) as ultima_foto
-                FROM leitoresRFID
-                WHERE EtiquetaRFID_hex = %s 
-                  AND Foto IS NOT NULL 
-                  AND LENGTH(Foto) > 0
-            """
-            
-            cursor.execute(query, (etiqueta_hex,))
-            resultado = cursor.fetchone()
-            
-            tem_foto = resultado['total_fotos'] > 0 if resultado else False
+            # Resumo de fotos pelo índice (sem varrer os BLOBs da etiqueta)
+            resumo = self.indice_fotos.obter(cursor, etiqueta_hex)
             
             return {
                 'success': True,
-                'tem_foto': tem_foto,
-                'total_fotos': resultado['total_fotos'] if resultado else 0,
-                'ultima_foto': resultado['ultima_foto'] if resultado else None,
+                'tem_foto': resumo['tem_foto'],
+                'total_fotos': resumo['total_fotos'],
+                'ultima_foto': resumo['ultima_foto'],
                 'etiqueta': etiqueta_hex
             }
             
@@ -652,4 +835,36 @@ class GerenciadorLeitoresRFID:
             if cursor:
                 cursor.close()
             if connection:
-                connection.close()
\ No newline at end of file
+                connection.close()
+    
+    def verificar_fotos_etiquetas(self, etiquetas):
+        """
+        Verifica a disponibilidade de fotos de várias etiquetas de uma vez.
+        
+        Args:
+            etiquetas (list): Códigos hexadecimais das etiquetas
+            
+        Returns:
+            dict: Resultado com fotos (etiqueta -> tem_foto, total_fotos, ultima_foto)
+        """
+        if not etiquetas:
+            return {'success': True, 'fotos': {}, 'total': 0}
+        
+        try:
+            # Todas pelo índice de fotos; a conexão só é aberta se o índice
+            # precisar atualizar (no máximo uma consulta incremental)
+            fotos = self.indice_fotos.obter_varios(None, etiquetas)
+            
+            return {
+                'success': True,
+                'fotos': fotos,
+                'total': len(fotos)
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Erro ao verificar fotos de {len(etiquetas)} etiquetas: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'fotos': {}
+            }
\ No newline at end of file
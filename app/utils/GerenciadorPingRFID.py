@@ -2,10 +2,14 @@
 import mysql.connector
 from mysql.connector import Error
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from ..config import MYSQL_CONFIG
-import json
-import hashlib
+from .PoolConexoesMySQL import PoolConexoesMySQL
+from .SerializacaoJSON import abrir_resultado
+from .CacheRFID import CacheRFID, construir_chave_cache, normalizar_parametros_cache
+from .CursorPaginacao import cursor_seguinte, decodificar_cursor, montar_condicao_seek, pular_entregues
+from .ArmazemFotosRFID import ArmazemFotosRFID
+from .RepositorioFotosRFID import RepositorioFotosRFID
 import re
 
 class GerenciadorPingRFID:
@@ -13,6 +17,11 @@ class GerenciadorPingRFID:
     
     _instance = None
     
+    # Ordenação das listagens (Horario + desempate), usada também pelo cursor de paginação.
+    # A tupla não é única (sem chave primária): o cursor leva a contagem de repetidas (CursorPaginacao).
+    # Requer idx_pings_ordenacao (scripts/indices_leituras.sql) para não ordenar em memória
+    COLUNAS_ORDENACAO = ['Horario', 'Local', 'antena']
+    
     @classmethod
     def get_instance(cls):
         """Retorna a instância única do gerenciador (Singleton)."""
@@ -28,41 +37,46 @@ class GerenciadorPingRFID:
         self.logger = logging.getLogger('controlerfid.ping')
         self.config = MYSQL_CONFIG
         
-        # Sistema de cache
-        self.cache = {}
-        self.cache_timeout = timedelta(minutes=3)
+        # Pool próprio: a sessão de cada conexão física recebe o MAX_EXECUTION_TIME uma única vez
+        # 60 segundos para queries complexas de PING (a foto só é lida por PING, ver RepositorioFotosRFID)
+        self.pool = PoolConexoesMySQL.get_pool(
+            'ping',
+            sessao=["SET SESSION MAX_EXECUTION_TIME=60000"],  # 60 segundos em ms
+            parametros={
+                'connection_timeout': min(self.config.get('connection_timeout', 10), 5),  # Max 5 segundos
+                'use_pure': False  # Usar driver C mais rápido
+            }
+        )
+        
+        # Sistema de cache (LRU + TTL compartilhado, namespace próprio)
+        self.cache = CacheRFID.get_instance().namespace('ping', ttl=180)  # 3 minutos
         
-        self._cache = {}
-        self._cache_timeout = 180  # 3 minutos
-    
-    def _get_cache_key(self, prefix, params=None):
-        """Gera uma chave única para o cache baseada nos parâmetros."""
-        if params:
-            params_str = json.dumps(params, sort_keys=True)
-            params_hash = hashlib.md5(params_str.encode()).hexdigest()
-            return f"{prefix}_{params_hash}"
-        return prefix
+        # Fotos fora da linha (fotosRFID), com a coluna Foto ainda aceita
+        self.fotos = RepositorioFotosRFID('pingsRFID')
+        
+        # Fotos já lidas do banco, servidas do disco (a foto de um PING não muda)
+        self.armazem_fotos = ArmazemFotosRFID.get_instance()
     
     def _get_from_cache(self, key):
         """Obtém dados do cache se ainda válidos."""
-        if key in self.cache:
-            cached_data, timestamp = self.cache[key]
-            if datetime.now() - timestamp < self.cache_timeout:
-                self.logger.debug(f"Cache hit para key: {key}")
-                return cached_data
-            else:
-                del self.cache[key]
-                self.logger.debug(f"Cache expirado para key: {key}")
-        return None
+        cached_data = self.cache.obter(key)
+        if cached_data is not None:
+            self.logger.debug(f"Cache hit para key: {key}")
+        return cached_data
     
-    def _set_cache(self, key, data):
-        """Armazena dados no cache."""
-        self.cache[key] = (data, datetime.now())
+    def _set_cache(self, key, data, tags=None):
+        """Armazena dados no cache, com tags de dependência para invalidação seletiva."""
+        self.cache.definir(key, data, tags=tags)
         self.logger.debug(f"Dados armazenados no cache para key: {key}")
     
     def limpar_cache(self):
         """Limpa todo o cache."""
-        self.cache.clear()
+        self.cache.limpar()
+    
+    def _invalidar_cache(self, *tags):
+        """Remove do cache (de todos os gerenciadores) as entradas com as tags informadas."""
+        removidas = self.cache.invalidar(*tags)
+        self.logger.debug(f"Cache invalidado para tags {tags}: {removidas} entradas")
     
     def _converter_horario_para_sql(self, horario):
         """
@@ -95,55 +109,52 @@ class GerenciadorPingRFID:
             return str(horario)
     
     def _get_connection(self):
-        """Cria e retorna uma conexão com o MySQL com timeouts agressivos."""
+        """Obtém uma conexão do pool de PING (timeouts agressivos já aplicados na sessão)."""
         try:
-            connection_params = {
-                'host': self.config['host'],
-                'database': self.config['database'],
-                'user': self.config['user'],
-                'password': self.config['password'],
-                'connection_timeout': min(self.config.get('connection_timeout', 10), 5),  # Max 5 segundos
-                'autocommit': True,
-                'use_pure': False  # Usar driver C mais rápido
-            }
-            
-            # Desabilita verificação SSL apenas para domínios tce.go.gov.br
-            if 'tce.go.gov.br' in self.config['host'].lower():
-                connection_params['ssl_disabled'] = True
-            
-            connection = mysql.connector.connect(**connection_params)
-            
-            # Configurar timeout de execução de query
-            # 60 segundos para queries complexas de PING (incluindo ORDER BY DESC com BLOB)
-            cursor = connection.cursor()
-            cursor.execute("SET SESSION MAX_EXECUTION_TIME=60000")  # 60 segundos em ms
-            cursor.close()
-            
-            return connection
+            return self.pool.obter_conexao()
         except Error as e:
             self.logger.error(f"Erro ao conectar ao MySQL: {e}")
             raise
     
-    def obter_pings(self, filtros=None, limite=100, offset=0, force_refresh=False):
+    @staticmethod
+    def _chave_ordenacao(ping):
+        """Valores de COLUNAS_ORDENACAO de uma linha de pingsRFID."""
+        return [ping['Horario'], ping['Local'], ping['antena']]
+
+    def obter_pings(self, filtros=None, limite=100, offset=0, force_refresh=False, cursor_paginacao=None):
         """
         Obtém lista de registros PING com filtros opcionais.
         
         Args:
             filtros (dict): Dicionário com filtros (local, antena, horario_inicio, horario_fim)
             limite (int): Número máximo de registros
-            offset (int): Deslocamento para paginação
+            offset (int): Deslocamento para paginação (ignorado no modo cursor)
             force_refresh (bool): Força atualização ignorando o cache
+            cursor_paginacao (str): Cursor da página (next_cursor da resposta anterior;
+                '' = primeira página no modo cursor; None = modo offset)
             
         Returns:
-            dict: Resultado com pings e total
+            dict: Resultado com pings, total e next_cursor
+            
+        Raises:
+            ValueError: Se o cursor de paginação for inválido
         """
+        modo_cursor = cursor_paginacao is not None
+        posicao = None
+        entregues = None
+        if cursor_paginacao:
+            posicao, entregues = decodificar_cursor(cursor_paginacao, len(self.COLUNAS_ORDENACAO))
+        
+        # Filtros normalizados uma vez, usados nas chaves da página e do total
+        filtros_chave = normalizar_parametros_cache(filtros)
         cache_params = {
-            'filtros': filtros or {},
+            'filtros': filtros_chave,
             'limite': limite,
-            'offset': offset
+            'offset': 0 if modo_cursor else offset,
+            'cursor': cursor_paginacao
         }
-        cache_key = self._get_cache_key('pings', cache_params)
-        total_cache_key = self._get_cache_key('pings_total', {'filtros': filtros or {}})
+        cache_key = construir_chave_cache('pings', cache_params)
+        total_cache_key = construir_chave_cache('pings_total', {'filtros': filtros_chave})
         
         # Verificar cache
         if not force_refresh:
@@ -151,12 +162,12 @@ class GerenciadorPingRFID:
             if cached_result:
                 cached_total = self._get_from_cache(total_cache_key)
                 if cached_total:
-                    cached_result['total'] = cached_total
-                cached_result['from_cache'] = True
-                return cached_result
+                    return abrir_resultado(cached_result, total=cached_total, from_cache=True)
+                return abrir_resultado(cached_result, from_cache=True)
         
         total = 0
         pings = []
+        next_cursor = None
         
         try:
             where_conditions = []
@@ -181,6 +192,17 @@ class GerenciadorPingRFID:
                     params.append(filtros['horario_fim'])
 
             where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+            
+            # Modo cursor: a página começa logo após a última linha da anterior
+            page_clause = where_clause
+            page_params = params.copy()
+            if posicao:
+                # A tupla de ordenação se repete: inclui a posição e descarta as já entregues
+                condicao_seek, params_seek = montar_condicao_seek(
+                    self.COLUNAS_ORDENACAO, posicao, inclusiva=bool(entregues)
+                )
+                page_clause = f"{where_clause} AND {condicao_seek}"
+                page_params.extend(params_seek)
 
             connection = None
             cursor = None
@@ -195,21 +217,31 @@ class GerenciadorPingRFID:
                         Local,
                         antena
                     FROM pingsRFID
-                    WHERE {where_clause}
-                    ORDER BY Horario DESC
-                    LIMIT %s OFFSET %s
+                    WHERE {page_clause}
+                    ORDER BY {', '.join(f'{coluna} DESC' for coluna in self.COLUNAS_ORDENACAO)}
+                    LIMIT %s
                 """
                 
-                query_params = params.copy()
-                query_params.extend([limite, offset])
+                query_params = page_params
+                query_params.append(limite + (entregues or 0))
+                if not modo_cursor:
+                    data_query += " OFFSET %s"
+                    query_params.append(offset)
                 
                 self.logger.debug(f"Query: {data_query}, Params: {query_params}")
                 
                 cursor.execute(data_query, query_params)
                 pings_raw = cursor.fetchall()
+                if entregues:
+                    pings_raw = pular_entregues(pings_raw, posicao, entregues, self._chave_ordenacao)[:limite]
+                
+                # Página cheia: pode haver mais registros após a última linha
+                if len(pings_raw) == limite:
+                    next_cursor = cursor_seguinte(pings_raw, self._chave_ordenacao, posicao, entregues or 0)
                 
                 # COUNT na primeira página ou se forçar refresh
-                if offset == 0 or force_refresh:
+                primeira_pagina = not posicao if modo_cursor else offset == 0
+                if primeira_pagina or force_refresh:
                     count_query = f"""
                         SELECT COUNT(*) as total 
                         FROM pingsRFID
@@ -267,6 +299,8 @@ class GerenciadorPingRFID:
                 'total': total,
                 'limite': limite,
                 'offset': offset,
+                'paginacao': 'cursor' if modo_cursor else 'offset',
+                'next_cursor': next_cursor,
                 'from_cache': False
             }
             
@@ -289,19 +323,32 @@ class GerenciadorPingRFID:
         
         Args:
             filtros (dict): Filtros opcionais
-            force_refresh (bool): Força atualização ignorando o cache
+            force_refresh (bool): Força atualização (ignorado se o valor em cache tem poucos segundos)
             
         Returns:
             dict: Estatísticas dos PINGs
         """
-        cache_key = self._get_cache_key('estatisticas_pings', filtros)
+        cache_key = construir_chave_cache('estatisticas_pings', filtros)
         
-        if not force_refresh:
-            cached_result = self._get_from_cache(cache_key)
-            if cached_result:
-                cached_result['from_cache'] = True
-                return cached_result
+        # Stale-while-revalidate: expirado é servido na hora (stale=True) e recalculado em
+        # segundo plano; ausências compartilham uma única consulta
+        return self.cache.obter_swr(
+            cache_key,
+            lambda: self._calcular_estatisticas_pings(filtros, cache_key),
+            force_refresh=force_refresh
+        )
+    
+    def _calcular_estatisticas_pings(self, filtros, cache_key):
+        """
+        Executa a consulta de estatísticas de PING e armazena o resultado no cache.
         
+        Args:
+            filtros (dict): Filtros opcionais
+            cache_key: Chave de cache do resultado (ver construir_chave_cache)
+            
+        Returns:
+            dict: Estatísticas dos PINGs
+        """
         try:
             connection = None
             cursor = None
@@ -377,6 +424,12 @@ class GerenciadorPingRFID:
             error_msg = str(db_error)
             if 'max_execution_time' in error_msg.lower() or 'timeout' in error_msg.lower():
                 self.logger.warning(f"Timeout na query de estatísticas PING: {db_error}")
+                
+                # Preferir o último resultado conhecido (mesmo expirado) a zeros
+                obsoleto = self.cache.obter_obsoleto(cache_key)
+                if obsoleto is not None:
+                    return obsoleto
+                
                 return {
                     'success': True,
                     'estatisticas': {
@@ -418,7 +471,14 @@ class GerenciadorPingRFID:
         if not force_refresh:
             cached_result = self._get_from_cache(cache_key)
             if cached_result:
-                return cached_result
+                return abrir_resultado(cached_result)
+        
+        return self.cache.coalescer(cache_key, lambda: self._calcular_locais_com_antena(cache_key))
+    
+    def _calcular_locais_com_antena(self, cache_key):
+        """Consulta os locais/antenas de PING e armazena o resultado no cache."""
+        connection = None
+        cursor = None
         
         try:
             connection = self._get_connection()
@@ -465,6 +525,11 @@ class GerenciadorPingRFID:
             
         except Exception as e:
             self.logger.error(f"Erro ao obter locais PING: {e}")
+            
+            obsoleto = self.cache.obter_obsoleto(cache_key)
+            if obsoleto is not None:
+                return obsoleto
+            
             return {
                 'success': False,
                 'error': str(e),
@@ -480,37 +545,48 @@ class GerenciadorPingRFID:
         """
         Obtém a foto de um PING específico.
         
+        A foto de um PING não muda: depois da primeira leitura do banco ela é
+        servida do armazém em disco.
+        
         Args:
             local (str): Local do ping (B1, B2 ou S1)
             antena (str): Número da antena
             horario (str): Horário do PING
             
         Returns:
-            dict: Resultado com foto (binário) ou erro
+            dict: Resultado com arquivo (entrada do ArmazemFotosRFID) ou erro
         """
+        if not (local and antena and horario):
+            return {
+                'success': False,
+                'error': 'Parâmetros insuficientes. Forneça (local, antena, horario)'
+            }
+        
+        horario_sql = self._converter_horario_para_sql(horario)
+        chave = self.armazem_fotos.chave_ping(local, antena, horario_sql)
+        arquivo = self.armazem_fotos.obter(chave)
+        if arquivo:
+            return {
+                'success': True,
+                'arquivo': arquivo,
+                'horario': arquivo['horario'],
+                'local': local,
+                'antena': antena
+            }
+        
+        connection = None
+        cursor = None
+        
         try:
             connection = self._get_connection()
             cursor = connection.cursor(dictionary=True)
             
-            if local and antena and horario:
-                horario_sql = self._converter_horario_para_sql(horario)
-                
-                query = """
-                    SELECT Foto, Horario, Local, antena
-                    FROM pingsRFID
-                    WHERE Local = %s
-                      AND antena = %s
-                      AND Horario = %s
-                    LIMIT 1
-                """
-                cursor.execute(query, (local, antena, horario_sql))
-            else:
-                return {
-                    'success': False,
-                    'error': 'Parâmetros insuficientes. Forneça (local, antena, horario)'
-                }
-            
-            resultado = cursor.fetchone()
+            resultado = self.fotos.ler(
+                cursor,
+                {'Local': local, 'antena': antena, 'Horario': horario_sql},
+                colunas=('Horario', 'Local', 'antena'),
+                exigir_foto=False
+            )
             
             if not resultado:
                 return {
@@ -529,9 +605,11 @@ class GerenciadorPingRFID:
                     'antena': resultado['antena']
                 }
             
+            arquivo = self.armazem_fotos.gravar(chave, resultado['Foto'], resultado['Horario'])
+            
             return {
                 'success': True,
-                'foto': resultado['Foto'],
+                'arquivo': arquivo,
                 'horario': resultado['Horario'],
                 'local': resultado['Local'],
                 'antena': resultado['antena']
@@ -550,6 +628,27 @@ class GerenciadorPingRFID:
             if connection:
                 connection.close()
     
+    def obter_metadados_foto_ping(self, local=None, antena=None, horario=None):
+        """
+        Obtém hash e horário da foto de um PING, sem ler o BLOB.
+        
+        Usado para responder requisições condicionais (ETag/Last-Modified) com 304.
+        A foto de um PING não muda, então basta o índice do armazém.
+        
+        Args:
+            local (str): Local do ping
+            antena (str): Número da antena
+            horario (str): Horário do PING
+            
+        Returns:
+            dict: hash e horario, ou None se a foto ainda não passou pelo armazém
+        """
+        if not (local and antena and horario):
+            return None
+        
+        horario_sql = self._converter_horario_para_sql(horario)
+        return self.armazem_fotos.obter_metadados(self.armazem_fotos.chave_ping(local, antena, horario_sql))
+    
     def verificar_foto_ping(self, local=None, antena=None, horario=None):
         """
         Verifica se um PING possui foto disponível.
@@ -562,6 +661,9 @@ class GerenciadorPingRFID:
         Returns:
             dict: Informações sobre disponibilidade da foto
         """
+        connection = None
+        cursor = None
+        
         try:
             connection = self._get_connection()
             cursor = connection.cursor(dictionary=True)
@@ -569,7 +671,7 @@ class GerenciadorPingRFID:
             if local and antena and horario:
                 horario_sql = self._converter_horario_para_sql(horario)
                 
-                query = """
+                query = f"""
                     SELECT 
                         1 as tem_foto,
                         Horario as ultima_foto
@@ -577,7 +679,7 @@ class GerenciadorPingRFID:
                     WHERE Local = %s
                       AND antena = %s
                       AND Horario = %s
-                      AND Foto IS NOT NULL
+                      AND {self.fotos.condicao_foto(cursor)}
                     LIMIT 1
                 """
                 cursor.execute(query, (local, antena, horario_sql))
@@ -612,3 +714,86 @@ class GerenciadorPingRFID:
                 cursor.close()
             if connection:
                 connection.close()
+    
+    def verificar_fotos_pings(self, pings):
+        """
+        Verifica a disponibilidade de fotos de vários PINGs de uma vez.
+        
+        PINGs cuja foto já passou pelo armazém são respondidos pelo índice do
+        armazém; os demais são verificados em uma única consulta.
+        
+        Args:
+            pings (list): Dicts com local, antena e horario
+            
+        Returns:
+            dict: Resultado com fotos (lista na mesma ordem da entrada, com
+                local, antena, horario, tem_foto e ultima_foto)
+        """
+        fotos = []
+        pendentes = {}  # (local, antena, horario_sql) -> posições em fotos
+        
+        for ping in pings:
+            local = ping.get('local')
+            antena = ping.get('antena')
+            horario = ping.get('horario')
+            item = {
+                'local': local,
+                'antena': antena,
+                'horario': horario,
+                'tem_foto': False,
+                'ultima_foto': None
+            }
+            
+            if local and antena is not None and horario:
+                horario_sql = self._converter_horario_para_sql(horario)
+                metadados = self.armazem_fotos.obter_metadados(
+                    self.armazem_fotos.chave_ping(local, antena, horario_sql)
+                )
+                if metadados:
+                    item['tem_foto'] = True
+                    item['ultima_foto'] = datetime.fromisoformat(metadados['horario']) if metadados['horario'] else None
+                else:
+                    pendentes.setdefault((str(local), str(antena), horario_sql), []).append(len(fotos))
+            
+            fotos.append(item)
+        
+        if not pendentes:
+            return {'success': True, 'fotos': fotos, 'total': len(fotos)}
+        
+        connection = None
+        cursor = None
+        
+        try:
+            connection = self._get_connection()
+            cursor = connection.cursor(dictionary=True)
+            
+            marcadores = ', '.join(['(%s, %s, %s)'] * len(pendentes))
+            query = f"""
+                SELECT Local, antena, Horario
+                FROM pingsRFID
+                WHERE (Local, antena, Horario) IN ({marcadores})
+                  AND {self.fotos.condicao_foto(cursor)}
+            """
+            params = [valor for chave in pendentes for valor in chave]
+            cursor.execute(query, params)
+            
+            for linha in cursor.fetchall():
+                chave = (str(linha['Local']), str(linha['antena']), linha['Horario'].strftime('%Y-%m-%d %H:%M:%S'))
+                for posicao in pendentes.get(chave, ()):
+                    fotos[posicao]['tem_foto'] = True
+                    fotos[posicao]['ultima_foto'] = linha['Horario']
+            
+            return {'success': True, 'fotos': fotos, 'total': len(fotos)}
+            
+        except Exception as e:
+            self.logger.error(f"Erro ao verificar fotos de {len(pings)} PINGs: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'fotos': []
+            }
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
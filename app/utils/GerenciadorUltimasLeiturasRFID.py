@@ -0,0 +1,362 @@
+# app/utils/GerenciadorUltimasLeiturasRFID.py
+from mysql.connector import Error
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from ..config import MYSQL_CONFIG, ULTIMAS_LEITURAS_CONFIG
+from .PoolConexoesMySQL import PoolConexoesMySQL
+
+
+class GerenciadorUltimasLeiturasRFID:
+    """
+    Materialização das últimas leituras por etiqueta e por (etiqueta, leitor).
+
+    Em vez de agregar meses de leitoresRFID a cada consulta, as tabelas
+    ultimasLeiturasRFID e ultimasLeiturasLeitorRFID são atualizadas de forma
+    incremental a partir da marca d'água (maior Horario já processado).
+    Responde "onde a etiqueta foi vista por último" com uma busca por chave
+    e alimenta o cruzamento de leituras históricas dos inventários.
+
+    A carga inicial (dias_carga_inicial dias de histórico) roda em uma thread
+    iniciada junto com o gerenciador, ou antes pelo scripts/ultimas_leituras.sql;
+    consultas nunca a executam dentro da requisição.
+
+    Limitação: a marca segue o Horario das leituras, não a ordem de inserção
+    (leitoresRFID não tem coluna autoincremento). Uma leitura que chega
+    atrasada com Horario anterior à marca (leitor que acumulou leituras
+    offline) só entra pela sobreposição de cada atualização ou pela
+    reconciliação periódica, que reprocessa os últimos dias_reconciliacao
+    dias. Atrasos maiores que essa janela exigem a reconstrução completa
+    (ver scripts/ultimas_leituras.sql).
+    """
+
+    _instance = None
+
+    NOME_MARCA = 'ultimas_leituras'
+
+    @classmethod
+    def get_instance(cls):
+        """Retorna a instância única do gerenciador (Singleton)."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, intervalo_minimo=30, espera_forcada=60, config=None):
+        """
+        Inicializa o gerenciador.
+
+        Args:
+            intervalo_minimo (int): Segundos mínimos entre atualizações incrementais
+            espera_forcada (int): Segundos que uma atualização forçada espera por outra em andamento
+            config (dict): Sobrescreve chaves de ULTIMAS_LEITURAS_CONFIG (dias_carga_inicial,
+                sobreposicao_segundos, intervalo_reconciliacao, dias_reconciliacao)
+        """
+        if GerenciadorUltimasLeiturasRFID._instance is not None:
+            raise Exception("Use get_instance() para obter a instância")
+
+        self.logger = logging.getLogger('controlerfid.ultimas_leituras')
+        self.config = MYSQL_CONFIG
+        self.pool = PoolConexoesMySQL.get_pool()
+
+        config_ultimas = dict(ULTIMAS_LEITURAS_CONFIG)
+        if config:
+            config_ultimas.update(config)
+
+        self.dias_carga_inicial = config_ultimas['dias_carga_inicial']
+        self.sobreposicao = timedelta(seconds=config_ultimas['sobreposicao_segundos'])
+        self.intervalo_reconciliacao = config_ultimas['intervalo_reconciliacao']
+        self.janela_reconciliacao = timedelta(days=config_ultimas['dias_reconciliacao'])
+        self.intervalo_minimo = intervalo_minimo
+        self.espera_forcada = espera_forcada
+
+        self._lock = threading.Lock()
+        self._atualizado_em = 0.0
+        self._tabelas_verificadas = False
+        self._carga_concluida = False
+        self._thread_carga = None
+        self._parar = threading.Event()
+
+        self.iniciar_carga_inicial()
+
+        if self.intervalo_reconciliacao > 0:
+            threading.Thread(
+                target=self._reconciliar_periodicamente,
+                name='ultimas-leituras-reconciliacao',
+                daemon=True
+            ).start()
+
+        self.logger.info("Gerenciador de Últimas Leituras RFID inicializado")
+
+    def _get_connection(self):
+        """Obtém uma conexão do pool compartilhado."""
+        try:
+            return self.pool.obter_conexao()
+        except Error as e:
+            self.logger.error(f"Erro ao conectar ao MySQL: {e}")
+            raise
+
+    def _garantir_tabelas(self, cursor):
+        """Cria as tabelas da materialização se ainda não existirem (ver scripts/ultimas_leituras.sql)."""
+        if self._tabelas_verificadas:
+            return
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ultimasLeiturasLeitorRFID (
+                EtiquetaRFID_hex VARCHAR(64) NOT NULL,
+                CodigoLeitor VARCHAR(32) NOT NULL,
+                Horario DATETIME NOT NULL,
+                PRIMARY KEY (EtiquetaRFID_hex, CodigoLeitor),
+                KEY idx_ultimas_leitor_horario (Horario)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ultimasLeiturasRFID (
+                EtiquetaRFID_hex VARCHAR(64) NOT NULL,
+                CodigoLeitor VARCHAR(32) NOT NULL,
+                Horario DATETIME NOT NULL,
+                PRIMARY KEY (EtiquetaRFID_hex),
+                KEY idx_ultimas_horario (Horario)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS marcasMaterializacaoRFID (
+                Nome VARCHAR(64) NOT NULL,
+                Horario DATETIME NOT NULL,
+                AtualizadoEm DATETIME NOT NULL,
+                PRIMARY KEY (Nome)
+            )
+        """)
+        self._tabelas_verificadas = True
+
+    def iniciar_carga_inicial(self):
+        """
+        Executa a primeira atualização (carga inicial, se ainda não houver marca) em segundo plano.
+
+        Returns:
+            bool: True se uma nova thread foi iniciada
+        """
+        if self._carga_concluida or (self._thread_carga and self._thread_carga.is_alive()):
+            return False
+
+        self._thread_carga = threading.Thread(
+            target=self._executar_carga_inicial,
+            name='ultimas-leituras-carga',
+            daemon=True
+        )
+        self._thread_carga.start()
+        return True
+
+    def _executar_carga_inicial(self):
+        """Corpo da thread de carga inicial."""
+        try:
+            resultado = self.atualizar(forcar=True, espera=None)
+            if not resultado['success']:
+                self.logger.error(f"Carga inicial das últimas leituras falhou: {resultado.get('error')}")
+        except Exception as e:
+            self.logger.error(f"Erro na carga inicial das últimas leituras: {e}")
+
+    def _reconciliar_periodicamente(self):
+        """Reprocessa a janela de reconciliação a cada intervalo_reconciliacao segundos."""
+        while not self._parar.wait(self.intervalo_reconciliacao):
+            try:
+                resultado = self.atualizar(forcar=True, espera=None, reconciliar=True)
+                if not resultado['success']:
+                    self.logger.error(f"Reconciliação das últimas leituras falhou: {resultado.get('error')}")
+            except Exception as e:
+                self.logger.error(f"Erro na reconciliação das últimas leituras: {e}")
+
+    def atualizar(self, forcar=False, connection=None, cursor=None, carga_inicial=True, espera=-1,
+                  reconciliar=False):
+        """
+        Incorpora as leituras novas à materialização.
+
+        Sem forcar, quem chega durante uma atualização em andamento usa o estado
+        atual. Com forcar, espera a atualização em andamento terminar e atualiza
+        em seguida; se a espera esgotar, retorna success False para que o
+        chamador não trate a materialização como atual.
+
+        Args:
+            forcar (bool): Atualiza mesmo dentro do intervalo mínimo, esperando a atualização em andamento
+            connection: Conexão MySQL (opcional, reutiliza se fornecida)
+            cursor: Cursor MySQL (opcional, reutiliza se fornecido)
+            carga_inicial (bool): Permite executar a carga inicial aqui; se False e ainda não
+                houver marca, a carga é disparada em segundo plano e nada é atualizado
+            espera (float): Segundos de espera com forcar (padrão: espera_forcada; None = sem limite)
+            reconciliar (bool): Reprocessa os últimos dias_reconciliacao dias antes da marca,
+                mesmo sem leituras novas (incorpora leituras que chegaram atrasadas)
+
+        Returns:
+            dict: Resultado com a nova marca d'água e as linhas afetadas
+        """
+        if not forcar and time.monotonic() - self._atualizado_em < self.intervalo_minimo:
+            return {'success': True, 'atualizado': False}
+
+        fechar_conexao = connection is None
+        fechar_cursor = cursor is None
+
+        if forcar:
+            if espera == -1:
+                espera = self.espera_forcada
+            adquirido = self._lock.acquire() if espera is None else self._lock.acquire(timeout=espera)
+            if not adquirido:
+                self.logger.warning(f"Atualização forçada desistiu após {espera} s aguardando outra em andamento")
+                return {'success': False, 'error': 'Atualização das últimas leituras em andamento'}
+        elif not self._lock.acquire(blocking=False):
+            return {'success': True, 'atualizado': False}
+
+        try:
+            if fechar_conexao:
+                connection = self._get_connection()
+            if fechar_cursor:
+                cursor = connection.cursor()
+
+            inicio = time.perf_counter()
+            self._garantir_tabelas(cursor)
+
+            cursor.execute("SELECT Horario FROM marcasMaterializacaoRFID WHERE Nome = %s", (self.NOME_MARCA,))
+            linha = cursor.fetchone()
+            marca = linha[0] if linha else None
+
+            # Sem marca também quando uma carga feita na transação de quem chamou foi desfeita
+            self._carga_concluida = marca is not None
+            if marca is None and not carga_inicial:
+                self.iniciar_carga_inicial()
+                return {'success': True, 'atualizado': False, 'marca': None}
+
+            cursor.execute("SELECT MAX(Horario) FROM leitoresRFID")
+            linha = cursor.fetchone()
+            limite = linha[0] if linha else None
+
+            # Leituras atrasadas não mudam MAX(Horario): a reconciliação roda mesmo assim
+            if limite is None or (marca is not None and limite <= marca and not reconciliar):
+                self._atualizado_em = time.monotonic()
+                return {'success': True, 'atualizado': False, 'marca': marca}
+
+            if marca is None:
+                desde = datetime.now() - timedelta(days=self.dias_carga_inicial)
+            elif reconciliar:
+                desde = min(marca, limite) - self.janela_reconciliacao
+            else:
+                desde = marca - self.sobreposicao
+            limite = max(limite, marca) if marca is not None else limite
+
+            # Última leitura por (etiqueta, leitor) no intervalo, mesclada com GREATEST (idempotente)
+            cursor.execute("""
+                INSERT INTO ultimasLeiturasLeitorRFID (EtiquetaRFID_hex, CodigoLeitor, Horario)
+                SELECT EtiquetaRFID_hex, CodigoLeitor, MAX(Horario)
+                FROM leitoresRFID
+                WHERE Horario > %s AND Horario <= %s AND RSSI != 0
+                GROUP BY EtiquetaRFID_hex, CodigoLeitor
+                ON DUPLICATE KEY UPDATE Horario = GREATEST(Horario, VALUES(Horario))
+            """, (desde, limite))
+            por_leitor = cursor.rowcount
+
+            # Última leitura por etiqueta: o leitor acompanha o maior Horario
+            # (CodigoLeitor é atualizado antes de Horario, comparando com o valor antigo)
+            cursor.execute("""
+                INSERT INTO ultimasLeiturasRFID (EtiquetaRFID_hex, CodigoLeitor, Horario)
+                SELECT EtiquetaRFID_hex, CodigoLeitor, Horario
+                FROM ultimasLeiturasLeitorRFID
+                WHERE Horario > %s
+                ON DUPLICATE KEY UPDATE
+                    CodigoLeitor = IF(VALUES(Horario) > Horario, VALUES(CodigoLeitor), CodigoLeitor),
+                    Horario = GREATEST(Horario, VALUES(Horario))
+            """, (desde,))
+            por_etiqueta = cursor.rowcount
+
+            cursor.execute("""
+                INSERT INTO marcasMaterializacaoRFID (Nome, Horario, AtualizadoEm)
+                VALUES (%s, %s, NOW())
+                ON DUPLICATE KEY UPDATE Horario = VALUES(Horario), AtualizadoEm = VALUES(AtualizadoEm)
+            """, (self.NOME_MARCA, limite))
+
+            self._carga_concluida = True
+            self._atualizado_em = time.monotonic()
+            tempo_ms = round((time.perf_counter() - inicio) * 1000, 2)
+            self.logger.info(
+                f"Últimas leituras {'reconciliadas desde ' + str(desde) + ' e ' if reconciliar else ''}"
+                f"atualizadas até {limite} ({por_leitor} por leitor, {por_etiqueta} por etiqueta) em {tempo_ms} ms"
+            )
+
+            return {
+                'success': True,
+                'atualizado': True,
+                'marca': limite,
+                'linhas_por_leitor': por_leitor,
+                'linhas_por_etiqueta': por_etiqueta,
+                'tempo_ms': tempo_ms
+            }
+
+        except Error as e:
+            self.logger.error(f"Erro ao atualizar últimas leituras: {e}")
+            return {'success': False, 'error': str(e)}
+        finally:
+            self._lock.release()
+            if fechar_cursor and cursor:
+                cursor.close()
+            if fechar_conexao and connection:
+                connection.close()
+
+    def obter_ultima_leitura(self, etiqueta_hex):
+        """
+        Informa onde e quando a etiqueta foi vista por último.
+
+        Args:
+            etiqueta_hex (str): Código hexadecimal da etiqueta
+
+        Returns:
+            dict: Última leitura geral e a última leitura em cada leitor
+        """
+        connection = None
+        cursor = None
+
+        try:
+            connection = self._get_connection()
+            cursor = connection.cursor(dictionary=True)
+
+            # atualizar() lê tuplas: usa um cursor próprio na mesma conexão.
+            # A carga inicial nunca roda aqui: sem marca, é disparada em segundo plano.
+            atualizacao = self.atualizar(connection=connection, carga_inicial=False)
+            if not atualizacao['success']:
+                return atualizacao
+
+            cursor.execute("""
+                SELECT CodigoLeitor, Horario
+                FROM ultimasLeiturasRFID
+                WHERE EtiquetaRFID_hex = %s
+            """, (etiqueta_hex,))
+            ultima = cursor.fetchone()
+
+            cursor.execute("""
+                SELECT CodigoLeitor, Horario
+                FROM ultimasLeiturasLeitorRFID
+                WHERE EtiquetaRFID_hex = %s
+                ORDER BY Horario DESC
+            """, (etiqueta_hex,))
+            por_leitor = cursor.fetchall()
+
+            for leitura in ([ultima] if ultima else []) + por_leitor:
+                if isinstance(leitura['Horario'], datetime):
+                    leitura['horario_formatado'] = leitura['Horario'].strftime('%d/%m/%Y %H:%M:%S')
+
+            return {
+                'success': True,
+                'etiqueta': etiqueta_hex,
+                'encontrada': ultima is not None,
+                'carga_inicial_pendente': not self._carga_concluida,
+                'ultima_leitura': ultima,
+                'por_leitor': por_leitor
+            }
+
+        except Error as e:
+            self.logger.error(f"Erro ao obter última leitura da etiqueta {etiqueta_hex}: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
@@ -0,0 +1,240 @@
+# app/utils/IndiceFotosRFID.py
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+class IndiceFotosRFID:
+    """
+    Resumo em memória das fotos por etiqueta (tem_foto, ultima_foto, total_fotos).
+
+    Substitui as varreduras de BLOB em leitoresRFID (EXISTS/COUNT com
+    LENGTH(Foto) por etiqueta): o índice é montado uma vez com um GROUP BY e,
+    depois, atualizado só com as leituras posteriores à marca d'água
+    (MAX(Horario) das fotos já indexadas). Uma reconstrução completa periódica
+    corrige fotos removidas ou inseridas fora de ordem; com obter_conexao ela
+    roda em segundo plano e as consultas usam o índice anterior enquanto isso.
+
+    As etiquetas são indexadas em maiúsculas (a comparação no MySQL não
+    diferencia maiúsculas de minúsculas).
+    """
+
+    CONDICAO_FOTO = "Foto IS NOT NULL AND LENGTH(Foto) > 0"
+
+    def __init__(self, intervalo_atualizacao=30, intervalo_reconstrucao=1800, repositorio=None,
+                 obter_conexao=None):
+        """
+        Args:
+            intervalo_atualizacao (int): Segundos mínimos entre atualizações incrementais
+            intervalo_reconstrucao (int): Segundos entre reconstruções completas
+            repositorio (RepositorioFotosRFID): Define a condição "tem foto" (FotoTamanho
+                após a migração para fotosRFID); sem ele, usa a coluna Foto
+            obter_conexao (callable): Fornece uma conexão MySQL para as reconstruções em
+                segundo plano; sem ele, reconstrói na thread que consulta
+        """
+        self.logger = logging.getLogger('controlerfid.indice_fotos')
+        self.intervalo_atualizacao = intervalo_atualizacao
+        self.intervalo_reconstrucao = intervalo_reconstrucao
+        self.repositorio = repositorio
+        self.obter_conexao = obter_conexao
+
+        self._lock = threading.Lock()
+        self._lock_atualizacao = threading.Lock()
+        self._fotos = {}  # etiqueta -> [total_fotos, ultima_foto]
+        self._marca = None
+        self._construido_em = None
+        self._atualizado_em = 0.0
+        self._reconstrucao_pendente = False
+
+    @staticmethod
+    def _normalizar(etiqueta_hex):
+        return (etiqueta_hex or '').strip().upper()
+
+    def _reconstrucao_vencida(self, agora):
+        return self._reconstrucao_pendente or agora - self._construido_em > self.intervalo_reconstrucao
+
+    def atualizar(self, cursor, forcar=False):
+        """
+        Atualiza o índice se o intervalo já passou (ou se forcar=True).
+
+        Se outra thread já estiver atualizando, usa os dados atuais sem esperar
+        (exceto na primeira construção). A reconstrução completa periódica é
+        feita em segundo plano quando há obter_conexao.
+
+        Args:
+            cursor: Cursor MySQL com dictionary=True (None: abre uma conexão por
+                obter_conexao só se houver consulta a fazer)
+            forcar (bool): Atualiza mesmo dentro do intervalo
+        """
+        agora = time.monotonic()
+        construido = self._construido_em is not None
+        if construido and not forcar and agora - self._atualizado_em < self.intervalo_atualizacao:
+            return
+
+        if not self._lock_atualizacao.acquire(blocking=not construido):
+            return
+
+        em_segundo_plano = False
+        acao = None
+        try:
+            agora = time.monotonic()
+            if self._construido_em is None:
+                acao = self._reconstruir
+            elif self._reconstrucao_vencida(agora) and self.obter_conexao is not None:
+                # O lock passa para a thread de reconstrução; até ela terminar, o índice atual vale
+                threading.Thread(
+                    target=self._reconstruir_em_segundo_plano, name='rfid-indice-fotos', daemon=True
+                ).start()
+                em_segundo_plano = True
+            elif self._reconstrucao_vencida(agora):
+                acao = self._reconstruir
+            elif forcar or agora - self._atualizado_em >= self.intervalo_atualizacao:
+                acao = self._atualizar_incremental
+
+            if acao is not None:
+                with self._cursor(cursor) as cursor_atualizacao:
+                    acao(cursor_atualizacao)
+        finally:
+            if not em_segundo_plano:
+                self._lock_atualizacao.release()
+
+    @contextmanager
+    def _cursor(self, cursor):
+        """O cursor recebido ou, se None, um cursor de uma conexão de obter_conexao."""
+        if cursor is not None:
+            yield cursor
+            return
+        if self.obter_conexao is None:
+            raise ValueError("IndiceFotosRFID sem cursor nem obter_conexao")
+
+        connection = None
+        cursor = None
+        try:
+            connection = self.obter_conexao()
+            cursor = connection.cursor(dictionary=True)
+            yield cursor
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+
+    def _reconstruir_em_segundo_plano(self):
+        """Reconstrói o índice com conexão própria (chamada com _lock_atualizacao adquirido)."""
+        try:
+            with self._cursor(None) as cursor:
+                self._reconstruir(cursor)
+        except Exception as e:
+            # Mantém o índice atual; nova tentativa no próximo intervalo de atualização
+            self.logger.error(f"Erro ao reconstruir o índice de fotos: {e}")
+            with self._lock:
+                self._atualizado_em = time.monotonic()
+        finally:
+            self._lock_atualizacao.release()
+
+    def _condicao_foto(self, cursor):
+        if self.repositorio is not None:
+            return self.repositorio.condicao_foto(cursor)
+        return self.CONDICAO_FOTO
+
+    def _reconstruir(self, cursor):
+        """Monta o índice completo com uma única agregação."""
+        inicio = time.monotonic()
+        cursor.execute(f"""
+            SELECT EtiquetaRFID_hex, COUNT(*) AS total_fotos, MAX(Horario) AS ultima_foto
+            FROM leitoresRFID
+            WHERE {self._condicao_foto(cursor)}
+            GROUP BY EtiquetaRFID_hex
+        """)
+        fotos = {}
+        marca = None
+        for linha in cursor.fetchall():
+            resumo = fotos.setdefault(self._normalizar(linha['EtiquetaRFID_hex']), [0, None])
+            resumo[0] += int(linha['total_fotos'])
+            if resumo[1] is None or linha['ultima_foto'] > resumo[1]:
+                resumo[1] = linha['ultima_foto']
+            if linha['ultima_foto'] and (marca is None or linha['ultima_foto'] > marca):
+                marca = linha['ultima_foto']
+
+        with self._lock:
+            self._fotos = fotos
+            self._marca = marca
+            self._construido_em = self._atualizado_em = time.monotonic()
+            self._reconstrucao_pendente = False
+
+        self.logger.info(
+            f"Índice de fotos reconstruído: {len(fotos)} etiquetas "
+            f"em {(time.monotonic() - inicio) * 1000:.0f} ms"
+        )
+
+    def _atualizar_incremental(self, cursor):
+        """Acrescenta ao índice apenas as fotos posteriores à marca d'água."""
+        if self._marca is None:
+            self._reconstruir(cursor)
+            return
+
+        cursor.execute(f"""
+            SELECT EtiquetaRFID_hex, COUNT(*) AS total_fotos, MAX(Horario) AS ultima_foto
+            FROM leitoresRFID
+            WHERE Horario > %s AND {self._condicao_foto(cursor)}
+            GROUP BY EtiquetaRFID_hex
+        """, (self._marca,))
+        novas = cursor.fetchall()
+
+        with self._lock:
+            for linha in novas:
+                resumo = self._fotos.setdefault(self._normalizar(linha['EtiquetaRFID_hex']), [0, None])
+                resumo[0] += int(linha['total_fotos'])
+                if resumo[1] is None or linha['ultima_foto'] > resumo[1]:
+                    resumo[1] = linha['ultima_foto']
+                if linha['ultima_foto'] > self._marca:
+                    self._marca = linha['ultima_foto']
+            self._atualizado_em = time.monotonic()
+
+    def _resumo(self, etiqueta_hex):
+        """Monta o resumo de uma etiqueta (chamar com o lock)."""
+        total_fotos, ultima_foto = self._fotos.get(self._normalizar(etiqueta_hex), (0, None))
+        return {
+            'tem_foto': total_fotos > 0,
+            'total_fotos': total_fotos,
+            'ultima_foto': ultima_foto
+        }
+
+    def obter(self, cursor, etiqueta_hex):
+        """
+        Retorna o resumo de fotos de uma etiqueta.
+
+        Args:
+            cursor: Cursor MySQL com dictionary=True (usado se o índice precisar atualizar;
+                None = conexão própria, aberta só nesse caso)
+            etiqueta_hex (str): Código hexadecimal da etiqueta
+
+        Returns:
+            dict: tem_foto, total_fotos e ultima_foto
+        """
+        self.atualizar(cursor)
+        with self._lock:
+            return self._resumo(etiqueta_hex)
+
+    def obter_varios(self, cursor, etiquetas):
+        """
+        Retorna o resumo de fotos de várias etiquetas.
+
+        Args:
+            cursor: Cursor MySQL com dictionary=True (usado se o índice precisar atualizar;
+                None = conexão própria, aberta só nesse caso)
+            etiquetas (iterable): Códigos hexadecimais das etiquetas
+
+        Returns:
+            dict: Etiqueta (como informada) -> resumo (tem_foto, total_fotos, ultima_foto)
+        """
+        self.atualizar(cursor)
+        with self._lock:
+            return {etiqueta: self._resumo(etiqueta) for etiqueta in etiquetas}
+
+    def invalidar(self):
+        """Força a reconstrução completa na próxima consulta (o índice atual vale até lá)."""
+        with self._lock:
+            self._reconstrucao_pendente = True
+            self._atualizado_em = 0.0
@@ -0,0 +1,386 @@
+# app/utils/PoolConexoesMySQL.py
+import mysql.connector
+from mysql.connector.errors import PoolError
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from ..config import MYSQL_CONFIG, MYSQL_POOL_CONFIG
+
+# Unidade de trabalho da thread atual (uma requisição Flask ou um job)
+_escopo = threading.local()
+
+
+class ConexaoPooled:
+    """
+    Proxy de uma conexão emprestada pelo pool.
+
+    Repassa todos os atributos para a conexão MySQL real, mas close()
+    devolve a conexão ao pool em vez de encerrar o socket. Assim o código
+    existente dos gerenciadores (connection.close() no finally) continua válido.
+
+    Os cursores são buferizados por padrão: cada execute() traz o resultado
+    inteiro, e outro cursor da mesma conexão pode executar sem descartar
+    linhas ainda não lidas.
+    """
+
+    def __init__(self, pool, conexao, criada_em):
+        self._pool = pool
+        self._conexao = conexao
+        self._criada_em = criada_em
+        self._devolvida = False
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+    def cursor(self, *args, **kwargs):
+        """Abre um cursor buferizado, salvo buffered=False explícito."""
+        kwargs.setdefault('buffered', True)
+        return self._conexao.cursor(*args, **kwargs)
+
+    def close(self):
+        """Devolve a conexão ao pool (chamadas repetidas são ignoradas)."""
+        if not self._devolvida:
+            self._devolvida = True
+            self._pool._devolver(self._conexao, self._criada_em)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class ConexaoCompartilhada:
+    """
+    Proxy da conexão de uma unidade de trabalho.
+
+    Todas as consultas feitas dentro do escopo usam a mesma conexão física;
+    close() não faz nada, e a conexão só volta ao pool em encerrar_escopo().
+    Chamadas aninhadas de gerenciadores abrem cada uma o seu cursor
+    buferizado (ver ConexaoPooled), então uma consulta interna não interfere
+    nos resultados da externa.
+    """
+
+    def __init__(self, conexao):
+        self._conexao = conexao
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+    def cursor(self, *args, **kwargs):
+        """Abre um cursor próprio (buferizado por padrão) na conexão da unidade de trabalho."""
+        return self._conexao.cursor(*args, **kwargs)
+
+    def close(self):
+        """Ignorado: a conexão pertence à unidade de trabalho."""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class PoolConexoesMySQL:
+    """
+    Pool de conexões MySQL compartilhado pelos gerenciadores RFID.
+
+    Features:
+    - Tamanho máximo configurável (MYSQL_POOL_CONFIG)
+    - Verificação de saúde (ping) no checkout de conexões ociosas
+    - Configurações de sessão aplicadas uma única vez por conexão física
+    - Métricas de uso (checkouts, esperas, criações, descartes)
+    - Unidade de trabalho por thread: dentro de um escopo (ex: uma requisição
+      Flask) todos os gerenciadores compartilham uma única conexão por pool
+    """
+
+    _pools = {}
+    _lock_pools = threading.Lock()
+
+    @classmethod
+    def get_pool(cls, nome='padrao', sessao=None, parametros=None):
+        """
+        Retorna o pool com o nome informado, criando-o na primeira chamada.
+
+        Args:
+            nome (str): Nome do pool (ex: 'padrao', 'ping')
+            sessao (list): Comandos SQL executados uma vez em cada conexão nova
+            parametros (dict): Parâmetros extras/sobrescritos para mysql.connector.connect
+
+        Returns:
+            PoolConexoesMySQL: Instância do pool
+        """
+        with cls._lock_pools:
+            if nome not in cls._pools:
+                cls._pools[nome] = cls(nome, sessao=sessao, parametros=parametros)
+            return cls._pools[nome]
+
+    @classmethod
+    def obter_metricas_todos(cls):
+        """Retorna as métricas de todos os pools criados."""
+        with cls._lock_pools:
+            pools = list(cls._pools.values())
+        return {pool.nome: pool.obter_metricas() for pool in pools}
+
+    @classmethod
+    def iniciar_escopo(cls):
+        """Abre (ou aninha) a unidade de trabalho da thread atual."""
+        unidade = getattr(_escopo, 'unidade', None)
+        if unidade is None:
+            unidade = {'conexoes': {}, 'profundidade': 0}
+            _escopo.unidade = unidade
+        unidade['profundidade'] += 1
+
+    @classmethod
+    def encerrar_escopo(cls):
+        """Encerra a unidade de trabalho, devolvendo as conexões ao pool no nível mais externo."""
+        unidade = getattr(_escopo, 'unidade', None)
+        if unidade is None:
+            return
+
+        unidade['profundidade'] -= 1
+        if unidade['profundidade'] > 0:
+            return
+
+        _escopo.unidade = None
+        for conexao in unidade['conexoes'].values():
+            conexao.close()
+
+    @classmethod
+    @contextmanager
+    def escopo(cls):
+        """Context manager de unidade de trabalho (para uso fora de requisições Flask)."""
+        cls.iniciar_escopo()
+        try:
+            yield
+        finally:
+            cls.encerrar_escopo()
+
+    def __init__(self, nome, sessao=None, parametros=None, config=None):
+        """Inicializa o pool (use get_pool() para obter a instância compartilhada)."""
+        self.logger = logging.getLogger('controlerfid.pool')
+        self.nome = nome
+        self.config = MYSQL_CONFIG
+
+        config_pool = dict(MYSQL_POOL_CONFIG)
+        if config:
+            config_pool.update(config)
+
+        self.tamanho = max(1, int(config_pool['tamanho']))
+        self.timeout_checkout = config_pool['timeout_checkout']
+        self.verificar_apos_ociosa = config_pool['verificar_apos_ociosa']
+        self.tempo_vida_maximo = config_pool['tempo_vida_maximo']
+        self.sessao = list(sessao or [])
+
+        self.parametros_conexao = {
+            'host': self.config['host'],
+            'database': self.config['database'],
+            'user': self.config['user'],
+            'password': self.config['password'],
+            'connection_timeout': self.config['connection_timeout'],
+            # Sem consume_results: os cursores do pool são buferizados, e um
+            # cursor não buferizado com linhas pendentes gera erro em vez de
+            # ter o resultado descartado em silêncio por outra consulta
+            'autocommit': True
+        }
+
+        # Desabilita verificação SSL apenas para domínios tce.go.gov.br
+        if 'tce.go.gov.br' in self.config['host'].lower():
+            self.parametros_conexao['ssl_disabled'] = True
+
+        if parametros:
+            self.parametros_conexao.update(parametros)
+
+        # Conexões ociosas: (conexao, criada_em, devolvida_em) - LIFO para reutilizar as "quentes"
+        self._ociosas = deque()
+        self._total = 0
+        self._condicao = threading.Condition()
+
+        self._metricas = {
+            'checkouts': 0,
+            'devolucoes': 0,
+            'criacoes': 0,
+            'esperas': 0,
+            'tempo_espera_total_ms': 0.0,
+            'timeouts': 0,
+            'falhas_verificacao': 0,
+            'descartadas': 0,
+            'reutilizacoes_escopo': 0
+        }
+
+        self.logger.info(f"Pool de conexões '{nome}' inicializado (tamanho: {self.tamanho})")
+
+    def _criar_conexao(self):
+        """Abre uma nova conexão física e aplica as configurações de sessão."""
+        conexao = mysql.connector.connect(**self.parametros_conexao)
+
+        if self.sessao:
+            cursor = conexao.cursor()
+            try:
+                for comando in self.sessao:
+                    cursor.execute(comando)
+            finally:
+                cursor.close()
+
+        with self._condicao:
+            self._metricas['criacoes'] += 1
+
+        return conexao, time.monotonic()
+
+    def _encerrar(self, conexao):
+        """Fecha a conexão física ignorando erros (conexão possivelmente quebrada)."""
+        try:
+            conexao.close()
+        except Exception:
+            pass
+
+    def _conexao_saudavel(self, conexao, criada_em, devolvida_em):
+        """Verifica se a conexão ociosa ainda pode ser usada."""
+        agora = time.monotonic()
+
+        if self.tempo_vida_maximo and agora - criada_em > self.tempo_vida_maximo:
+            return False
+
+        # Conexões usadas há pouco tempo dispensam o round-trip do ping
+        if agora - devolvida_em < self.verificar_apos_ociosa:
+            return True
+
+        try:
+            conexao.ping(reconnect=False)
+            return True
+        except Exception as e:
+            self.logger.warning(f"Conexão ociosa do pool '{self.nome}' falhou na verificação: {e}")
+            with self._condicao:
+                self._metricas['falhas_verificacao'] += 1
+            return False
+
+    def obter_conexao(self, timeout=None):
+        """
+        Empresta uma conexão do pool, aguardando se todas estiverem em uso.
+
+        Dentro de uma unidade de trabalho a mesma conexão é reaproveitada por
+        todas as chamadas da thread até encerrar_escopo().
+
+        Args:
+            timeout (float): Segundos máximos de espera (padrão: timeout_checkout)
+
+        Returns:
+            ConexaoPooled | ConexaoCompartilhada: Conexão pronta para uso; close() é sempre seguro
+        """
+        unidade = getattr(_escopo, 'unidade', None)
+        if unidade is None:
+            return self._emprestar(timeout)
+
+        conexao = unidade['conexoes'].get(self.nome)
+        if conexao is None:
+            conexao = self._emprestar(timeout)
+            unidade['conexoes'][self.nome] = conexao
+        else:
+            with self._condicao:
+                self._metricas['reutilizacoes_escopo'] += 1
+
+        return ConexaoCompartilhada(conexao)
+
+    def _emprestar(self, timeout=None):
+        """Retira uma conexão física do pool (ou cria uma nova se houver vaga)."""
+        timeout = self.timeout_checkout if timeout is None else timeout
+        inicio = time.monotonic()
+        esperou = False
+        ociosa = None
+
+        with self._condicao:
+            while True:
+                if self._ociosas:
+                    ociosa = self._ociosas.pop()
+                    break
+
+                if self._total < self.tamanho:
+                    self._total += 1
+                    break
+
+                restante = timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._metricas['timeouts'] += 1
+                    raise PoolError(f"Pool de conexões '{self.nome}' esgotado após {timeout}s de espera")
+
+                esperou = True
+                self._condicao.wait(restante)
+
+            self._metricas['checkouts'] += 1
+            if esperou:
+                self._metricas['esperas'] += 1
+                self._metricas['tempo_espera_total_ms'] += (time.monotonic() - inicio) * 1000
+
+        try:
+            if ociosa is not None:
+                conexao, criada_em, devolvida_em = ociosa
+                if self._conexao_saudavel(conexao, criada_em, devolvida_em):
+                    return ConexaoPooled(self, conexao, criada_em)
+
+                self._encerrar(conexao)
+                with self._condicao:
+                    self._metricas['descartadas'] += 1
+
+            conexao, criada_em = self._criar_conexao()
+            return ConexaoPooled(self, conexao, criada_em)
+
+        except Exception:
+            # Libera a vaga reservada para a conexão que não pôde ser criada
+            with self._condicao:
+                self._total -= 1
+                self._condicao.notify()
+            raise
+
+    def _devolver(self, conexao, criada_em):
+        """Recebe de volta uma conexão emprestada (chamado por ConexaoPooled.close)."""
+        reutilizavel = True
+
+        try:
+            if conexao.unread_result:
+                conexao.consume_results()
+            # Transações não confirmadas são descartadas, como aconteceria ao fechar a conexão
+            if conexao.in_transaction:
+                conexao.rollback()
+        except Exception as e:
+            self.logger.warning(f"Conexão descartada ao retornar para o pool '{self.nome}': {e}")
+            reutilizavel = False
+
+        if not reutilizavel:
+            self._encerrar(conexao)
+
+        with self._condicao:
+            self._metricas['devolucoes'] += 1
+            if reutilizavel:
+                self._ociosas.append((conexao, criada_em, time.monotonic()))
+            else:
+                self._total -= 1
+                self._metricas['descartadas'] += 1
+            self._condicao.notify()
+
+    def obter_metricas(self):
+        """Retorna um retrato das métricas atuais do pool."""
+        with self._condicao:
+            metricas = dict(self._metricas)
+            metricas['tamanho'] = self.tamanho
+            metricas['abertas'] = self._total
+            metricas['ociosas'] = len(self._ociosas)
+            metricas['em_uso'] = self._total - len(self._ociosas)
+
+        metricas['tempo_espera_total_ms'] = round(metricas['tempo_espera_total_ms'], 2)
+        return metricas
+
+    def fechar(self):
+        """Fecha todas as conexões ociosas do pool."""
+        with self._condicao:
+            ociosas = list(self._ociosas)
+            self._ociosas.clear()
+            self._total -= len(ociosas)
+
+        for conexao, _, _ in ociosas:
+            self._encerrar(conexao)
+
+        self.logger.info(f"Pool de conexões '{self.nome}' fechado ({len(ociosas)} conexões ociosas)")
@@ -0,0 +1,93 @@
+# app/utils/ProvedorJSON.py
+import logging
+import threading
+import time
+from flask.json.provider import DefaultJSONProvider
+from .SerializacaoJSON import codificar_json, orjson
+
+
+class ProvedorJSONRFID(DefaultJSONProvider):
+    """
+    Provedor JSON da aplicação (jsonify, resposta_json, request.get_json).
+
+    Codifica com o orjson quando instalado e com a biblioteca padrão caso
+    contrário, mantendo a saída do provedor padrão do Flask (datas HTTP,
+    Decimal como texto, chaves ordenadas). Registra o tempo de codificação
+    para a rota /metricas.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.logger = logging.getLogger('controlerfid.json')
+        self.acelerado = orjson is not None
+
+        self._lock = threading.Lock()
+        self._metricas = {
+            'codificacoes': 0,
+            'bytes': 0,
+            'tempo_total_ms': 0.0,
+            'tempo_maximo_ms': 0.0,
+            'fallbacks': 0
+        }
+
+        self.logger.info(f"Provedor JSON: {'orjson' if self.acelerado else 'json (biblioteca padrão)'}")
+
+    def dumps_bytes(self, obj, indentar=False):
+        """
+        Codifica um objeto em JSON (bytes), registrando o tempo gasto.
+
+        Args:
+            obj: Objeto a codificar
+            indentar (bool): Indenta a saída (modo debug)
+
+        Returns:
+            bytes: Documento JSON
+        """
+        inicio = time.perf_counter()
+        fallback = False
+        try:
+            corpo = codificar_json(obj, ordenar=self.sort_keys, indentar=indentar, acelerado=self.acelerado)
+        except TypeError:
+            if not self.acelerado:
+                raise
+            # Ex: inteiro fora de 64 bits, que o orjson não aceita
+            fallback = True
+            corpo = codificar_json(obj, ordenar=self.sort_keys, indentar=indentar, acelerado=False)
+
+        tempo_ms = (time.perf_counter() - inicio) * 1000
+        with self._lock:
+            self._metricas['codificacoes'] += 1
+            self._metricas['bytes'] += len(corpo)
+            self._metricas['tempo_total_ms'] += tempo_ms
+            if tempo_ms > self._metricas['tempo_maximo_ms']:
+                self._metricas['tempo_maximo_ms'] = tempo_ms
+            if fallback:
+                self._metricas['fallbacks'] += 1
+        return corpo
+
+    def dumps(self, obj, **kwargs):
+        """Codifica em texto JSON; argumentos que não sejam indent/separators usam o provedor padrão."""
+        indent = kwargs.pop('indent', None)
+        kwargs.pop('separators', None)
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, indentar=bool(indent)).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        """Resposta JSON (jsonify) sem passar por texto intermediário."""
+        obj = self._prepare_response_obj(args, kwargs)
+        indentar = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indentar=indentar) + b'\n', mimetype=self.mimetype)
+
+    def obter_metricas(self):
+        """Retorna as métricas de codificação deste processo."""
+        with self._lock:
+            metricas = dict(self._metricas)
+
+        metricas['codificador'] = 'orjson' if self.acelerado else 'json'
+        metricas['tempo_medio_ms'] = (
+            round(metricas['tempo_total_ms'] / metricas['codificacoes'], 3) if metricas['codificacoes'] else None
+        )
+        metricas['tempo_total_ms'] = round(metricas['tempo_total_ms'], 3)
+        metricas['tempo_maximo_ms'] = round(metricas['tempo_maximo_ms'], 3)
+        return metricas
@@ -0,0 +1,174 @@
+# app/utils/RepositorioFotosRFID.py
+import logging
+import threading
+from ..config import FOTOS_CONFIG
+
+
+class RepositorioFotosRFID:
+    """
+    Leitura e gravação das fotos de leitoresRFID/pingsRFID.
+
+    Depois de scripts/fotos_rfid.sql, as linhas da tabela guardam só a
+    referência (FotoId) e o tamanho (FotoTamanho); o BLOB fica em fotosRFID
+    e é lido apenas quando a foto é pedida. As listagens deixam de trazer
+    páginas de BLOB para o buffer pool.
+
+    A coluna Foto continua aceita: antes da migração (FotoId ainda não
+    existe) e para linhas gravadas por leitores que ainda preenchem Foto.
+    scripts/migrar_fotos.py move essas fotos em lotes. Com a migração
+    concluída (FOTOS_CONFIG['migracao_concluida']), os gatilhos do
+    scripts/fotos_rfid.sql preenchem FotoTamanho também nessas linhas, e a
+    condição "tem foto" deixa de olhar a coluna Foto.
+    """
+
+    TABELA_FOTOS = 'fotosRFID'
+
+    # Tabela de origem -> valor da coluna Origem em fotosRFID
+    ORIGENS = {
+        'leitoresRFID': 'leitura',
+        'pingsRFID': 'ping'
+    }
+
+    def __init__(self, tabela, migracao_concluida=None):
+        """
+        Args:
+            tabela (str): leitoresRFID ou pingsRFID
+            migracao_concluida (bool): Todas as linhas com foto têm FotoTamanho
+                (padrão: FOTOS_CONFIG['migracao_concluida'])
+        """
+        if tabela not in self.ORIGENS:
+            raise ValueError(f"Tabela sem fotos: {tabela}")
+
+        self.logger = logging.getLogger('controlerfid.repositorio_fotos')
+        self.tabela = tabela
+        self.origem = self.ORIGENS[tabela]
+        self.migracao_concluida = (
+            FOTOS_CONFIG.get('migracao_concluida', False) if migracao_concluida is None else migracao_concluida
+        )
+
+        self._lock = threading.Lock()
+        self._separada = None  # Detectado na primeira consulta
+
+    def separada(self, cursor):
+        """
+        Indica se a tabela já tem a referência FotoId (migração aplicada).
+
+        Args:
+            cursor: Cursor MySQL com dictionary=True
+
+        Returns:
+            bool: True se as fotos podem estar em fotosRFID
+        """
+        if self._separada is None:
+            cursor.execute("""
+                SELECT COUNT(*) AS total
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = %s
+                  AND COLUMN_NAME = 'FotoId'
+            """, (self.tabela,))
+            resultado = cursor.fetchone()
+            with self._lock:
+                self._separada = bool(resultado and resultado['total'])
+            self.logger.info(
+                f"Fotos de {self.tabela}: {'tabela ' + self.TABELA_FOTOS if self._separada else 'coluna Foto'}"
+            )
+        return self._separada
+
+    def redetectar(self):
+        """Volta a consultar o esquema na próxima chamada (ex: após aplicar a migração)."""
+        with self._lock:
+            self._separada = None
+
+    def condicao_foto(self, cursor, alias=None):
+        """
+        Condição SQL "a linha tem foto".
+
+        Linhas migradas são resolvidas por FotoTamanho, sem tocar no BLOB;
+        com a migração concluída, nenhuma linha precisa do BLOB.
+
+        Args:
+            cursor: Cursor MySQL com dictionary=True
+            alias (str): Alias da tabela na consulta (opcional)
+
+        Returns:
+            str: Expressão SQL
+        """
+        prefixo = f"{alias}." if alias else ""
+        inline = f"({prefixo}Foto IS NOT NULL AND LENGTH({prefixo}Foto) > 0)"
+        if self.separada(cursor):
+            if self.migracao_concluida:
+                return f"{prefixo}FotoTamanho > 0"
+            return f"({prefixo}FotoTamanho > 0 OR {inline})"
+        return inline
+
+    def ler(self, cursor, filtros, colunas=('Horario',), exigir_foto=True):
+        """
+        Lê a foto de uma linha (da tabela de fotos ou da coluna Foto).
+
+        Args:
+            cursor: Cursor MySQL com dictionary=True
+            filtros (dict): Coluna -> valor (igualdade) que identificam a linha
+            colunas (tuple): Colunas da linha a retornar junto com a foto
+            exigir_foto (bool): Ignora linhas sem foto
+
+        Returns:
+            dict: Colunas pedidas + Foto (bytes ou None), ou None se a linha não existe
+        """
+        condicoes = [f"r.{coluna} = %s" for coluna in filtros]
+        if exigir_foto:
+            condicoes.append(self.condicao_foto(cursor, 'r'))
+
+        if self.separada(cursor):
+            foto = "COALESCE(f.Foto, r.Foto)"
+            juncao = f"LEFT JOIN {self.TABELA_FOTOS} f ON f.FotoId = r.FotoId"
+        else:
+            foto = "r.Foto"
+            juncao = ""
+
+        query = f"""
+            SELECT {', '.join(f'r.{coluna}' for coluna in colunas)}, {foto} AS Foto
+            FROM {self.tabela} r
+            {juncao}
+            WHERE {' AND '.join(condicoes)}
+            LIMIT 1
+        """
+        cursor.execute(query, list(filtros.values()))
+        return cursor.fetchone()
+
+    def gravar(self, cursor, filtros, dados, limpar_inline=True):
+        """
+        Grava a foto de uma linha em fotosRFID e aponta a linha para ela.
+
+        Não faz commit: quem chama controla a transação (as instruções
+        devem ser confirmadas juntas).
+
+        Args:
+            cursor: Cursor MySQL
+            filtros (dict): Coluna -> valor (igualdade) que identificam a linha
+            dados (bytes): Conteúdo da foto
+            limpar_inline (bool): Zera a coluna Foto da linha
+
+        Returns:
+            int: FotoId gravado, ou None se a linha já tinha FotoId (nada gravado)
+        """
+        cursor.execute(
+            f"INSERT INTO {self.TABELA_FOTOS} (Origem, Foto, Tamanho) VALUES (%s, %s, %s)",
+            (self.origem, dados, len(dados))
+        )
+        foto_id = cursor.lastrowid
+
+        # Com linhas repetidas (mesma chave), LENGTH(Foto) escolhe a que tem uma foto
+        # deste tamanho, sem reenviar nem comparar o BLOB inteiro
+        atribuicoes = "FotoId = %s, FotoTamanho = %s" + (", Foto = NULL" if limpar_inline else "")
+        condicoes = ' AND '.join(f"{coluna} = %s" for coluna in filtros)
+        cursor.execute(
+            f"UPDATE {self.tabela} SET {atribuicoes} "
+            f"WHERE {condicoes} AND FotoId IS NULL AND LENGTH(Foto) = %s LIMIT 1",
+            [foto_id, len(dados), *filtros.values(), len(dados)]
+        )
+        if cursor.rowcount == 0:
+            # Linha já migrada, alterada ou removida entre a leitura e a gravação
+            cursor.execute(f"DELETE FROM {self.TABELA_FOTOS} WHERE FotoId = %s", (foto_id,))
+            return None
+        return foto_id
@@ -0,0 +1,327 @@
+# app/utils/SerializacaoJSON.py
+"""
+Resultados em cache como retratos imutáveis, com corpo JSON reaproveitado.
+
+O CacheRFID guarda congelar(resultado): uma cópia profunda em que dicts
+viram DictCongelado (somente leitura) e listas viram tuplas. Assim nenhuma
+requisição consegue alterar o que outra vai receber.
+
+Na leitura, abrir_resultado() devolve um ResultadoCache: um dict raso
+(sem cópia profunda) em que a rota pode trocar/adicionar chaves de topo
+(from_cache, total, periodo...). resposta_json() serializa só essas chaves
+e as concatena ao corpo JSON do retrato, que é gerado (com seu ETag) uma
+única vez.
+"""
+import base64
+import decimal
+import hashlib
+import json
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+
+try:
+    import orjson  # Codificador acelerado opcional (pip install orjson)
+except ImportError:
+    orjson = None
+
+
+class DictCongelado(dict):
+    """dict somente leitura usado nos resultados em cache (use .copy() ou dict(...) para alterar)."""
+
+    # _corpos: corpos JSON gerados por resposta_json(); _ao_gerar_corpo: aviso ao
+    # backend em memória, que conta os bytes de cada corpo novo na entrada
+    __slots__ = ('_corpos', '_ao_gerar_corpo')
+
+    def _somente_leitura(self, *args, **kwargs):
+        raise TypeError("Resultado em cache é somente leitura: use .copy() antes de alterar")
+
+    __setitem__ = _somente_leitura
+    __delitem__ = _somente_leitura
+    __ior__ = _somente_leitura
+    clear = _somente_leitura
+    pop = _somente_leitura
+    popitem = _somente_leitura
+    setdefault = _somente_leitura
+    update = _somente_leitura
+
+    def __reduce__(self):
+        # pickle (backend Redis) recria pelo construtor, sem passar por __setitem__
+        return (DictCongelado, (dict(self),))
+
+
+def congelar(valor):
+    """
+    Cria uma cópia profunda e imutável de um resultado.
+
+    Args:
+        valor: Resultado (dicts, listas e valores escalares)
+
+    Returns:
+        DictCongelado/tuple/frozenset equivalentes; escalares são retornados como estão
+    """
+    if isinstance(valor, DictCongelado):
+        return valor
+    if isinstance(valor, dict):
+        return DictCongelado((chave, congelar(item)) for chave, item in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return tuple(congelar(item) for item in valor)
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(valor)
+    return valor
+
+
+class ResultadoCache(dict):
+    """
+    Resultado lido do cache: cópia rasa do retrato com as chaves de topo alteradas.
+
+    Atribuições (resultado['chave'] = ...) são registradas em `extras`; outras
+    alterações (remoções, setdefault) desativam o reaproveitamento do corpo JSON.
+    """
+
+    __slots__ = ('origem', 'extras', 'alterado')
+
+    def __init__(self, origem, extras):
+        super().__init__(origem)
+        dict.update(self, extras)
+        self.origem = origem if isinstance(origem, DictCongelado) else None
+        self.extras = dict(extras)
+        self.alterado = False
+
+    def __setitem__(self, chave, valor):
+        dict.__setitem__(self, chave, valor)
+        self.extras[chave] = valor
+
+    def update(self, *args, **kwargs):
+        for chave, valor in dict(*args, **kwargs).items():
+            self[chave] = valor
+
+    def _alterar(metodo):
+        def alterar(self, *args, **kwargs):
+            self.alterado = True
+            return metodo(self, *args, **kwargs)
+        return alterar
+
+    __delitem__ = _alterar(dict.__delitem__)
+    __ior__ = _alterar(dict.__ior__)
+    clear = _alterar(dict.clear)
+    pop = _alterar(dict.pop)
+    popitem = _alterar(dict.popitem)
+    setdefault = _alterar(dict.setdefault)
+    del _alterar
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+def abrir_resultado(valor, **extras):
+    """
+    Prepara um valor lido do cache para ser retornado por um gerenciador.
+
+    Args:
+        valor: Valor armazenado no cache
+        **extras: Chaves de topo a definir (ex: from_cache=True, total=...)
+
+    Returns:
+        ResultadoCache para dicts; outros valores são retornados como estão
+    """
+    if not isinstance(valor, dict):
+        return valor
+    return ResultadoCache(valor, extras)
+
+
+_DIAS_HTTP = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MESES_HTTP = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def formatar_data_http(valor):
+    """
+    Formata date/datetime como data HTTP ("Fri, 31 Oct 2025 11:32:26 GMT").
+
+    É o formato que o jsonify do Flask sempre usou (werkzeug.http.http_date):
+    o JavaScript e _converter_horario_para_sql dependem dele. Datetimes sem
+    fuso são tratados como UTC, como no werkzeug.
+    """
+    if isinstance(valor, datetime):
+        if valor.tzinfo is not None:
+            valor = valor.astimezone(timezone.utc)
+        hora, minuto, segundo = valor.hour, valor.minute, valor.second
+    else:
+        hora = minuto = segundo = 0
+    return (
+        f"{_DIAS_HTTP[valor.weekday()]}, {valor.day:02d} {_MESES_HTTP[valor.month - 1]} "
+        f"{valor.year:04d} {hora:02d}:{minuto:02d}:{segundo:02d} GMT"
+    )
+
+
+def converter_padrao(valor):
+    """
+    Converte tipos que o JSON não conhece (usado pelos dois codificadores).
+
+    - date/datetime: data HTTP (compatível com o jsonify do Flask)
+    - time/timedelta: 'HH:MM:SS' / segundos
+    - Decimal/UUID: texto
+    - bytes: base64
+    - set/frozenset: lista
+    """
+    if isinstance(valor, date):
+        return formatar_data_http(valor)
+    if isinstance(valor, (decimal.Decimal, uuid.UUID)):
+        return str(valor)
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return base64.b64encode(valor).decode('ascii')
+    if isinstance(valor, time):
+        return valor.isoformat()
+    if isinstance(valor, timedelta):
+        return valor.total_seconds()
+    if isinstance(valor, (set, frozenset)):
+        return list(valor)
+    if hasattr(valor, '__html__'):
+        return str(valor.__html__())
+    raise TypeError(f"Objeto do tipo {type(valor).__name__} não é serializável em JSON")
+
+
+if orjson is not None:
+    _OPCOES_ORJSON = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def codificar_json(valor, ordenar=True, indentar=False, acelerado=True):
+    """
+    Codifica um valor em JSON (bytes UTF-8).
+
+    Usa o orjson quando instalado (e acelerado=True); senão a biblioteca
+    padrão, com a mesma saída lógica: mesmas conversões de tipos, chaves
+    ordenadas e separadores compactos.
+
+    Args:
+        valor: Valor a codificar
+        ordenar (bool): Ordena as chaves dos objetos
+        indentar (bool): Indenta com 2 espaços (modo debug)
+        acelerado (bool): Permite usar o orjson
+
+    Returns:
+        bytes: Documento JSON
+    """
+    if acelerado and orjson is not None:
+        opcoes = _OPCOES_ORJSON
+        if ordenar:
+            opcoes |= orjson.OPT_SORT_KEYS
+        if indentar:
+            opcoes |= orjson.OPT_INDENT_2
+        return orjson.dumps(valor, default=converter_padrao, option=opcoes)
+
+    return json.dumps(
+        valor,
+        default=converter_padrao,
+        sort_keys=ordenar,
+        ensure_ascii=False,
+        indent=2 if indentar else None,
+        separators=None if indentar else (',', ':')
+    ).encode('utf-8')
+
+
+# Metadados que mudam a cada leitura do cache sem que os dados mudem: fora do ETag
+CHAVES_VOLATEIS = frozenset(('from_cache', 'stale', 'idade'))
+
+
+def serializar_json(resultado, dumps):
+    """
+    Serializa um resultado e calcula seu ETag, reaproveitando o corpo JSON do retrato em cache.
+
+    O ETag cobre os dados, não os metadados voláteis (from_cache, stale,
+    idade): enquanto o retrato em cache não muda, o ETag também não muda.
+
+    Args:
+        resultado: Resultado a serializar
+        dumps (callable): Serializador (obj -> str/bytes), ex: current_app.json.dumps
+
+    Returns:
+        tuple: (corpo em bytes, ETag)
+    """
+    if not isinstance(resultado, dict):
+        corpo = _para_bytes(dumps(resultado))
+        return corpo, _resumo(corpo)
+
+    origem = getattr(resultado, 'origem', None)
+    if origem is not None and not resultado.alterado:
+        extras = resultado.extras
+        base, etag = _corpo_base(origem, frozenset(extras), dumps)
+    else:
+        extras = {chave: resultado[chave] for chave in CHAVES_VOLATEIS if chave in resultado}
+        base = _para_bytes(dumps({chave: item for chave, item in resultado.items() if chave not in extras}))
+        etag = _resumo(base)
+
+    if not extras:
+        return base, etag
+
+    partes = [base]
+    fixos = {chave: item for chave, item in extras.items() if chave not in CHAVES_VOLATEIS}
+    if fixos:
+        corpo_fixos = _para_bytes(dumps(fixos))
+        etag = f"{etag}-{_resumo(corpo_fixos)}"
+        partes.append(corpo_fixos)
+    if len(fixos) < len(extras):
+        partes.append(_para_bytes(dumps({chave: item for chave, item in extras.items() if chave in CHAVES_VOLATEIS})))
+    return _juntar_objetos(partes), etag
+
+
+def _corpo_base(origem, chaves, dumps):
+    """Corpo JSON do retrato sem as chaves alteradas, com seu resumo (gerado uma vez por combinação)."""
+    try:
+        corpos = origem._corpos
+    except AttributeError:
+        corpos = origem._corpos = {}
+
+    corpo = corpos.get(chaves)
+    if corpo is None:
+        # Normalmente uma ou duas combinações por retrato (ex: from_cache; from_cache + total)
+        base = _para_bytes(dumps({chave: item for chave, item in origem.items() if chave not in chaves}))
+        corpo = corpos[chaves] = (base, _resumo(base))
+        aviso = getattr(origem, '_ao_gerar_corpo', None)
+        if aviso is not None:
+            aviso(len(base))
+    return corpo
+
+
+def _juntar_objetos(partes):
+    """Concatena objetos JSON já serializados (b'{...}') em um único objeto."""
+    partes = [parte for parte in partes if parte != b'{}']
+    if not partes:
+        return b'{}'
+    return b'{' + b','.join(parte[1:-1] for parte in partes) + b'}'
+
+
+def _resumo(corpo):
+    return hashlib.blake2b(corpo, digest_size=12).hexdigest()
+
+
+def _para_bytes(texto):
+    return texto if isinstance(texto, bytes) else texto.encode('utf-8')
+
+
+def resposta_json(resultado, status=200):
+    """
+    Cria a resposta JSON da rota (equivalente a jsonify), reaproveitando o corpo em cache.
+
+    Respostas 200 levam ETag e Cache-Control: no-cache; o navegador revalida
+    com If-None-Match e recebe 304 sem corpo enquanto os dados não mudarem.
+
+    Args:
+        resultado: Resultado retornado pelo gerenciador
+        status (int): Código HTTP
+
+    Returns:
+        Response: Resposta Flask com mimetype application/json
+    """
+    from flask import current_app, request
+
+    # O provedor da aplicação (ProvedorJSONRFID) codifica direto em bytes
+    dumps = getattr(current_app.json, 'dumps_bytes', current_app.json.dumps)
+    corpo, etag = serializar_json(resultado, dumps)
+    resposta = current_app.response_class(corpo + b'\n', status=status, mimetype=current_app.json.mimetype)
+
+    if status == 200:
+        # ETag fraco: o corpo pode variar nos metadados voláteis com os mesmos dados
+        resposta.set_etag(etag, weak=True)
+        resposta.headers['Cache-Control'] = 'no-cache'
+        resposta.make_conditional(request)
+    return resposta
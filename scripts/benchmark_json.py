@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark da codificação JSON das respostas da API.
+
+Compara, com cargas parecidas com as reais (página de 200 leituras e lista
+de 1000 empréstimos pendentes):
+  - json padrão, como o provedor padrão do Flask (ensure_ascii, datas HTTP)
+  - codificar_json com a biblioteca padrão (fallback do ProvedorJSONRFID)
+  - codificar_json com orjson (se instalado)
+
+Uso:
+    python scripts/benchmark_json.py [repeticoes]
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Carrega só o módulo de serialização (não precisa de Flask nem MySQL)
+CAMINHO_MODULO = os.path.join(os.path.dirname(__file__), '..', 'app', 'utils', 'SerializacaoJSON.py')
+spec = importlib.util.spec_from_file_location('SerializacaoJSON', CAMINHO_MODULO)
+serializacao = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(serializacao)
+
+
+def gerar_leituras(quantidade):
+    """Página de leituras como a de /api/leituras."""
+    inicio = datetime(2025, 10, 31, 8, 0, 0)
+    leituras = []
+    for i in range(quantidade):
+        horario = inicio + timedelta(seconds=i * 7)
+        leituras.append({
+            'CodigoLeitor': f'L{i % 4}',
+            'Antena': i % 8,
+            'EtiquetaRFID_hex': f'{i:024X}',
+            'Descricao': f'Ferramenta de teste nº {i} – bancada {i % 12}',
+            'Horario': horario,
+            'horario_formatado': horario.strftime('%d/%m/%Y %H:%M:%S'),
+            'RSSI': Decimal('-61.5'),
+            'tem_foto': i % 3 == 0
+        })
+    return {
+        'success': True,
+        'leituras': leituras,
+        'total': 125000,
+        'total_is_estimate': False,
+        'limite': quantidade,
+        'offset': 0,
+        'next_cursor': 'eyJwIjpbIjIwMjUtMTAtMzEgMDg6MDA6MDAiLDEyMzQ1XX0',
+        'from_cache': False
+    }
+
+
+def gerar_pendentes(quantidade):
+    """Lista de empréstimos pendentes como a de /api/emprestimos/pendentes."""
+    inicio = datetime(2025, 9, 1, 9, 30, 0)
+    emprestimos = []
+    for i in range(quantidade):
+        data = inicio + timedelta(hours=i)
+        emprestimos.append({
+            'id': i,
+            'id_colaborador': 1000 + i % 50,
+            'EtiquetaRFID_hex': f'{i:024X}',
+            'dataEmprestimo': data,
+            'dataDevolucao': None,
+            'Observacao': None if i % 2 else 'Devolver até sexta',
+            'descricao_ferramenta': f'Alicate {i % 7}',
+            'status': 'ativo',
+            'dataEmprestimo_formatada': data.strftime('%d/%m/%Y %H:%M'),
+            'dataDevolucao_formatada': None,
+            'tempo_decorrido': f'{i // 24} dia(s) e {i % 24} hora(s)',
+            'alerta': i > 168
+        })
+    return {'success': True, 'emprestimos': emprestimos, 'total': quantidade, 'from_cache': True}
+
+
+def codificar_como_flask(valor):
+    """Equivalente ao DefaultJSONProvider do Flask (json + http_date)."""
+    return json.dumps(
+        valor,
+        default=serializacao.converter_padrao,
+        sort_keys=True,
+        ensure_ascii=True,
+        separators=(',', ':')
+    ).encode('utf-8')
+
+
+def medir(funcao, valor, repeticoes):
+    """Retorna (melhor, média) em ms por codificação."""
+    funcao(valor)  # Aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(valor)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return min(tempos), sum(tempos) / len(tempos)
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    codificadores = [
+        ('json (padrão Flask)', codificar_como_flask),
+        ('json (codificar_json)', lambda valor: serializacao.codificar_json(valor, acelerado=False)),
+    ]
+    if serializacao.orjson is not None:
+        codificadores.append(('orjson', lambda valor: serializacao.codificar_json(valor)))
+    else:
+        print("orjson não instalado: comparando apenas a biblioteca padrão (pip install orjson)")
+
+    cargas = [
+        ('200 leituras', gerar_leituras(200)),
+        ('1000 pendentes', gerar_pendentes(1000)),
+    ]
+
+    for nome_carga, carga in cargas:
+        # As saídas precisam ser equivalentes
+        referencia = json.loads(codificar_como_flask(carga))
+        for nome, funcao in codificadores[1:]:
+            assert json.loads(funcao(carga)) == referencia, f"Saída diferente: {nome}"
+
+        print(f"\n{nome_carga} ({len(codificar_como_flask(carga)) / 1024:.0f} KB, {repeticoes} repetições)")
+        base = None
+        for nome, funcao in codificadores:
+            melhor, media = medir(funcao, carga, repeticoes)
+            base = base or media
+            print(f"  {nome:<24} melhor {melhor:7.3f} ms   média {media:7.3f} ms   {base / media:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+-- Tabela de fotos separada das linhas de leitoresRFID e pingsRFID
+-- Objetivo: as listagens, contagens e o índice de fotos em memória deixam de
+-- ler páginas de BLOB. As linhas guardam só FotoId (referência para fotosRFID)
+-- e FotoTamanho (bytes); o BLOB é lido apenas quando a foto é pedida.
+--
+-- A aplicação detecta a coluna FotoId sozinha (RepositorioFotosRFID) e funciona
+-- antes, durante e depois da migração. Linhas ainda gravadas com a coluna Foto
+-- pelos leitores continuam sendo servidas normalmente.
+--
+-- Ordem:
+--   1. Este script (tabela nova + colunas, sem bloquear as inserções)
+--   2. Reiniciar a aplicação (ou aguardar: a detecção é feita uma vez por processo)
+--   3. python scripts/migrar_fotos.py (move os BLOBs em lotes; pode ser interrompido)
+--   4. RFID_FOTOS_MIGRACAO_CONCLUIDA=1 quando o script informar que não há
+--      pendências: "tem foto" passa a ser só FotoTamanho > 0, sem ler o BLOB
+--   5. OPTIMIZE TABLE (recupera o espaço liberado pelos BLOBs)
+
+-- ============================================================================
+-- TABELA DE FOTOS
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS fotosRFID (
+    FotoId BIGINT NOT NULL AUTO_INCREMENT,
+    Origem VARCHAR(16) NOT NULL,          -- 'leitura' ou 'ping'
+    Foto LONGBLOB NOT NULL,
+    Tamanho INT NOT NULL,
+    CriadoEm DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (FotoId)
+) ENGINE=InnoDB;
+
+-- ============================================================================
+-- REFERÊNCIA NAS LINHAS
+-- ============================================================================
+-- Colunas anuláveis no fim da tabela: ALGORITHM=INPLACE, LOCK=NONE evita
+-- bloquear as inserções dos leitores.
+ALTER TABLE leitoresRFID
+    ADD COLUMN FotoId BIGINT NULL,
+    ADD COLUMN FotoTamanho INT NULL,
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE pingsRFID
+    ADD COLUMN FotoId BIGINT NULL,
+    ADD COLUMN FotoTamanho INT NULL,
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- ============================================================================
+-- TAMANHO DAS FOTOS GRAVADAS NA LINHA
+-- ============================================================================
+-- Leitores que ainda preenchem a coluna Foto: o tamanho vai para FotoTamanho na
+-- inserção, para que FotoTamanho > 0 continue valendo depois da migração.
+CREATE TRIGGER trg_leitores_foto_tamanho BEFORE INSERT ON leitoresRFID
+FOR EACH ROW SET NEW.FotoTamanho = COALESCE(NEW.FotoTamanho, LENGTH(NEW.Foto));
+
+CREATE TRIGGER trg_pings_foto_tamanho BEFORE INSERT ON pingsRFID
+FOR EACH ROW SET NEW.FotoTamanho = COALESCE(NEW.FotoTamanho, LENGTH(NEW.Foto));
+
+-- ============================================================================
+-- APÓS A MIGRAÇÃO (scripts/migrar_fotos.py)
+-- ============================================================================
+-- Fotos que ainda estão na linha (devem ser só as gravadas depois da migração):
+-- SELECT COUNT(*) FROM leitoresRFID WHERE FotoId IS NULL AND Foto IS NOT NULL AND LENGTH(Foto) > 0;
+-- SELECT COUNT(*) FROM pingsRFID WHERE FotoId IS NULL AND Foto IS NOT NULL AND LENGTH(Foto) > 0;
+--
+-- Linhas com foto e sem FotoTamanho (devem ser zero antes de RFID_FOTOS_MIGRACAO_CONCLUIDA=1):
+-- SELECT COUNT(*) FROM leitoresRFID WHERE COALESCE(FotoTamanho, 0) = 0 AND LENGTH(Foto) > 0;
+-- SELECT COUNT(*) FROM pingsRFID WHERE COALESCE(FotoTamanho, 0) = 0 AND LENGTH(Foto) > 0;
+--
+-- Recuperar o espaço dos BLOBs removidos (reconstrói a tabela; online no InnoDB,
+-- mas pesado em disco - executar fora do horário de pico):
+-- OPTIMIZE TABLE leitoresRFID;
+-- OPTIMIZE TABLE pingsRFID;
+
+-- ============================================================================
+-- ROLLBACK (se necessário)
+-- ============================================================================
+-- Desligar RFID_FOTOS_MIGRACAO_CONCLUIDA e devolver as fotos para as linhas antes de remover a tabela:
+-- UPDATE leitoresRFID r JOIN fotosRFID f ON f.FotoId = r.FotoId SET r.Foto = f.Foto WHERE r.Foto IS NULL;
+-- UPDATE pingsRFID p JOIN fotosRFID f ON f.FotoId = p.FotoId SET p.Foto = f.Foto WHERE p.Foto IS NULL;
+-- DROP TRIGGER IF EXISTS trg_leitores_foto_tamanho;
+-- DROP TRIGGER IF EXISTS trg_pings_foto_tamanho;
+-- ALTER TABLE leitoresRFID DROP COLUMN FotoId, DROP COLUMN FotoTamanho;
+-- ALTER TABLE pingsRFID DROP COLUMN FotoId, DROP COLUMN FotoTamanho;
+-- DROP TABLE fotosRFID;
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local que imita a API do HelpDesk Monitor usada pelo ControleRFID.
+
+Responde GET /api/usuarios_htpasswd/<usuario> (200 com 'funcoes' ou 404) e
+GET /api/contatos_tecnicos a partir de dados em memória. Para exercitar o
+circuit breaker do ClienteHelpDesk, a API pode passar a responder com erro:
+
+    GET /_stub/falhar?status=503     todas as chamadas da API respondem 503
+    GET /_stub/falhar?status=0       volta ao normal
+    GET /_stub/chamadas              chamadas recebidas pela API (JSON)
+
+Também usado como fixture em tests/test_cliente_helpdesk.py.
+
+Uso:
+    python scripts/helpdesk_stub.py [porta]
+    HELPDESK_API_BASE=http://127.0.0.1:8765/api python RFID.py
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+USUARIOS_EXEMPLO = {
+    'joao': ['ALMOXARIFADO'],
+    'ana': ['ALMOXARIFADO', 'PATRIMONIO'],
+    'maria': []                     # Sem funções no cadastro: vem de /contatos_tecnicos
+}
+
+TECNICOS_EXEMPLO = [
+    {'nome_usuario_htpasswd': 'maria', 'funcoes': ['ELETRICA']},
+    {'nome_usuario_htpasswd': 'pedro', 'funcoes': ['REDES']}
+]
+
+
+class ServidorHelpDeskStub:
+    """
+    Servidor HTTP do stub, executado em uma thread.
+
+    Args:
+        porta (int): Porta local (0 = escolhida pelo sistema)
+        usuarios (dict): usuario -> funções (padrão: USUARIOS_EXEMPLO)
+        tecnicos (list): Lista de técnicos (padrão: TECNICOS_EXEMPLO)
+    """
+
+    def __init__(self, porta=0, usuarios=None, tecnicos=None):
+        self.usuarios = dict(USUARIOS_EXEMPLO if usuarios is None else usuarios)
+        self.tecnicos = list(TECNICOS_EXEMPLO if tecnicos is None else tecnicos)
+        self.status_falha = 0
+        self.chamadas = []
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', porta), self._criar_handler())
+        self._servidor.daemon_threads = True
+        self._thread = None
+
+    @property
+    def api_base(self):
+        """URL base para HELPDESK_API_BASE / HELPDESK_CONFIG['api_base']."""
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}/api"
+
+    def falhar(self, status=503):
+        """Faz a API responder com o status informado (0 = normal)."""
+        with self._lock:
+            self.status_falha = status
+
+    def limpar_chamadas(self):
+        with self._lock:
+            self.chamadas = []
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name='helpdesk-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def _responder_api(self, caminho):
+        """Retorna (status, corpo) de uma chamada da API."""
+        with self._lock:
+            self.chamadas.append(caminho)
+            status_falha = self.status_falha
+        if status_falha:
+            return status_falha, {'erro': 'falha simulada'}
+
+        if caminho == '/api/contatos_tecnicos':
+            return 200, self.tecnicos
+        if caminho.startswith('/api/usuarios_htpasswd/'):
+            usuario = unquote(caminho[len('/api/usuarios_htpasswd/'):])
+            if usuario not in self.usuarios:
+                return 404, {'erro': 'Usuário não encontrado'}
+            return 200, {'usuario': usuario, 'funcoes': self.usuarios[usuario]}
+        return 404, {'erro': 'Rota não encontrada'}
+
+    def _criar_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, como a sessão do ClienteHelpDesk
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/_stub/falhar':
+                    status = int(parse_qs(url.query).get('status', ['503'])[0])
+                    stub.falhar(status)
+                    self._enviar(200, {'status_falha': status})
+                elif url.path == '/_stub/chamadas':
+                    with stub._lock:
+                        self._enviar(200, list(stub.chamadas))
+                else:
+                    self._enviar(*stub._responder_api(url.path))
+
+            def _enviar(self, status, corpo):
+                dados = json.dumps(corpo).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, formato, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    porta = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    servidor = ServidorHelpDeskStub(porta=porta)
+    print(f"Stub do HelpDesk em {servidor.api_base} (Ctrl+C para sair)")
+    print(f"  usuários: {', '.join(servidor.usuarios)}")
+    print(f"  falhas:   curl 'http://127.0.0.1:{porta}/_stub/falhar?status=503'")
+    try:
+        servidor._servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor._servidor.server_close()
+
+
+if __name__ == '__main__':
+    main()
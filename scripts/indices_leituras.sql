@@ -0,0 +1,64 @@
+-- Índices de apoio para a listagem de leituras RFID (leitoresRFID)
+-- Objetivo: ordenação e consultas por faixa de Horario usadas pela paginação por cursor,
+-- pelo contador incremental do total e pelo índice de fotos em memória
+-- (atualizações incrementais "WHERE Horario > marca d'água").
+
+-- ============================================================================
+-- VERIFICAR ÍNDICES EXISTENTES
+-- ============================================================================
+SHOW INDEX FROM leitoresRFID;
+
+-- ============================================================================
+-- ÍNDICE POR HORÁRIO
+-- ============================================================================
+-- Sem ele, "Horario > %s" e "ORDER BY Horario DESC LIMIT n" varrem a tabela.
+-- ALGORITHM=INPLACE, LOCK=NONE evita bloquear as inserções dos leitores.
+CREATE INDEX idx_leituras_horario
+ON leitoresRFID (Horario)
+ALGORITHM=INPLACE, LOCK=NONE;
+
+-- ============================================================================
+-- ÍNDICE DE ORDENAÇÃO DA LISTAGEM
+-- ============================================================================
+-- A listagem ordena por (Horario, CodigoLeitor, Antena, EtiquetaRFID_hex) DESC
+-- (GerenciadorLeitoresRFID.COLUNAS_ORDENACAO) e o cursor de paginação busca a
+-- partir dessa tupla. Só com (Horario) o MySQL ordena em memória (filesort)
+-- todas as linhas com Horario <= cursor a cada página; com o índice completo
+-- a leitura segue o índice de trás para frente e para no LIMIT, e a página
+-- 500 custa o mesmo que a página 1 (também no modo OFFSET legado).
+-- Sem prefixo em EtiquetaRFID_hex: colunas com prefixo não evitam o filesort.
+-- Torna idx_leituras_horario redundante (prefixo deste índice).
+CREATE INDEX idx_leituras_ordenacao
+ON leitoresRFID (Horario, CodigoLeitor, Antena, EtiquetaRFID_hex)
+ALGORITHM=INPLACE, LOCK=NONE;
+
+-- ============================================================================
+-- ÍNDICE DE ORDENAÇÃO DOS PINGS (pingsRFID)
+-- ============================================================================
+-- Mesmo caso para /api/ping: ORDER BY Horario, Local, antena DESC
+-- (GerenciadorPingRFID.COLUNAS_ORDENACAO).
+CREATE INDEX idx_pings_ordenacao
+ON pingsRFID (Horario, Local, antena)
+ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Conferir (não deve aparecer "Using filesort" em Extra):
+-- EXPLAIN SELECT CodigoLeitor, Horario, Antena, EtiquetaRFID_hex FROM leitoresRFID
+--   ORDER BY Horario DESC, CodigoLeitor DESC, Antena DESC, EtiquetaRFID_hex DESC LIMIT 50;
+-- EXPLAIN SELECT Horario, Local, antena FROM pingsRFID
+--   ORDER BY Horario DESC, Local DESC, antena DESC LIMIT 50;
+
+-- ============================================================================
+-- ÍNDICE POR ETIQUETA + HORÁRIO
+-- ============================================================================
+-- Busca direta da foto mais recente (EtiquetaRFID_hex = %s AND Horario = %s).
+-- Já coberto por idx_ping_stats (EtiquetaRFID_hex(25), Horario), se existir.
+-- CREATE INDEX idx_leituras_etiqueta_horario
+-- ON leitoresRFID (EtiquetaRFID_hex(25), Horario)
+-- ALGORITHM=INPLACE, LOCK=NONE;
+
+-- ============================================================================
+-- ROLLBACK (se necessário)
+-- ============================================================================
+-- DROP INDEX idx_leituras_horario ON leitoresRFID;
+-- DROP INDEX idx_leituras_ordenacao ON leitoresRFID;
+-- DROP INDEX idx_pings_ordenacao ON pingsRFID;
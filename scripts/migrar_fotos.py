@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Move as fotos das linhas de leitoresRFID/pingsRFID para a tabela fotosRFID.
+
+Requer scripts/fotos_rfid.sql aplicado. Processa em lotes curtos (um commit
+por lote), em ordem de Horario, só as linhas com foto na coluna Foto e sem
+FotoId: pode ser interrompido e executado de novo a qualquer momento, e
+também serve para migrar fotos gravadas depois por leitores antigos.
+
+Ao final, conta as linhas com foto ainda sem FotoTamanho; sem nenhuma, a
+aplicação pode usar RFID_FOTOS_MIGRACAO_CONCLUIDA=1.
+
+Uso:
+    python scripts/migrar_fotos.py [--tabela leituras|pings|todas] [--lote 200]
+                                   [--pausa 0.2] [--limite N] [--manter-blob]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Executado a partir de scripts/: usa o pacote da aplicação (config e pool)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.PoolConexoesMySQL import PoolConexoesMySQL  # noqa: E402
+from app.utils.RepositorioFotosRFID import RepositorioFotosRFID  # noqa: E402
+
+# Tabela -> colunas que identificam a linha (não há chave primária)
+TABELAS = {
+    'leituras': ('leitoresRFID', ('EtiquetaRFID_hex', 'CodigoLeitor', 'Antena', 'Horario')),
+    'pings': ('pingsRFID', ('Local', 'antena', 'Horario')),
+}
+
+
+def migrar_tabela(conexao, tabela, chaves, lote, pausa, limite, manter_blob):
+    """
+    Migra as fotos de uma tabela.
+
+    Args:
+        conexao: Conexão MySQL (autocommit desligado)
+        tabela (str): leitoresRFID ou pingsRFID
+        chaves (tuple): Colunas que identificam a linha
+        lote (int): Linhas por transação
+        pausa (float): Segundos de espera entre lotes
+        limite (int): Máximo de fotos a migrar (None = todas)
+        manter_blob (bool): Não zera a coluna Foto das linhas migradas
+
+    Returns:
+        dict: Totais (migradas, ignoradas, bytes, sem_tamanho)
+    """
+    repositorio = RepositorioFotosRFID(tabela)
+    totais = {'migradas': 0, 'ignoradas': 0, 'bytes': 0, 'sem_tamanho': None}
+
+    cursor = conexao.cursor(dictionary=True)
+    try:
+        if not repositorio.separada(cursor):
+            print(f"{tabela}: coluna FotoId não encontrada (aplique scripts/fotos_rfid.sql)")
+            return totais
+
+        # Keyset por Horario: cada lote começa onde o anterior terminou
+        ultimo_horario = None
+        operador = '>='
+        inicio = time.monotonic()
+        while limite is None or totais['migradas'] < limite:
+            tamanho_lote = lote if limite is None else min(lote, limite - totais['migradas'])
+            condicao_horario = f"AND Horario {operador} %s" if ultimo_horario is not None else ""
+            cursor.execute(f"""
+                SELECT {', '.join(chaves)}, Foto
+                FROM {tabela}
+                WHERE FotoId IS NULL
+                  AND Foto IS NOT NULL
+                  AND LENGTH(Foto) > 0
+                  {condicao_horario}
+                ORDER BY Horario
+                LIMIT %s
+            """, ([ultimo_horario] if ultimo_horario is not None else []) + [tamanho_lote])
+            linhas = cursor.fetchall()
+            if not linhas:
+                break
+
+            migradas_lote = 0
+            try:
+                for linha in linhas:
+                    dados = bytes(linha['Foto'])
+                    filtros = {coluna: linha[coluna] for coluna in chaves}
+                    if repositorio.gravar(cursor, filtros, dados, limpar_inline=not manter_blob) is None:
+                        totais['ignoradas'] += 1
+                    else:
+                        migradas_lote += 1
+                        totais['migradas'] += 1
+                        totais['bytes'] += len(dados)
+                conexao.commit()
+            except Exception:
+                conexao.rollback()
+                raise
+
+            # ">=" mantém linhas com o mesmo horário no próximo lote (as já
+            # migradas saem do filtro por FotoId); um lote sem nenhuma gravação
+            # avança estritamente para não repetir as mesmas linhas
+            ultimo_horario = linhas[-1]['Horario']
+            operador = '>=' if migradas_lote else '>'
+
+            decorrido = time.monotonic() - inicio
+            print(
+                f"{tabela}: {totais['migradas']} fotos ({totais['bytes'] / 1024 / 1024:.1f} MB), "
+                f"até {ultimo_horario}, {decorrido:.0f}s"
+            )
+            if pausa:
+                time.sleep(pausa)
+
+        # Linhas que ainda dependem da coluna Foto para "tem foto"
+        cursor.execute(f"""
+            SELECT COUNT(*) AS total
+            FROM {tabela}
+            WHERE COALESCE(FotoTamanho, 0) = 0
+              AND LENGTH(Foto) > 0
+        """)
+        totais['sem_tamanho'] = cursor.fetchone()['total']
+        conexao.commit()
+    finally:
+        cursor.close()
+
+    return totais
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move as fotos das linhas para a tabela fotosRFID")
+    parser.add_argument('--tabela', choices=['leituras', 'pings', 'todas'], default='todas')
+    parser.add_argument('--lote', type=int, default=200, help="Linhas por transação (padrão: 200)")
+    parser.add_argument('--pausa', type=float, default=0.2, help="Segundos entre lotes (padrão: 0.2)")
+    parser.add_argument('--limite', type=int, default=None, help="Máximo de fotos por tabela")
+    parser.add_argument('--manter-blob', action='store_true', help="Não zera a coluna Foto (migração reversível)")
+    args = parser.parse_args()
+
+    nomes = list(TABELAS) if args.tabela == 'todas' else [args.tabela]
+
+    # Conexão própria, fora do pool da aplicação, com transações explícitas
+    pool = PoolConexoesMySQL.get_pool(
+        'migracao_fotos',
+        sessao=["SET SESSION MAX_EXECUTION_TIME=0"],
+        parametros={'autocommit': False}
+    )
+    conexao = pool.obter_conexao()
+    pendentes = 0
+    try:
+        for nome in nomes:
+            tabela, chaves = TABELAS[nome]
+            totais = migrar_tabela(
+                conexao, tabela, chaves, args.lote, args.pausa, args.limite, args.manter_blob
+            )
+            print(
+                f"{tabela}: concluído - {totais['migradas']} fotos migradas "
+                f"({totais['bytes'] / 1024 / 1024:.1f} MB), {totais['ignoradas']} ignoradas"
+            )
+            if totais['sem_tamanho'] is None:
+                pendentes += 1
+            elif totais['sem_tamanho']:
+                pendentes += totais['sem_tamanho']
+                print(f"{tabela}: {totais['sem_tamanho']} linhas com foto ainda sem FotoTamanho")
+    finally:
+        conexao.close()
+
+    if pendentes == 0 and args.limite is None and args.tabela == 'todas':
+        print("Migração concluída: a aplicação pode usar RFID_FOTOS_MIGRACAO_CONCLUIDA=1")
+
+    print("Para recuperar o espaço em disco: OPTIMIZE TABLE (ver scripts/fotos_rfid.sql)")
+
+
+if __name__ == '__main__':
+    main()
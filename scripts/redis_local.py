@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Substituto em memória do cliente redis-py, para exercitar o BackendRedis sem
+um servidor Redis (dois clientes sobre o mesmo ServidorRedisLocal fazem o
+papel de dois workers).
+
+Usado como fixture em tests/test_backends_cache.py; não faz parte da
+aplicação.
+"""
+
+import fnmatch
+import sys
+import threading
+import time
+
+
+def _bytes(valor):
+    """Chaves, valores e membros como bytes, como o redis-py devolve."""
+    if isinstance(valor, bytes):
+        return valor
+    if isinstance(valor, str):
+        return valor.encode('utf-8')
+    return str(valor).encode('utf-8')
+
+
+class ServidorRedisLocal:
+    """
+    Estado de um "servidor" Redis em memória, compartilhável por vários clientes.
+
+    Dois RedisLocal sobre o mesmo servidor se comportam como dois workers
+    ligados ao mesmo Redis: o que um grava ou invalida o outro vê.
+
+    Args:
+        relogio (callable): Fonte do tempo em segundos (padrão: time.time);
+            os testes avançam o relógio para expirar chaves
+    """
+
+    def __init__(self, relogio=None):
+        self.relogio = relogio or time.time
+        self.lock = threading.RLock()
+        self.dados = {}     # chave -> bytes ou set de bytes
+        self.expira = {}    # chave -> epoch
+
+    def vivo(self, chave):
+        """Indica se a chave existe e não expirou, removendo-a se expirou. Chamar com o lock."""
+        limite = self.expira.get(chave)
+        if limite is not None and limite <= self.relogio():
+            self.dados.pop(chave, None)
+            self.expira.pop(chave, None)
+        return chave in self.dados
+
+
+class RedisLocal:
+    """
+    Substituto local do cliente redis-py para o BackendRedis (testes e desenvolvimento).
+
+    Implementa só os comandos usados pelo backend (GET/SET EX, DELETE,
+    SADD/SMEMBERS, EXPIRE, SCAN, INFO, PING e pipelines), com a mesma
+    semântica de expiração. Não substitui um Redis real em produção: o estado
+    fica no processo que criou o ServidorRedisLocal.
+
+    Args:
+        servidor (ServidorRedisLocal): Estado compartilhado (padrão: um novo)
+    """
+
+    def __init__(self, servidor=None):
+        self.servidor = servidor or ServidorRedisLocal()
+
+    def ping(self):
+        return True
+
+    def get(self, chave):
+        chave = _bytes(chave)
+        with self.servidor.lock:
+            if not self.servidor.vivo(chave):
+                return None
+            valor = self.servidor.dados[chave]
+            if isinstance(valor, set):
+                raise TypeError("WRONGTYPE Operation against a key holding the wrong kind of value")
+            return valor
+
+    def set(self, chave, valor, ex=None):
+        chave = _bytes(chave)
+        with self.servidor.lock:
+            self.servidor.dados[chave] = _bytes(valor)
+            if ex is not None:
+                self.servidor.expira[chave] = self.servidor.relogio() + ex
+            else:
+                self.servidor.expira.pop(chave, None)
+        return True
+
+    def delete(self, *chaves):
+        removidas = 0
+        with self.servidor.lock:
+            for chave in map(_bytes, chaves):
+                if self.servidor.vivo(chave):
+                    del self.servidor.dados[chave]
+                    self.servidor.expira.pop(chave, None)
+                    removidas += 1
+        return removidas
+
+    def sadd(self, chave, *membros):
+        chave = _bytes(chave)
+        with self.servidor.lock:
+            if not self.servidor.vivo(chave):
+                self.servidor.dados[chave] = set()
+            conjunto = self.servidor.dados[chave]
+            antes = len(conjunto)
+            conjunto.update(map(_bytes, membros))
+            return len(conjunto) - antes
+
+    def smembers(self, chave):
+        chave = _bytes(chave)
+        with self.servidor.lock:
+            if not self.servidor.vivo(chave):
+                return set()
+            return set(self.servidor.dados[chave])
+
+    def expire(self, chave, segundos):
+        chave = _bytes(chave)
+        with self.servidor.lock:
+            if not self.servidor.vivo(chave):
+                return False
+            self.servidor.expira[chave] = self.servidor.relogio() + segundos
+            return True
+
+    def scan_iter(self, match=None, count=None):
+        padrao = match if isinstance(match, str) else (match or b'*').decode('utf-8')
+        with self.servidor.lock:
+            chaves = [chave for chave in list(self.servidor.dados) if self.servidor.vivo(chave)]
+        for chave in chaves:
+            if fnmatch.fnmatchcase(chave.decode('utf-8'), padrao):
+                yield chave
+
+    def info(self, secao=None):
+        with self.servidor.lock:
+            usada = sum(sys.getsizeof(chave) + sys.getsizeof(valor) for chave, valor in self.servidor.dados.items())
+        return {'used_memory': usada, 'maxmemory': 0}
+
+    def pipeline(self):
+        return _PipelineLocal(self)
+
+
+class _PipelineLocal:
+    """Pipeline do RedisLocal: enfileira os comandos e os executa em ordem no execute()."""
+
+    def __init__(self, cliente):
+        self._cliente = cliente
+        self._comandos = []
+
+    def __getattr__(self, nome):
+        metodo = getattr(self._cliente, nome)
+
+        def enfileirar(*args, **kwargs):
+            self._comandos.append((metodo, args, kwargs))
+            return self
+
+        return enfileirar
+
+    def execute(self):
+        with self._cliente.servidor.lock:
+            resultados = [metodo(*args, **kwargs) for metodo, args, kwargs in self._comandos]
+        self._comandos = []
+        return resultados
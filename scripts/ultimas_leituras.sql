@@ -0,0 +1,86 @@
+-- Materialização das últimas leituras RFID ("onde a etiqueta foi vista por último")
+-- Usada por GerenciadorUltimasLeiturasRFID. O gerenciador também cria as tabelas
+-- (CREATE TABLE IF NOT EXISTS) na primeira execução, se o usuário tiver permissão.
+--
+-- Atualização incremental: a cada execução só as leituras com Horario após a
+-- marca d'água (com uma pequena sobreposição) são agregadas e mescladas com
+-- GREATEST(), o que torna o processo idempotente.
+--
+-- Limitação: a marca é o maior Horario processado, não a ordem de inserção
+-- (leitoresRFID não tem coluna autoincremento). Leituras que chegam atrasadas
+-- com Horario anterior à marca (leitor que ficou offline) entram pela
+-- sobreposição (RFID_ULTIMAS_SOBREPOSICAO, s) ou pela reconciliação periódica
+-- (a cada RFID_ULTIMAS_RECONCILIACAO s, reprocessa RFID_ULTIMAS_DIAS_RECONCILIACAO
+-- dias). Atrasos maiores: usar a RECONSTRUÇÃO COMPLETA no fim deste arquivo.
+
+-- ============================================================================
+-- ÚLTIMA LEITURA POR (ETIQUETA, LEITOR)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS ultimasLeiturasLeitorRFID (
+    EtiquetaRFID_hex VARCHAR(64) NOT NULL,
+    CodigoLeitor VARCHAR(32) NOT NULL,
+    Horario DATETIME NOT NULL,
+    PRIMARY KEY (EtiquetaRFID_hex, CodigoLeitor),
+    KEY idx_ultimas_leitor_horario (Horario)
+);
+
+-- ============================================================================
+-- ÚLTIMA LEITURA POR ETIQUETA (com o leitor correspondente)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS ultimasLeiturasRFID (
+    EtiquetaRFID_hex VARCHAR(64) NOT NULL,
+    CodigoLeitor VARCHAR(32) NOT NULL,
+    Horario DATETIME NOT NULL,
+    PRIMARY KEY (EtiquetaRFID_hex),
+    KEY idx_ultimas_horario (Horario)
+);
+
+-- ============================================================================
+-- MARCAS D'ÁGUA DAS MATERIALIZAÇÕES
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS marcasMaterializacaoRFID (
+    Nome VARCHAR(64) NOT NULL,
+    Horario DATETIME NOT NULL,
+    AtualizadoEm DATETIME NOT NULL,
+    PRIMARY KEY (Nome)
+);
+
+-- ============================================================================
+-- CARGA INICIAL (opcional)
+-- ============================================================================
+-- Sem marca d'água, o gerenciador faz a carga dos últimos 180 dias em uma
+-- thread própria ao iniciar. Em bases grandes, a carga pode ser feita aqui
+-- antes do deploy, fora do horário de uso; o gerenciador então só aplica o delta.
+INSERT INTO ultimasLeiturasLeitorRFID (EtiquetaRFID_hex, CodigoLeitor, Horario)
+SELECT EtiquetaRFID_hex, CodigoLeitor, MAX(Horario)
+FROM leitoresRFID
+WHERE Horario > DATE_SUB(NOW(), INTERVAL 180 DAY) AND RSSI != 0
+GROUP BY EtiquetaRFID_hex, CodigoLeitor
+ON DUPLICATE KEY UPDATE Horario = GREATEST(Horario, VALUES(Horario));
+
+INSERT INTO ultimasLeiturasRFID (EtiquetaRFID_hex, CodigoLeitor, Horario)
+SELECT EtiquetaRFID_hex, CodigoLeitor, Horario
+FROM ultimasLeiturasLeitorRFID
+ON DUPLICATE KEY UPDATE
+    CodigoLeitor = IF(VALUES(Horario) > Horario, VALUES(CodigoLeitor), CodigoLeitor),
+    Horario = GREATEST(Horario, VALUES(Horario));
+
+-- A marca é o maior Horario agregado; leituras posteriores entram pelo delta
+INSERT INTO marcasMaterializacaoRFID (Nome, Horario, AtualizadoEm)
+SELECT 'ultimas_leituras', MAX(Horario), NOW() FROM ultimasLeiturasLeitorRFID
+HAVING MAX(Horario) IS NOT NULL
+ON DUPLICATE KEY UPDATE Horario = VALUES(Horario), AtualizadoEm = VALUES(AtualizadoEm);
+
+-- ============================================================================
+-- CONSULTAS DE VERIFICAÇÃO
+-- ============================================================================
+-- SELECT * FROM marcasMaterializacaoRFID;
+-- SELECT COUNT(*) FROM ultimasLeiturasRFID;
+-- SELECT * FROM ultimasLeiturasRFID WHERE EtiquetaRFID_hex = '...';
+
+-- ============================================================================
+-- RECONSTRUÇÃO COMPLETA (se necessário)
+-- ============================================================================
+-- TRUNCATE ultimasLeiturasLeitorRFID;
+-- TRUNCATE ultimasLeiturasRFID;
+-- DELETE FROM marcasMaterializacaoRFID WHERE Nome = 'ultimas_leituras';
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do BackendRedis contra o substituto local (scripts/redis_local.py).
+
+Dois backends sobre o mesmo ServidorRedisLocal fazem o papel de dois
+workers ligados ao mesmo Redis.
+
+Uso:
+    python -m unittest discover tests
+"""
+
+import importlib.util
+import json
+import os
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def carregar_modulo(nome, diretorio=os.path.join('app', 'utils')):
+    """Carrega um módulo avulso (app/utils ou scripts) sem importar o pacote (não precisa de Flask nem MySQL)."""
+    caminho = os.path.join(RAIZ, diretorio, f'{nome}.py')
+    spec = importlib.util.spec_from_file_location(nome, caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+backends = carregar_modulo('BackendsCache')
+redis_local = carregar_modulo('redis_local', 'scripts')
+serializacao = carregar_modulo('SerializacaoJSON')
+
+
+class RelogioManual:
+    """Relógio do servidor local, avançado pelos testes."""
+
+    def __init__(self):
+        self.agora = 1_000_000.0
+
+    def __call__(self):
+        return self.agora
+
+
+class TesteBackendRedis(unittest.TestCase):
+
+    def setUp(self):
+        self.relogio = RelogioManual()
+        self.servidor = redis_local.ServidorRedisLocal(relogio=self.relogio)
+        self.worker_a = backends.BackendRedis(prefixo='teste', cliente=redis_local.RedisLocal(self.servidor))
+        self.worker_b = backends.BackendRedis(prefixo='teste', cliente=redis_local.RedisLocal(self.servidor))
+
+    def gravar(self, backend, chave, valor, tags=(), retencao=60):
+        agora = self.relogio()
+        backend.gravar(chave, valor, agora + retencao, agora, frozenset(tags), retencao)
+
+    def test_entrada_gravada_por_um_worker_e_lida_pelo_outro(self):
+        chave = ('leituras', ('leituras', (('limite', 50),)))
+        self.gravar(self.worker_a, chave, {'total': 10})
+
+        valor, _, _ = self.worker_b.ler(chave)
+        self.assertEqual(valor, {'total': 10})
+
+    def test_entrada_expira_ao_fim_da_retencao(self):
+        chave = ('etiquetas', 'estatisticas')
+        self.gravar(self.worker_a, chave, 1, retencao=30)
+
+        self.relogio.agora += 30
+        self.assertIsNotNone(self.worker_b.ler(chave))
+
+        # A retenção no servidor é retencao + 1 s
+        self.relogio.agora += 2
+        self.assertIsNone(self.worker_b.ler(chave))
+        self.assertIsNone(self.worker_a.ler(chave))
+
+    def test_invalidacao_por_tag_vale_para_os_dois_workers(self):
+        com_tag = ('inventarios', ('inventario', (('id', 7),)))
+        outra_tag = ('inventarios', ('inventario', (('id', 8),)))
+        self.gravar(self.worker_a, com_tag, 'a', tags={'inventario:7'})
+        self.gravar(self.worker_b, outra_tag, 'b', tags={'inventario:8'})
+
+        removidas = self.worker_b.invalidar_tags({'inventario:7'})
+
+        self.assertEqual(removidas, [('inventarios', backends.codificar_chave_cache(com_tag[1]))])
+        self.assertIsNone(self.worker_a.ler(com_tag))
+        self.assertIsNone(self.worker_b.ler(com_tag))
+        self.assertEqual(self.worker_a.ler(outra_tag)[0], 'b')
+
+    def test_invalidacao_ignora_membros_ja_expirados(self):
+        chave = ('etiquetas', 'lista')
+        self.gravar(self.worker_a, chave, 1, tags={'etiquetas'}, retencao=5)
+        self.gravar(self.worker_a, ('etiquetas', 'total'), 2, tags={'etiquetas'}, retencao=60)
+
+        self.relogio.agora += 10
+        removidas = self.worker_b.invalidar_tags({'etiquetas'})
+
+        self.assertEqual(len(removidas), 1)
+        self.assertIsNone(self.worker_a.ler(('etiquetas', 'total')))
+
+    def test_estado_conta_so_as_chaves_do_prefixo(self):
+        self.gravar(self.worker_a, ('leituras', 'a'), 1)
+        self.gravar(self.worker_a, ('leituras', 'b'), 2, tags={'etiquetas'})
+        self.gravar(self.worker_b, ('ping', 'c'), 3)
+        redis_local.RedisLocal(self.servidor).set('outra:aplicacao', b'x')
+
+        estado = self.worker_b.estado()
+
+        self.assertEqual(estado['itens'], 3)
+        self.assertEqual(estado['namespaces'], {'leituras': {'itens': 2}, 'ping': {'itens': 1}})
+
+    def test_limpar_namespace(self):
+        self.gravar(self.worker_a, ('leituras', 'a'), 1)
+        self.gravar(self.worker_a, ('ping', 'b'), 2)
+
+        self.assertEqual(self.worker_b.limpar('leituras'), 1)
+        self.assertIsNone(self.worker_a.ler(('leituras', 'a')))
+        self.assertIsNotNone(self.worker_a.ler(('ping', 'b')))
+
+
+class TesteBackendMemoria(unittest.TestCase):
+
+    def gravar(self, backend, chave, valor):
+        backend.gravar(chave, valor, 2_000_000_000, 1_000_000, frozenset(), 60)
+
+    def servir(self, backend, chave):
+        """Lê a entrada e a serializa como resposta_json() faria num acerto de cache."""
+        valor, _, _ = backend.ler(chave)
+        return serializacao.serializar_json(serializacao.abrir_resultado(valor, from_cache=True), json.dumps)
+
+    def test_corpo_json_gerado_conta_no_tamanho_da_entrada(self):
+        backend = backends.BackendMemoria(max_itens=10, max_bytes=10 ** 6)
+        retrato = serializacao.congelar({'success': True, 'etiquetas': [{'id': i} for i in range(50)]})
+        self.gravar(backend, ('etiquetas', 'a'), retrato)
+        antes = backend.estado()['bytes']
+
+        self.servir(backend, ('etiquetas', 'a'))
+        self.servir(backend, ('etiquetas', 'a'))
+
+        # O corpo do retrato (sem from_cache) é gerado e contado uma única vez
+        self.assertEqual(backend.estado()['bytes'] - antes, len(json.dumps(dict(retrato))))
+        self.assertEqual(backend.estado()['namespaces']['etiquetas']['bytes'], backend.estado()['bytes'])
+
+    def test_corpos_que_estouram_o_limite_despejam_as_mais_antigas(self):
+        retrato = serializacao.congelar({'linhas': ['x' * 100] * 40})
+        tamanho = backends.estimar_tamanho(retrato)
+        backend = backends.BackendMemoria(max_itens=10, max_bytes=tamanho * 2 + 100)
+        self.gravar(backend, ('leituras', 'antiga'), serializacao.congelar({'linhas': ['y' * 100] * 40}))
+        self.gravar(backend, ('leituras', 'nova'), retrato)
+
+        self.servir(backend, ('leituras', 'nova'))
+
+        self.assertIsNone(backend.ler(('leituras', 'antiga')))
+        self.assertLessEqual(backend.estado()['bytes'], backend.max_bytes)
+        # O despejo é informado na gravação seguinte
+        despejadas = backend.gravar(('leituras', 'outra'), 1, 2_000_000_000, 1_000_000, frozenset(), 60)
+        self.assertEqual(despejadas, [('leituras', 'antiga')])
+
+
+class TesteCodificacaoChave(unittest.TestCase):
+
+    def test_tipos_diferentes_nao_colidem(self):
+        codificar = backends.codificar_chave_cache
+        chaves = [
+            ('leituras', (('inicio', '2024-01-05'),)),
+            ('leituras', (('inicio', date(2024, 1, 5)),)),
+            ('leituras', (('inicio', datetime(2024, 1, 5)),)),
+            ('leituras', (('limite', '1'),)),
+            ('leituras', (('limite', 1),)),
+            ('leituras', (('limite', True),)),
+        ]
+        self.assertEqual(len({codificar(chave) for chave in chaves}), len(chaves))
+
+    def test_codificacao_estavel(self):
+        codificar = backends.codificar_chave_cache
+        self.assertEqual(
+            codificar(('a', frozenset({'x', 'y', 'z'}), Decimal('1.50'))),
+            codificar(('a', frozenset({'z', 'y', 'x'}), Decimal('1.5')))
+        )
+        self.assertEqual(codificar('estatisticas'), 's:estatisticas')
+
+
+if __name__ == '__main__':
+    unittest.main()
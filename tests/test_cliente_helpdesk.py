@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do ClienteHelpDesk contra o stub local da API (scripts/helpdesk_stub.py).
+
+Uso:
+    python -m unittest discover tests
+"""
+
+import importlib.util
+import os
+import sys
+import time
+import unittest
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+from app.utils.ClienteHelpDesk import ClienteHelpDesk  # noqa: E402
+
+spec = importlib.util.spec_from_file_location('helpdesk_stub', os.path.join(RAIZ, 'scripts', 'helpdesk_stub.py'))
+helpdesk_stub = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(helpdesk_stub)
+
+
+class TesteClienteHelpDesk(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = helpdesk_stub.ServidorHelpDeskStub().iniciar()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.parar()
+
+    def setUp(self):
+        self.stub.falhar(0)
+        self.stub.limpar_chamadas()
+        self.cliente = ClienteHelpDesk(config={
+            'api_base': self.stub.api_base,
+            'timeout': 2,
+            'falhas_para_abrir': 2,
+            'tempo_circuito_aberto': 0.3
+        })
+        # O namespace 'helpdesk' do CacheRFID é compartilhado entre instâncias
+        self.cliente.limpar_cache()
+
+    def tearDown(self):
+        self.cliente.limpar_cache()
+        self.cliente.sessao.close()
+
+    def test_competencias_do_cadastro_do_usuario(self):
+        self.assertEqual(self.cliente.obter_competencias('Joao'), ['ALMOXARIFADO'])
+
+    def test_sem_funcoes_usa_a_lista_de_tecnicos(self):
+        self.assertEqual(self.cliente.obter_competencias('maria'), ['ELETRICA'])
+        self.assertEqual(
+            self.stub.chamadas, ['/api/usuarios_htpasswd/maria', '/api/contatos_tecnicos']
+        )
+
+    def test_usuario_nao_encontrado_fica_em_cache_negativo(self):
+        self.assertEqual(self.cliente.obter_competencias('desconhecido'), [])
+        self.assertEqual(self.cliente.obter_competencias('desconhecido'), [])
+        self.assertEqual(len(self.stub.chamadas), 1)
+        self.assertEqual(self.cliente.obter_metricas()['circuito'], 'fechado')
+
+    def test_erros_5xx_abrem_e_a_recuperacao_fecha_o_circuito(self):
+        self.stub.falhar(503)
+        self.assertEqual(self.cliente.obter_competencias('x1'), [])
+        self.assertEqual(self.cliente.obter_competencias('x2'), [])
+        self.assertEqual(self.cliente.obter_metricas()['circuito'], 'aberto')
+
+        # Circuito aberto: falha na hora, sem chamar a API
+        self.assertEqual(self.cliente.obter_competencias('x3'), [])
+        self.assertEqual(len(self.stub.chamadas), 2)
+        self.assertEqual(self.cliente.obter_metricas()['rejeitadas'], 1)
+
+        # Depois do tempo de circuito aberto, uma chamada de teste bem-sucedida fecha o circuito
+        self.stub.falhar(0)
+        time.sleep(0.35)
+        self.assertEqual(self.cliente.obter_competencias('joao'), ['ALMOXARIFADO'])
+        metricas = self.cliente.obter_metricas()
+        self.assertEqual(metricas['circuito'], 'fechado')
+        self.assertEqual(metricas['aberturas_circuito'], 1)
+
+    def test_chamada_de_teste_com_falha_reabre_o_circuito(self):
+        self.stub.falhar(500)
+        self.cliente.obter_competencias('x1')
+        self.cliente.obter_competencias('x2')
+        time.sleep(0.35)
+
+        self.cliente.obter_competencias('x3')
+        metricas = self.cliente.obter_metricas()
+        self.assertEqual(metricas['circuito'], 'aberto')
+        self.assertEqual(metricas['aberturas_circuito'], 2)
+
+    def test_ultimo_resultado_vale_durante_indisponibilidade_longa(self):
+        self.assertEqual(self.cliente.obter_competencias('ana'), ['ALMOXARIFADO', 'PATRIMONIO'])
+
+        # Indisponibilidade maior que TTL + tolerância: a entrada normal já não existe
+        self.cliente.cache.remover('competencias:ana')
+        self.stub.falhar(503)
+
+        self.assertEqual(self.cliente.obter_competencias('ana'), ['ALMOXARIFADO', 'PATRIMONIO'])
+
+    def test_sem_resultado_anterior_nega_durante_indisponibilidade(self):
+        self.stub.falhar(502)
+        self.assertEqual(self.cliente.obter_competencias('joao'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da paginação por cursor com tuplas de ordenação repetidas.
+
+A consulta é simulada em Python com a mesma semântica da condição de seek
+(tupla < posição, ou <= no modo inclusivo) e de ORDER BY ... DESC LIMIT.
+
+Uso:
+    python -m unittest discover tests
+"""
+
+import importlib.util
+import os
+import unittest
+from datetime import datetime
+
+caminho = os.path.join(os.path.dirname(__file__), '..', 'app', 'utils', 'CursorPaginacao.py')
+spec = importlib.util.spec_from_file_location('CursorPaginacao', caminho)
+paginacao = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(paginacao)
+
+
+def chave(linha):
+    return [linha['Horario'], linha['Local'], linha['antena']]
+
+
+def consultar(tabela, posicao, inclusiva, limite):
+    """Equivalente a WHERE <seek> ORDER BY Horario DESC, Local DESC, antena DESC LIMIT limite."""
+    linhas = sorted(tabela, key=lambda linha: tuple(chave(linha)), reverse=True)
+    if posicao is not None:
+        linhas = [
+            linha for linha in linhas
+            if tuple(chave(linha)) < tuple(posicao) or (inclusiva and chave(linha) == posicao)
+        ]
+    return linhas[:limite]
+
+
+def paginar(tabela, limite):
+    """Percorre todas as páginas como GerenciadorPingRFID.obter_pings no modo cursor."""
+    entregues_total = []
+    cursor = ''
+    while cursor is not None:
+        posicao, entregues = paginacao.decodificar_cursor(cursor, 3) if cursor else (None, None)
+        linhas = consultar(tabela, posicao, bool(entregues), limite + (entregues or 0))
+        if entregues:
+            linhas = paginacao.pular_entregues(linhas, posicao, entregues, chave)[:limite]
+        entregues_total.extend(linhas)
+        cursor = paginacao.cursor_seguinte(linhas, chave, posicao, entregues or 0) if len(linhas) == limite else None
+    return entregues_total
+
+
+class TestePaginacaoCursor(unittest.TestCase):
+
+    def setUp(self):
+        horario = datetime(2026, 1, 5, 10, 0, 0)
+        outro = datetime(2026, 1, 5, 9, 0, 0)
+        # Sem chave primária: grupos de linhas idênticas na tupla de ordenação
+        self.tabela = (
+            [{'Horario': horario, 'Local': 'SALA', 'antena': 1, 'n': i} for i in range(5)]
+            + [{'Horario': horario, 'Local': 'ALMOX', 'antena': 2, 'n': i} for i in range(5, 7)]
+            + [{'Horario': outro, 'Local': 'SALA', 'antena': 1, 'n': i} for i in range(7, 10)]
+        )
+
+    def test_duplicatas_na_fronteira_nao_sao_perdidas(self):
+        for limite in (1, 2, 3, 4, 6):
+            with self.subTest(limite=limite):
+                linhas = paginar(self.tabela, limite)
+                self.assertEqual(sorted(linha['n'] for linha in linhas), list(range(10)))
+
+    def test_cursor_guarda_a_contagem_do_grupo_que_atravessa_paginas(self):
+        primeira = consultar(self.tabela, None, False, 2)
+        cursor = paginacao.cursor_seguinte(primeira, chave)
+        posicao, entregues = paginacao.decodificar_cursor(cursor, 3)
+        self.assertEqual(entregues, 2)
+
+        segunda = paginacao.pular_entregues(consultar(self.tabela, posicao, True, 4), posicao, entregues, chave)[:2]
+        _, entregues = paginacao.decodificar_cursor(paginacao.cursor_seguinte(segunda, chave, posicao, 2), 3)
+        self.assertEqual(entregues, 4)
+
+    def test_cursor_antigo_sem_contagem_continua_valido(self):
+        antigo = paginacao.codificar_cursor([datetime(2026, 1, 5), 'SALA'], 1)
+        posicao, entregues = paginacao.decodificar_cursor(antigo, 3)
+        self.assertIsNone(entregues)
+        self.assertEqual(posicao[1:], ['SALA', 1])
+
+        with self.assertRaises(ValueError):
+            paginacao.decodificar_cursor(paginacao.codificar_cursor([1, 2, 3], 0), 3)
+
+    def test_condicao_inclusiva_so_na_ultima_coluna(self):
+        condicao, params = paginacao.montar_condicao_seek(['Horario', 'Local'], ['h', 'l'], inclusiva=True)
+        self.assertEqual(condicao, "Horario <= %s AND ((Horario < %s) OR (Horario = %s AND Local <= %s))")
+        self.assertEqual(params, ['h', 'h', 'h', 'l'])
+
+
+if __name__ == '__main__':
+    unittest.main()
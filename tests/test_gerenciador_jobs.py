@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do GerenciadorJobsRFID: uploads de jobs finalizados e de jobs órfãos.
+
+Cada teste usa um DATA_DIR temporário (SQLite e diretório de uploads próprios).
+
+Uso:
+    python -m unittest discover tests
+"""
+
+import io
+import os
+import socket
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils import GerenciadorJobsRFID as modulo  # noqa: E402
+
+
+class TesteUploadsJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.data_dir_original = modulo.DATA_DIR
+        modulo.DATA_DIR = self.diretorio.name
+        self.gerenciadores = []
+
+    def tearDown(self):
+        for gerenciador in self.gerenciadores:
+            gerenciador._parar.set()
+            gerenciador.executor.shutdown(wait=True)
+        modulo.GerenciadorJobsRFID._instance = None
+        modulo.DATA_DIR = self.data_dir_original
+        self.diretorio.cleanup()
+
+    def criar_gerenciador(self):
+        modulo.GerenciadorJobsRFID._instance = None
+        gerenciador = modulo.GerenciadorJobsRFID(max_workers=1, intervalo_sinal_vida=3600)
+        self.gerenciadores.append(gerenciador)
+        return gerenciador
+
+    def aguardar(self, gerenciador, job_id):
+        for _ in range(200):
+            job = gerenciador.obter_job(job_id)
+            if job['finalizado']:
+                return job
+            time.sleep(0.01)
+        self.fail('Job não finalizou')
+
+    def test_upload_apagado_ao_final_do_job(self):
+        gerenciador = self.criar_gerenciador()
+        caminho = gerenciador.salvar_upload(io.BytesIO(b'EPC\nABC\n'))
+
+        job_id = gerenciador.submeter('processar_csv', lambda contexto: {'success': True}, arquivo=caminho)
+
+        self.assertEqual(self.aguardar(gerenciador, job_id)['status'], 'concluido')
+        self.assertFalse(os.path.exists(caminho))
+
+    def test_upload_de_job_orfao_apagado_ao_encerrar(self):
+        gerenciador = self.criar_gerenciador()
+        caminho = gerenciador.salvar_upload(io.BytesIO(b'EPC\nABC\n'))
+
+        # Job de um processo que não existe mais, no mesmo host
+        agora = datetime.now().isoformat(timespec='seconds')
+        conexao = gerenciador._conectar()
+        try:
+            conexao.execute("""
+                INSERT INTO jobs (id, tipo, status, criado_em, dono, sinal_vida, arquivo)
+                VALUES ('orfao', 'processar_csv', 'executando', ?, ?, ?, ?)
+            """, (agora, f"{socket.gethostname()}:{2 ** 22 + 1}", agora, caminho))
+            conexao.commit()
+        finally:
+            conexao.close()
+
+        gerenciador._encerrar_jobs_orfaos()
+
+        self.assertEqual(gerenciador.obter_job('orfao')['status'], 'erro')
+        self.assertFalse(os.path.exists(caminho))
+
+    def test_arquivo_fora_do_diretorio_de_uploads_nao_e_apagado(self):
+        gerenciador = self.criar_gerenciador()
+        fora = os.path.join(self.diretorio.name, 'outro.csv')
+        with open(fora, 'wb') as arquivo:
+            arquivo.write(b'x')
+
+        gerenciador._remover_arquivo(fora)
+
+        self.assertTrue(os.path.exists(fora))
+
+
+if __name__ == '__main__':
+    unittest.main()
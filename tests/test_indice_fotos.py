@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do IndiceFotosRFID: a conexão só é aberta quando o índice precisa atualizar.
+
+Uso:
+    python -m unittest discover tests
+"""
+
+import importlib.util
+import os
+import unittest
+from datetime import datetime
+
+caminho = os.path.join(os.path.dirname(__file__), '..', 'app', 'utils', 'IndiceFotosRFID.py')
+spec = importlib.util.spec_from_file_location('IndiceFotosRFID', caminho)
+modulo = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(modulo)
+
+
+class CursorFalso:
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.consultas = 0
+        self.fechado = False
+
+    def execute(self, sql, parametros=None):
+        self.consultas += 1
+
+    def fetchall(self):
+        return self.linhas
+
+    def close(self):
+        self.fechado = True
+
+
+class ConexaoFalsa:
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.fechada = False
+
+    def cursor(self, dictionary=False):
+        return self._cursor
+
+    def close(self):
+        self.fechada = True
+
+
+class TesteConexaoSobDemanda(unittest.TestCase):
+
+    def test_indice_atual_nao_abre_conexao(self):
+        abertas = []
+        cursor = CursorFalso([
+            {'EtiquetaRFID_hex': 'abc1', 'total_fotos': 2, 'ultima_foto': datetime(2025, 1, 2)},
+        ])
+
+        def obter_conexao():
+            conexao = ConexaoFalsa(cursor)
+            abertas.append(conexao)
+            return conexao
+
+        indice = modulo.IndiceFotosRFID(intervalo_atualizacao=3600, obter_conexao=obter_conexao)
+
+        fotos = indice.obter_varios(None, ['ABC1', 'FFFF'])
+        self.assertTrue(fotos['ABC1']['tem_foto'])
+        self.assertEqual(fotos['ABC1']['total_fotos'], 2)
+        self.assertFalse(fotos['FFFF']['tem_foto'])
+        self.assertEqual(len(abertas), 1)
+        self.assertTrue(abertas[0].fechada and cursor.fechado)
+
+        # Dentro do intervalo: responde pelo índice, sem tocar no banco
+        indice.obter_varios(None, ['ABC1'])
+        indice.obter(None, 'FFFF')
+        self.assertEqual(len(abertas), 1)
+        self.assertEqual(cursor.consultas, 1)
+
+    def test_cursor_recebido_dispensa_obter_conexao(self):
+        def obter_conexao():
+            raise AssertionError("não deveria abrir conexão")
+
+        indice = modulo.IndiceFotosRFID(obter_conexao=obter_conexao)
+        cursor = CursorFalso([])
+
+        self.assertEqual(indice.obter_varios(cursor, ['ABC1'])['ABC1']['total_fotos'], 0)
+        self.assertEqual(cursor.consultas, 1)
+        self.assertFalse(cursor.fechado)
+
+
+if __name__ == '__main__':
+    unittest.main()